@@ -0,0 +1,89 @@
+"""
+Команды обслуживания сервиса.
+
+    python -m app.cli import tasks.ndjson --batch-size 5000
+    python -m app.cli import tasks.csv --format csv --offset 120000
+    python -m app.cli adopt-schema
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from collections.abc import AsyncIterator
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.db.database import SessionLocal, adopt_schema, engine
+from app.services.import_service import IMPORT_FORMATS, ImportService, read_lines
+
+READ_CHUNK = 2**20
+
+
+async def _read_file(path: str) -> AsyncIterator[bytes]:
+    with open(path, "rb") as file:
+        while chunk := file.read(READ_CHUNK):
+            yield chunk
+
+
+def _print_progress(report: dict) -> None:
+    print(
+        f"offset {report['offset']}: inserted {report['inserted']}, "
+        f"skipped {report['skipped']}",
+        file=sys.stderr,
+    )
+
+
+async def run_import(
+    sessionmaker: async_sessionmaker,
+    path: str,
+    import_format: str,
+    batch_size: int = 1000,
+    offset: int = 0,
+) -> dict:
+    async with sessionmaker() as db:
+        return await ImportService(db).import_tasks(
+            read_lines(_read_file(path)),
+            import_format,
+            batch_size,
+            offset,
+            on_progress=_print_progress,
+        )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+    import_parser = commands.add_parser("import", help="импорт задач из NDJSON/CSV")
+    import_parser.add_argument("path")
+    import_parser.add_argument("--format", choices=IMPORT_FORMATS)
+    import_parser.add_argument("--batch-size", type=int, default=1000)
+    import_parser.add_argument("--offset", type=int, default=0)
+    commands.add_parser(
+        "adopt-schema", help="перевести БД, созданную create_all, под миграции"
+    )
+    args = parser.parse_args(argv)
+
+    if args.command == "adopt-schema":
+        adopted = asyncio.run(adopt_schema(engine))
+        print(
+            (
+                "schema adopted and upgraded to head"
+                if adopted
+                else "nothing to adopt: run alembic upgrade head"
+            ),
+            file=sys.stderr,
+        )
+        return 0
+
+    # формат по расширению файла, если не указан явно
+    import_format = args.format or ("csv" if args.path.endswith(".csv") else "ndjson")
+    report = asyncio.run(
+        run_import(SessionLocal, args.path, import_format, args.batch_size, args.offset)
+    )
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    return 0 if report["completed"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
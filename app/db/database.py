@@ -1,17 +1,218 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from datetime import UTC, datetime
+from pathlib import Path
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./taskasaurus.db"
+from sqlalchemy import event, insert, inspect, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.config import Settings, settings
+from app.models import DATA_SCOPES, Base, DataVersion
+from app.models.search import POSTGRESQL_SEARCH_DDL, SQLITE_SEARCH_DDL
+
+SQLALCHEMY_DATABASE_URL = settings.database_url
+MIGRATIONS_DIR = Path(__file__).resolve().parents[2] / "migrations"
+# БД, созданные Base.metadata.create_all до миграций, доводятся до этой
+# ревизии: индексы 0001, поиск 0002 и строки data_versions 0003
+ADOPTED_REVISION = "0003"
+ADOPTED_INDEXES = (
+    "ix_categories_id",
+    "ix_categories_created_at_id",
+    "ix_tasks_id",
+    "ix_tasks_title_id",
+    "ix_tasks_status_id",
+    "ix_tasks_priority_id",
+    "ix_tasks_due_date_id",
+    "ix_tasks_created_at_id",
+    "ix_tasks_updated_at_id",
+    "ix_tasks_category_id_created_at",
+    "ix_tasks_parent_id",
+    "ix_tasks_open_due_date",
+)
+
+
+def create_engine_from_settings(
+    settings: Settings, url: str | None = None
+) -> AsyncEngine:
+    """Engine с пулом и параметрами соединений из настроек; url — для реплик"""
+    url = make_url(url or settings.database_url)
+    pool_options = {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+        "pool_recycle": settings.db_pool_recycle,
+    }
+
+    if url.get_backend_name() != "sqlite":
+        connect_args = {}
+        if url.get_driver_name() == "asyncpg" and settings.db_statement_timeout:
+            connect_args["server_settings"] = {
+                "statement_timeout": str(settings.db_statement_timeout)
+            }
+        return create_async_engine(
+            url, echo=settings.db_echo, connect_args=connect_args, **pool_options
+        )
+
+    if url.database in (None, "", ":memory:"):
+        # база в памяти живет в одном соединении: пул по умолчанию (StaticPool)
+        engine = create_async_engine(url, echo=settings.db_echo)
+    else:
+        # по умолчанию у файловой SQLite NullPool: новое соединение и PRAGMA
+        # на каждую сессию
+        engine = create_async_engine(
+            url,
+            echo=settings.db_echo,
+            poolclass=AsyncAdaptedQueuePool,
+            **pool_options,
+        )
+    event.listen(engine.sync_engine, "connect", _sqlite_pragmas(settings))
+    return engine
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+
+def _sqlite_pragmas(settings: Settings):
+    pragmas = {
+        # WAL: читатели не блокируют писателя и наоборот; с synchronous=NORMAL
+        # fsync только при checkpoint, а не на каждый коммит
+        "journal_mode": settings.sqlite_journal_mode,
+        "synchronous": settings.sqlite_synchronous,
+        "mmap_size": settings.sqlite_mmap_size,
+        "busy_timeout": settings.sqlite_busy_timeout,
+    }
+
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    return set_pragmas
+
+
+engine = create_engine_from_settings(settings)
+SessionLocal = async_sessionmaker(
+    bind=engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
 )
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+replica_engines = [
+    create_engine_from_settings(settings, url) for url in settings.database_replica_urls
+]
+# сессии реплик кэшируют результаты в разделе основной БД: его сбрасывают
+# коммиты, а отставание реплики ограничено окном read-your-writes
+ReplicaSessionLocals = [
+    async_sessionmaker(
+        bind=replica,
+        class_=AsyncSession,
+        autoflush=False,
+        expire_on_commit=False,
+        info={"primary": engine, "replica_lag": settings.replica_stickiness},
+    )
+    for replica in replica_engines
+]
+
+
+def _alembic_config(connection):
+    # alembic нужен только здесь: не импортируем его при каждом старте
+    from alembic.config import Config
+
+    # без alembic.ini: его fileConfig перенастроил бы логи uvicorn
+    config = Config()
+    config.set_main_option("script_location", str(MIGRATIONS_DIR))
+    config.attributes["connection"] = connection
+    return config
 
 
-def get_db():
-    db = SessionLocal()
-    try:
+def _adopt(connection) -> bool:
+    # см. adopt_schema; False — БД уже под миграциями или пуста
+    from alembic import command
+
+    inspector = inspect(connection)
+    tables = set(inspector.get_table_names())
+    if "alembic_version" in tables or "tasks" not in tables:
+        return False
+
+    existing = {
+        index["name"]
+        for table in ("categories", "tasks")
+        for index in inspector.get_indexes(table)
+    }
+    indexes = {
+        index.name: index
+        for table in Base.metadata.tables.values()
+        for index in table.indexes
+    }
+    for name in ADOPTED_INDEXES:
+        if name not in existing:
+            indexes[name].create(connection)
+
+    # DDL поиска идемпотентен; FTS-индекс SQLite заполняется один раз
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        for statement in SQLITE_SEARCH_DDL:
+            connection.exec_driver_sql(statement)
+        if "tasks_fts" not in tables:
+            connection.exec_driver_sql(
+                "INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild')"
+            )
+    elif dialect == "postgresql":
+        for statement in POSTGRESQL_SEARCH_DDL:
+            connection.exec_driver_sql(statement)
+
+    DataVersion.__table__.create(connection, checkfirst=True)
+    scopes = set(connection.scalars(select(DataVersion.scope)))
+    missing = [scope for scope in DATA_SCOPES if scope not in scopes]
+    if missing:
+        now = datetime.now(UTC)
+        connection.execute(
+            insert(DataVersion),
+            [{"scope": scope, "version": 0, "updated_at": now} for scope in missing],
+        )
+
+    config = _alembic_config(connection)
+    command.stamp(config, ADOPTED_REVISION)
+    command.upgrade(config, "head")
+    return True
+
+
+async def run_migrations(engine: AsyncEngine) -> None:
+    """
+    Применяет миграции Alembic до head через соединение engine; БД,
+    созданную create_all, сначала переводит под миграции (adopt_schema)
+    """
+    from alembic import command
+
+    def upgrade(connection):
+        if not _adopt(connection):
+            command.upgrade(_alembic_config(connection), "head")
+
+    async with engine.begin() as conn:
+        await conn.run_sync(upgrade)
+
+
+async def adopt_schema(engine: AsyncEngine) -> bool:
+    """
+    Переводит под миграции БД без версии Alembic, созданную create_all.
+
+    Такая БД могла быть создана любой версией сервиса до миграций, поэтому
+    недостающие объекты ревизий до ADOPTED_REVISION создаются по одному,
+    затем ставится ее версия и применяются остальные миграции. Все — в
+    одной транзакции. Возвращает False, если БД уже под миграциями или
+    пуста: тогда достаточно alembic upgrade head.
+    """
+    async with engine.begin() as conn:
+        return await conn.run_sync(_adopt)
+
+
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+
+def get_sessionmaker():
+    # для ответов, которые читают БД уже после выхода из обработчика
+    # (StreamingResponse): сессия из get_db к этому моменту закрыта
+    return SessionLocal
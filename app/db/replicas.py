@@ -0,0 +1,75 @@
+import itertools
+import time
+
+from fastapi import Depends, Request
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from starlette.datastructures import MutableHeaders
+
+from app.config import settings
+from app.db.database import ReplicaSessionLocals, get_sessionmaker
+
+# cookie со временем последней записи клиента
+LAST_WRITE_COOKIE = "last_write"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+_next_replica = itertools.count()
+
+
+def get_replicas() -> list[async_sessionmaker]:
+    return ReplicaSessionLocals
+
+
+def wrote_recently(request: Request) -> bool:
+    """Писал ли клиент в течение окна read-your-writes"""
+    try:
+        written_at = float(request.cookies.get(LAST_WRITE_COOKIE, ""))
+    except ValueError:
+        return False
+    return time.time() - written_at < settings.replica_stickiness
+
+
+def get_read_sessionmaker(
+    request: Request,
+    primary: async_sessionmaker = Depends(get_sessionmaker),
+    replicas: list[async_sessionmaker] = Depends(get_replicas),
+) -> async_sessionmaker:
+    """
+    Сессии для GET: реплики по кругу или основная БД.
+
+    Клиент, который недавно писал, читает из основной БД, пока реплика
+    может еще не получить его запись. Зависимость кэшируется на запрос,
+    поэтому conditional() и обработчик читают из одной базы.
+    """
+    if not replicas or wrote_recently(request):
+        return primary
+    return replicas[next(_next_replica) % len(replicas)]
+
+
+async def get_read_db(
+    sessionmaker: async_sessionmaker = Depends(get_read_sessionmaker),
+):
+    async with sessionmaker() as db:
+        yield db
+
+
+class ReadYourWritesMiddleware:
+    """Ставит cookie last_write на успешные ответы изменяющих запросов"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                cookie = (
+                    f"{LAST_WRITE_COOKIE}={time.time():.3f}; Path=/; HttpOnly;"
+                    f" SameSite=Lax; Max-Age={int(settings.replica_stickiness) + 1}"
+                )
+                MutableHeaders(scope=message).append("Set-Cookie", cookie)
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
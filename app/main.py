@@ -1,14 +1,37 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import Depends, FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.database import engine
-from app.models.base import Base
+from app.config import settings
+from app.db.database import engine, get_db, replica_engines, run_migrations
+from app.db.replicas import ReadYourWritesMiddleware
 from app.routes.calendar_router import router as calendar_router
 from app.routes.categories_router import router as categories_router
 from app.routes.tasks_router import router as tasks_router
+from app.utils.cache import result_cache
+from app.utils.due_index import due_index
+from app.utils.instrumentation import QueryStatsMiddleware
+from app.utils.metrics import MetricsMiddleware, instrument_engine
+from app.utils.serialization import PydanticJSONResponse
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # схемой управляют миграции: старт воркера не обращается к БД
+    if settings.db_migrate_on_startup:
+        await run_migrations(engine)
+    if due_index.enabled:
+        await due_index.rebuild(engine)
+    yield
+    await engine.dispose()
+    for replica in replica_engines:
+        await replica.dispose()
 
-# создаем таблицы в БД
-Base.metadata.create_all(bind=engine)
 
 app = FastAPI(
     title="Taskasaurus Rex",
@@ -16,6 +39,8 @@ app = FastAPI(
     docs_url="/docs",
     redoc_url="/redoc",
     openapi_url="/openapi.json",
+    lifespan=lifespan,
+    default_response_class=PydanticJSONResponse,
 )
 
 app.add_middleware(
@@ -25,6 +50,10 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(ReadYourWritesMiddleware)
+app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(MetricsMiddleware)
+instrument_engine(engine)
 
 app.include_router(tasks_router)
 app.include_router(categories_router)
@@ -52,10 +81,10 @@ async def root():
     "/health",
     tags=["Health"],
     summary="Health check",
-    description="Проверка состояния сервиса",
+    description="Проверка состояния сервиса и доступности БД",
     response_description="Статус работы сервиса",
 )
-async def health_check():
+async def health_check(response: Response, db: AsyncSession = Depends(get_db)):
     """
     Endpoint для мониторинга состояния сервиса.
 
@@ -65,6 +94,80 @@ async def health_check():
     - Load balancer health checks
 
     Возвращает:
-    - **status**: Текущее состояние сервиса
+    - **status**: Текущее состояние сервиса; `unhealthy` и код 503, если БД
+      не отвечает
+    - **database**: Результат запроса `SELECT 1`
+    """
+    try:
+        await db.execute(text("SELECT 1"))
+    except (SQLAlchemyError, OSError):
+        response.status_code = 503
+        return {
+            "status": "unhealthy",
+            "service": "taskasaurus-rex",
+            "database": "unavailable",
+        }
+    return {"status": "healthy", "service": "taskasaurus-rex", "database": "ok"}
+
+
+@app.get(
+    "/cache/stats",
+    tags=["Health"],
+    summary="Cache stats",
+    description="Счетчики кэша результатов чтения",
+    response_description="Попадания, промахи и размер кэша",
+)
+async def cache_stats():
+    """
+    Счетчики in-process кэша календаря и списков задач.
+
+    Возвращает:
+    - **hits** / **misses**: Попадания и промахи с запуска процесса
+    - **hit_rate**: Доля попаданий
+    - **entries**: Текущее число записей
+    """
+    return result_cache.stats()
+
+
+@app.get(
+    "/cache/due-index",
+    tags=["Health"],
+    summary="Due index check",
+    description="Сверка in-process индекса сроков с БД",
+    response_description="Расхождения индекса и БД",
+)
+async def due_index_check(db: AsyncSession = Depends(get_db)):
+    """
+    Сверяет индекс незавершенных задач по сроку (`DUE_INDEX=true`) с БД.
+
+    Возвращает:
+    - **enabled**: Включен ли индекс
+    - **consistent**: Совпадает ли индекс с БД
+    - **tasks**: Задач в индексе
+    - **missing** / **extra** / **stale**: id задач, которых нет в индексе,
+      лишних и с устаревшими полями
+    """
+    if not due_index.enabled:
+        return {"enabled": False}
+    return {"enabled": True, **await due_index.check(db)}
+
+
+@app.get(
+    "/metrics",
+    tags=["Health"],
+    summary="Prometheus metrics",
+    description="Метрики сервиса в текстовом формате Prometheus",
+    response_description="Метрики запросов и пула соединений",
+)
+async def metrics():
+    """
+    Метрики для Prometheus.
+
+    Возвращает:
+    - **http_request_duration_seconds**: Гистограмма времени ответа по маршрутам
+    - **http_requests_total**: Запросы по маршрутам и кодам ответа
+    - **http_requests_in_progress**: Запросы в обработке
+    - **http_response_size_bytes**: Гистограмма размера ответа
+    - **db_pool_***: Ожидание и занятость пула соединений
     """
-    return {"status": "healthy", "service": "taskasaurus-rex"}
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -1,5 +1,39 @@
+from app.models import search  # noqa: F401  DDL полнотекстового поиска
 from app.models.base import Base
 from app.models.category import Category
-from app.models.task import Task, TaskPriority, TaskStatus
+from app.models.data_version import (
+    DATA_SCOPES,
+    DataVersion,
+    bump_data_versions,
+    record_data_versions,
+)
+from app.models.task import (
+    CLOSED_STATUSES,
+    TASK_COLUMNS,
+    Task,
+    TaskPriority,
+    TaskRecord,
+    TaskStatus,
+    open_task_filter,
+    task_records,
+)
+from app.models.task_occurrence import OccurrenceRecord, TaskOccurrence
 
-__all__ = ["Base", "Task", "Category", "TaskStatus", "TaskPriority"]
+__all__ = [
+    "Base",
+    "Task",
+    "TASK_COLUMNS",
+    "TaskRecord",
+    "task_records",
+    "TaskOccurrence",
+    "OccurrenceRecord",
+    "Category",
+    "DataVersion",
+    "DATA_SCOPES",
+    "bump_data_versions",
+    "record_data_versions",
+    "TaskStatus",
+    "TaskPriority",
+    "CLOSED_STATUSES",
+    "open_task_filter",
+]
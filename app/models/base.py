@@ -1,8 +1,18 @@
 from sqlalchemy import MetaData
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.sql.functions import now
 
 metadata = MetaData()
 
 
 class Base(DeclarativeBase):
     metadata = metadata
+
+
+@compiles(now, "sqlite")
+def _sqlite_now(element, compiler, **kw):
+    # CURRENT_TIMESTAMP в SQLite пишет дату без долей секунды, а SQLAlchemy
+    # передает параметры в формате с микросекундами: строки не совпадают при
+    # сравнении, поэтому пишем дату в том же формате
+    return "STRFTIME('%Y-%m-%d %H:%M:%f000', 'now')"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, DateTime, Integer, String, func
+from sqlalchemy import Column, DateTime, Index, Integer, String, func
 from sqlalchemy.orm import relationship
 
 from .base import Base
@@ -6,6 +6,8 @@ from .base import Base
 
 class Category(Base):
     __tablename__ = "categories"
+    __table_args__ = (Index("ix_categories_created_at_id", "created_at", "id"),)
+    __mapper_args__ = {"eager_defaults": True}
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), nullable=False, unique=True)
@@ -15,6 +17,6 @@ class Category(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
-    tasks = relationship(
-        "Task", back_populates="category", cascade="all, delete-orphan"
-    )
+    # задачи категории не удаляются вместе с ней: category_id обнуляется
+    # внешним ключом (ON DELETE SET NULL) или CategoryService.delete_category
+    tasks = relationship("Task", back_populates="category", passive_deletes=True)
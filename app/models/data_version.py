@@ -0,0 +1,77 @@
+from datetime import UTC, datetime
+
+from sqlalchemy import Column, DateTime, Integer, String, event, insert, update
+from sqlalchemy.orm import Session
+
+from .base import Base
+from .category import Category
+from .task import Task
+from .task_occurrence import TaskOccurrence
+
+# области данных, у каждой свой счетчик версии
+DATA_SCOPES = ("tasks", "categories")
+
+
+class DataVersion(Base):
+    """
+    Версия области данных: растет на каждой записи в ее таблицы.
+
+    Хранится в БД и меняется в той же транзакции, что и данные, поэтому
+    одинакова для всех воркеров. По ней строятся ETag и Last-Modified.
+    """
+
+    __tablename__ = "data_versions"
+
+    scope = Column(String(20), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), nullable=False)
+
+
+def bump_data_versions(scopes):
+    """
+    UPDATE, увеличивающий версии областей.
+
+    После flush выполняется автоматически; массовые insert/update/delete
+    мимо ORM-сессии должны выполнить его сами в своей транзакции.
+    """
+    return (
+        update(DataVersion)
+        .where(DataVersion.scope.in_(sorted(scopes)))
+        .values(version=DataVersion.version + 1, updated_at=datetime.now(UTC))
+        .returning(DataVersion.scope, DataVersion.version)
+    )
+
+
+def record_data_versions(session, result) -> None:
+    """
+    Запоминает версии из результата bump_data_versions: после коммита кэш
+    результатов отличает свои записи от записей других воркеров.
+    """
+    session.info.setdefault("data_versions_written", []).extend(result.all())
+
+
+@event.listens_for(DataVersion.__table__, "after_create")
+def _seed_data_versions(target, connection, **kw):
+    now = datetime.now(UTC)
+    connection.execute(
+        insert(DataVersion),
+        [{"scope": scope, "version": 0, "updated_at": now} for scope in DATA_SCOPES],
+    )
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_after_flush(session, flush_context):
+    changed = [
+        *session.new,
+        *(instance for instance in session.dirty if session.is_modified(instance)),
+        *session.deleted,
+    ]
+    scopes = set()
+    for instance in changed:
+        if isinstance(instance, Task | TaskOccurrence):
+            scopes.add("tasks")
+        elif isinstance(instance, Category):
+            scopes.add("categories")
+    if scopes:
+        result = session.connection().execute(bump_data_versions(scopes))
+        record_data_versions(session, result)
@@ -0,0 +1,86 @@
+from sqlalchemy import DDL, event
+
+from .task import Task
+
+# SQLite: FTS5-индекс с внешним содержимым (content=tasks), синхронизируется
+# триггерами на каждую запись в tasks
+SQLITE_SEARCH_DDL = (
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+        title,
+        description,
+        content='tasks',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3 4'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks BEGIN
+        INSERT INTO tasks_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks BEGIN
+        INSERT INTO tasks_fts(tasks_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_fts_update
+    AFTER UPDATE OF title, description ON tasks BEGIN
+        INSERT INTO tasks_fts(tasks_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO tasks_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+)
+SQLITE_SEARCH_DROP = ("DROP TABLE IF EXISTS tasks_fts",)
+
+# PostgreSQL: вычисляемая колонка tsvector (заголовок важнее описания) и GIN
+POSTGRESQL_SEARCH_DDL = (
+    """
+    ALTER TABLE tasks ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(title, '')), 'A')
+        || setweight(to_tsvector('simple', coalesce(description, '')), 'B')
+    ) STORED
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_tasks_search_vector
+    ON tasks USING gin (search_vector)
+    """,
+)
+
+SEARCH_OBJECTS = {
+    "tasks_fts",
+    "tasks_fts_data",
+    "tasks_fts_idx",
+    "tasks_fts_docsize",
+    "tasks_fts_config",
+    "search_vector",
+    "ix_tasks_search_vector",
+}
+
+
+def include_name(name, type_, parent_names) -> bool:
+    """Фильтр для autogenerate: поисковые объекты создаются не из моделей"""
+    return name not in SEARCH_OBJECTS
+
+
+for statement in SQLITE_SEARCH_DDL:
+    event.listen(
+        Task.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite")
+    )
+for statement in SQLITE_SEARCH_DROP:
+    event.listen(
+        Task.__table__, "before_drop", DDL(statement).execute_if(dialect="sqlite")
+    )
+for statement in POSTGRESQL_SEARCH_DDL:
+    event.listen(
+        Task.__table__,
+        "after_create",
+        DDL(statement).execute_if(dialect="postgresql"),
+    )
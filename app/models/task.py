@@ -1,6 +1,17 @@
 import enum
 
-from sqlalchemy import Column, DateTime, Enum, ForeignKey, Integer, String, Text, func
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Enum,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    bindparam,
+    func,
+)
 from sqlalchemy.orm import relationship
 
 from .base import Base
@@ -22,6 +33,21 @@ class TaskPriority(str, enum.Enum):
 
 class Task(Base):
     __tablename__ = "tasks"
+    # (колонка сортировки, id) — для keyset-пагинации списка задач
+    __table_args__ = (
+        Index("ix_tasks_title_id", "title", "id"),
+        Index("ix_tasks_status_id", "status", "id"),
+        Index("ix_tasks_priority_id", "priority", "id"),
+        Index("ix_tasks_due_date_id", "due_date", "id"),
+        Index("ix_tasks_created_at_id", "created_at", "id"),
+        Index("ix_tasks_updated_at_id", "updated_at", "id"),
+        # задачи категории и подзадачи, в том числе для ON DELETE по внешним ключам
+        Index("ix_tasks_category_id_created_at", "category_id", "created_at", "id"),
+        Index("ix_tasks_parent_id", "parent_id"),
+    )
+    # created_at/updated_at возвращаются через RETURNING в том же INSERT/UPDATE,
+    # без отдельного refresh
+    __mapper_args__ = {"eager_defaults": True}
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(200), nullable=False)
@@ -38,6 +64,86 @@ class Task(Base):
     parent_id = Column(
         Integer, ForeignKey("tasks.id", ondelete="CASCADE"), nullable=True
     )
+    # повторяющаяся задача — серия: RRULE с первым повторением в due_date;
+    # повторения не хранятся, отличия отдельных повторений — в TaskOccurrence
+    recurrence_rule = Column(String(500), nullable=True)
+    # последнее повторение серии (COUNT или UNTIL), NULL — без конца
+    recurrence_end = Column(DateTime(timezone=True), nullable=True)
 
     category = relationship("Category", back_populates="tasks")
     parent = relationship("Task", remote_side=[id], backref="subtasks")
+
+
+# колонки задачи для чтения без ORM-объектов, в порядке полей TaskResponse;
+# колонки таблицы, а не атрибуты модели, чтобы результат не проходил через
+# загрузку сущностей
+TASK_COLUMNS = tuple(
+    Task.__table__.c[name]
+    for name in (
+        "title",
+        "description",
+        "status",
+        "priority",
+        "due_date",
+        "category_id",
+        "parent_id",
+        "recurrence_rule",
+        "id",
+        "created_at",
+        "updated_at",
+    )
+)
+
+
+class TaskRecord:
+    """
+    Задача только для чтения: значения TASK_COLUMNS в слотах.
+
+    Для списков, которые только сериализуются: в отличие от Task не
+    попадает в identity map, а атрибуты читаются быстрее, чем у Row.
+    """
+
+    __slots__ = tuple(column.key for column in TASK_COLUMNS)
+
+    def __init__(self, *values):
+        for name, value in zip(self.__slots__, values, strict=True):
+            setattr(self, name, value)
+
+
+def task_records(rows) -> list[TaskRecord]:
+    """TaskRecord из строк select(*TASK_COLUMNS)"""
+    return [TaskRecord(*row) for row in rows]
+
+
+CLOSED_STATUSES = (TaskStatus.COMPLETED, TaskStatus.CANCELLED)
+
+# просроченные и предстоящие задачи: только незавершенные, по сроку
+Index(
+    "ix_tasks_open_due_date",
+    Task.due_date,
+    Task.id,
+    postgresql_where=Task.status.not_in(CLOSED_STATUSES),
+    sqlite_where=Task.status.not_in(CLOSED_STATUSES),
+)
+
+
+# серии, попадающие в окно календаря: по началу серии
+Index(
+    "ix_tasks_recurring_due_date",
+    Task.due_date,
+    postgresql_where=Task.recurrence_rule.is_not(None),
+    sqlite_where=Task.recurrence_rule.is_not(None),
+)
+
+
+def open_task_filter():
+    # статусы подставляются в SQL литералами: с параметрами планировщик не
+    # может доказать условие частичного индекса ix_tasks_open_due_date
+    return Task.status.not_in(
+        bindparam(
+            "closed_statuses",
+            list(CLOSED_STATUSES),
+            expanding=True,
+            literal_execute=True,
+        )
+    )
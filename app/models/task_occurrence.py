@@ -0,0 +1,56 @@
+from datetime import UTC, datetime
+
+from sqlalchemy import Column, DateTime, Enum, ForeignKey, Index, Integer, String
+
+from .base import Base
+from .task import TaskPriority, TaskRecord, TaskStatus
+
+
+class TaskOccurrence(Base):
+    """
+    Отличие одного повторения серии от самой серии.
+
+    Строка есть только у измененных повторений: выполненных, отмененных,
+    перенесенных или переименованных. Пустое поле — значение серии.
+    """
+
+    __tablename__ = "task_occurrences"
+    __table_args__ = (
+        # перенесенные повторения, попадающие в окно календаря
+        Index("ix_task_occurrences_due_date", "due_date"),
+    )
+
+    task_id = Column(
+        Integer, ForeignKey("tasks.id", ondelete="CASCADE"), primary_key=True
+    )
+    # исходное время повторения по правилу серии, в UTC
+    occurrence = Column(DateTime(timezone=True), primary_key=True)
+    title = Column(String(200), nullable=True)
+    status = Column(Enum(TaskStatus), nullable=True)
+    priority = Column(Enum(TaskPriority), nullable=True)
+    due_date = Column(DateTime(timezone=True), nullable=True)
+
+
+class OccurrenceRecord(TaskRecord):
+    """Повторение серии для календаря: поля серии с изменениями повторения"""
+
+    __slots__ = ("occurrence",)
+
+    def __init__(
+        self,
+        series: TaskRecord,
+        occurrence: datetime,
+        override: TaskOccurrence | None = None,
+    ):
+        for name in TaskRecord.__slots__:
+            setattr(self, name, getattr(series, name))
+        # повторения считаются в UTC без зоны; зона — как у срока серии
+        if series.due_date.tzinfo is not None:
+            occurrence = occurrence.replace(tzinfo=UTC)
+        self.occurrence = occurrence
+        self.due_date = occurrence
+        if override is not None:
+            for name in ("title", "status", "priority", "due_date"):
+                value = getattr(override, name)
+                if value is not None:
+                    setattr(self, name, value)
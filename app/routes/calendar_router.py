@@ -1,53 +1,112 @@
 from datetime import date
 
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.database import get_db
-from app.schemas.task import TaskResponse
+from app.db.replicas import get_read_db
+from app.schemas.calendar import (
+    DayCalendar,
+    Heatmap,
+    MonthCalendar,
+    OverdueTasks,
+    WeekCalendar,
+)
 from app.services.calendar_service import CalendarService
 from app.services.task_service import TaskService
+from app.utils.conditional import conditional, minute_start, today_start
+from app.utils.pagination import InvalidCursorError
 
 router = APIRouter(prefix="/calendar", tags=["Calendar"])
 
+# самый длинный диапазон для тепловой карты — 5 лет
+HEATMAP_MAX_DAYS = 5 * 366
 
-@router.get("/month")
-async def get_month_calendar(year: int, month: int, db: Session = Depends(get_db)):
+
+@router.get(
+    "/month",
+    response_model=MonthCalendar,
+    dependencies=[conditional("tasks")],
+)
+async def get_month_calendar(
+    year: int, month: int, db: AsyncSession = Depends(get_read_db)
+):
     service = CalendarService(db)
     calendar = await service.get_month_calendar(year, month)
     return calendar
 
 
-@router.get("/week")
-async def get_week_calendar(target_date: date, db: Session = Depends(get_db)):
+@router.get(
+    "/week",
+    response_model=WeekCalendar,
+    dependencies=[conditional("tasks")],
+)
+async def get_week_calendar(target_date: date, db: AsyncSession = Depends(get_read_db)):
     service = CalendarService(db)
     calendar = await service.get_week_calendar(target_date)
     return calendar
 
 
-@router.get("/day")
-async def get_day_calendar(target_date: date, db: Session = Depends(get_db)):
+@router.get(
+    "/day",
+    response_model=DayCalendar,
+    dependencies=[conditional("tasks")],
+)
+async def get_day_calendar(target_date: date, db: AsyncSession = Depends(get_read_db)):
     service = CalendarService(db)
     tasks_data = await service.get_day_calendar(target_date)
     return tasks_data
 
 
-@router.get("/today")
-async def get_today_tasks(db: Session = Depends(get_db)):
+@router.get(
+    "/heatmap",
+    response_model=Heatmap,
+    dependencies=[conditional("tasks")],
+)
+async def get_heatmap(
+    start_date: date, end_date: date, db: AsyncSession = Depends(get_read_db)
+):
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date is before start_date")
+    if (end_date - start_date).days >= HEATMAP_MAX_DAYS:
+        raise HTTPException(status_code=400, detail="Date range is too long")
+    service = CalendarService(db)
+    heatmap = await service.get_heatmap(start_date, end_date)
+    return heatmap
+
+
+@router.get(
+    "/today",
+    response_model=DayCalendar,
+    dependencies=[conditional("tasks", period_start=today_start)],
+)
+async def get_today_tasks(db: AsyncSession = Depends(get_read_db)):
     service = CalendarService(db)
     tasks_data = await service.get_today_tasks()
     return tasks_data
 
 
-@router.get("/overdue")
+@router.get(
+    "/overdue",
+    response_model=OverdueTasks,
+    dependencies=[conditional("tasks", period_start=minute_start)],
+)
 async def get_overdue_tasks(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
-    db: Session = Depends(get_db),
+    cursor: str | None = None,
+    total_mode: str = Query("exact", alias="total", pattern="^(exact|estimate|none)$"),
+    db: AsyncSession = Depends(get_read_db),
 ):
     service = TaskService(db)
-    tasks, total = await service.get_overdue_tasks(skip=skip, limit=limit)
+    try:
+        tasks, total, next_cursor = await service.get_overdue_tasks(
+            skip=skip, limit=limit, cursor=cursor, total_mode=total_mode
+        )
+    except InvalidCursorError:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from None
     return {
-        "tasks": [TaskResponse.model_validate(t) for t in tasks],
+        "tasks": tasks,
         "total_overdue": total,
+        "next_cursor": next_cursor,
+        "has_more": next_cursor is not None,
     }
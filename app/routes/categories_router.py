@@ -1,29 +1,53 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.database import get_db
-from app.schemas.category import CategoryCreate, CategoryResponse, CategoryUpdate
-from app.services.category_service import CategoryService
+from app.db.replicas import get_read_db
+from app.schemas.category import (
+    CategoryCreate,
+    CategoryList,
+    CategoryResponse,
+    CategoryUpdate,
+)
+from app.services.category_service import CategoryService, InvalidReassignError
+from app.utils.conditional import conditional
+from app.utils.pagination import InvalidCursorError
 
 router = APIRouter(prefix="/categories", tags=["Categories"])
 
 
-@router.get("")
+@router.get("", response_model=CategoryList, dependencies=[conditional("categories")])
 async def get_categories(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
-    db: Session = Depends(get_db),
+    cursor: str | None = None,
+    total_mode: str = Query("exact", alias="total", pattern="^(exact|estimate|none)$"),
+    db: AsyncSession = Depends(get_read_db),
 ):
     service = CategoryService(db)
-    categories, total = await service.get_categories(skip=skip, limit=limit)
+    try:
+        categories, total, next_cursor = await service.get_categories(
+            skip=skip, limit=limit, cursor=cursor, total_mode=total_mode
+        )
+    except InvalidCursorError:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from None
     return {
-        "categories": [CategoryResponse.model_validate(c) for c in categories],
+        "categories": categories,
         "total": total,
+        "next_cursor": next_cursor,
+        "has_more": next_cursor is not None,
     }
 
 
-@router.get("/{category_id}")
-async def get_category(category_id: int, db: Session = Depends(get_db)):
+@router.get("/stats", dependencies=[conditional("tasks", "categories")])
+async def get_all_category_stats(db: AsyncSession = Depends(get_read_db)):
+    service = CategoryService(db)
+    stats = await service.get_all_category_stats()
+    return {"categories": stats}
+
+
+@router.get("/{category_id}", dependencies=[conditional("categories")])
+async def get_category(category_id: int, db: AsyncSession = Depends(get_read_db)):
     service = CategoryService(db)
     category = await service.get_category(category_id)
     if not category:
@@ -31,8 +55,19 @@ async def get_category(category_id: int, db: Session = Depends(get_db)):
     return CategoryResponse.model_validate(category)
 
 
+@router.get("/{category_id}/stats", dependencies=[conditional("tasks", "categories")])
+async def get_category_stats(category_id: int, db: AsyncSession = Depends(get_read_db)):
+    service = CategoryService(db)
+    stats = await service.get_category_stats(category_id)
+    if stats is None:
+        raise HTTPException(status_code=404, detail="Category not found")
+    return stats
+
+
 @router.post("", status_code=201)
-async def create_category(category_data: CategoryCreate, db: Session = Depends(get_db)):
+async def create_category(
+    category_data: CategoryCreate, db: AsyncSession = Depends(get_db)
+):
     service = CategoryService(db)
     category = await service.create_category(category_data)
     return CategoryResponse.model_validate(category)
@@ -40,7 +75,7 @@ async def create_category(category_data: CategoryCreate, db: Session = Depends(g
 
 @router.put("/{category_id}")
 async def update_category(
-    category_id: int, category_data: CategoryUpdate, db: Session = Depends(get_db)
+    category_id: int, category_data: CategoryUpdate, db: AsyncSession = Depends(get_db)
 ):
     service = CategoryService(db)
     category = await service.update_category(category_id, category_data)
@@ -50,9 +85,16 @@ async def update_category(
 
 
 @router.delete("/{category_id}")
-async def delete_category(category_id: int, db: Session = Depends(get_db)):
+async def delete_category(
+    category_id: int,
+    reassign_to: int | None = None,
+    db: AsyncSession = Depends(get_db),
+):
     service = CategoryService(db)
-    success = await service.delete_category(category_id)
+    try:
+        success = await service.delete_category(category_id, reassign_to)
+    except InvalidReassignError:
+        raise HTTPException(status_code=400, detail="Invalid reassign_to") from None
     if not success:
         raise HTTPException(status_code=404, detail="Category not found")
     return {"deleted": True}
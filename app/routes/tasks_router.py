@@ -1,14 +1,37 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from app.db.database import get_db
-from app.schemas.task import TaskCreate, TaskResponse, TaskUpdate
-from app.services.task_service import TaskService
+from app.db.replicas import get_read_db, get_read_sessionmaker
+from app.models import TASK_COLUMNS
+from app.schemas.task import (
+    CalendarTask,
+    OccurrenceUpdate,
+    TaskBulkCreate,
+    TaskBulkDelete,
+    TaskBulkUpdate,
+    TaskCreate,
+    TaskList,
+    TaskResponse,
+    TaskSearchResult,
+    TaskUpdate,
+)
+from app.services.import_service import ImportService, read_lines
+from app.services.task_service import SORT_FIELDS, TaskService
+from app.utils.conditional import conditional
+from app.utils.export import EXPORT_MEDIA_TYPES, export_lines
+from app.utils.pagination import InvalidCursorError
+from app.utils.recurrence import InvalidRuleError
 
 router = APIRouter(prefix="/tasks", tags=["Tasks"])
 
+TREE_MAX_DEPTH = 100
+
 
-@router.get("")
+@router.get("", response_model=TaskList, dependencies=[conditional("tasks")])
 async def get_tasks(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
@@ -16,22 +39,107 @@ async def get_tasks(
     priority: str | None = None,
     category_id: int | None = None,
     search: str | None = None,
-    db: Session = Depends(get_db),
+    sort_by: str = Query("created_at", pattern=f"^({'|'.join(SORT_FIELDS)})$"),
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    cursor: str | None = None,
+    total_mode: str = Query("exact", alias="total", pattern="^(exact|estimate|none)$"),
+    db: AsyncSession = Depends(get_read_db),
 ):
     service = TaskService(db)
-    tasks, total = await service.get_tasks(
-        skip=skip,
-        limit=limit,
-        status=status,
-        priority=priority,
-        category_id=category_id,
-        search=search,
+    try:
+        tasks, total, next_cursor = await service.get_tasks(
+            skip=skip,
+            limit=limit,
+            status=status,
+            priority=priority,
+            category_id=category_id,
+            search=search,
+            sort_by=sort_by,
+            order=order,
+            cursor=cursor,
+            total_mode=total_mode,
+        )
+    except InvalidCursorError:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from None
+    return {
+        "tasks": tasks,
+        "total": total,
+        "next_cursor": next_cursor,
+        "has_more": next_cursor is not None,
+    }
+
+
+@router.get("/export", dependencies=[conditional("tasks")])
+async def export_tasks(
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    status: str | None = None,
+    priority: str | None = None,
+    category_id: int | None = None,
+    search: str | None = None,
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+    sessionmaker: async_sessionmaker = Depends(get_read_sessionmaker),
+):
+    async def stream():
+        async with sessionmaker() as db:
+            batches = TaskService(db).export_tasks(
+                status=status,
+                priority=priority,
+                category_id=category_id,
+                search=search,
+                date_from=date_from,
+                date_to=date_to,
+            )
+            fields = [column.key for column in TASK_COLUMNS]
+            async for chunk in export_lines(batches, export_format, fields):
+                yield chunk
+
+    return StreamingResponse(
+        stream(),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={
+            "Content-Disposition": f'attachment; filename="tasks.{export_format}"'
+        },
+    )
+
+
+@router.post("/import")
+async def import_tasks(
+    request: Request,
+    import_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    batch_size: int = Query(1000, ge=1, le=10000),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_db),
+):
+    service = ImportService(db)
+    return await service.import_tasks(
+        read_lines(request.stream()), import_format, batch_size, offset
     )
-    return {"tasks": [TaskResponse.model_validate(t) for t in tasks], "total": total}
 
 
-@router.get("/{task_id}")
-async def get_task(task_id: int, db: Session = Depends(get_db)):
+@router.get("/search", dependencies=[conditional("tasks")])
+async def search_tasks(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_read_db),
+):
+    service = TaskService(db)
+    results = await service.search_tasks(q, limit=limit)
+    return {
+        "query": q,
+        "results": [
+            TaskSearchResult(
+                **TaskResponse.model_validate(task).model_dump(),
+                rank=rank,
+                snippet=snippet,
+            )
+            for task, rank, snippet in results
+        ],
+    }
+
+
+@router.get("/{task_id}", dependencies=[conditional("tasks")])
+async def get_task(task_id: int, db: AsyncSession = Depends(get_read_db)):
     service = TaskService(db)
     task = await service.get_task(task_id)
     if not task:
@@ -39,26 +147,95 @@ async def get_task(task_id: int, db: Session = Depends(get_db)):
     return TaskResponse.model_validate(task)
 
 
+@router.get("/{task_id}/tree", dependencies=[conditional("tasks")])
+async def get_task_tree(
+    task_id: int,
+    max_depth: int = Query(10, ge=0, le=TREE_MAX_DEPTH),
+    db: AsyncSession = Depends(get_read_db),
+):
+    service = TaskService(db)
+    tree = await service.get_task_tree(task_id, max_depth)
+    if not tree:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return tree
+
+
 @router.post("", status_code=201)
-async def create_task(task_data: TaskCreate, db: Session = Depends(get_db)):
+async def create_task(task_data: TaskCreate, db: AsyncSession = Depends(get_db)):
     service = TaskService(db)
     task = await service.create_task(task_data)
     return TaskResponse.model_validate(task)
 
 
+@router.post("/bulk", status_code=201)
+async def bulk_create_tasks(
+    data: TaskBulkCreate,
+    response: Response,
+    mode: str = Query("atomic", pattern="^(atomic|partial)$"),
+    db: AsyncSession = Depends(get_db),
+):
+    service = TaskService(db)
+    tasks, errors = await service.bulk_create_tasks(data.items, mode == "atomic")
+    _bulk_status(response, mode, errors)
+    return {
+        "created": [TaskResponse.model_validate(t) for t in tasks],
+        "errors": errors,
+    }
+
+
+@router.patch("/bulk")
+async def bulk_update_tasks(
+    data: TaskBulkUpdate,
+    response: Response,
+    mode: str = Query("atomic", pattern="^(atomic|partial)$"),
+    db: AsyncSession = Depends(get_db),
+):
+    service = TaskService(db)
+    tasks, errors = await service.bulk_update_tasks(data.items, mode == "atomic")
+    _bulk_status(response, mode, errors)
+    return {
+        "updated": [TaskResponse.model_validate(t) for t in tasks],
+        "errors": errors,
+    }
+
+
+@router.delete("/bulk")
+async def bulk_delete_tasks(
+    data: TaskBulkDelete,
+    response: Response,
+    mode: str = Query("atomic", pattern="^(atomic|partial)$"),
+    db: AsyncSession = Depends(get_db),
+):
+    service = TaskService(db)
+    deleted, errors = await service.bulk_delete_tasks(data.ids, mode == "atomic")
+    _bulk_status(response, mode, errors)
+    return {"deleted": deleted, "errors": errors}
+
+
+def _bulk_status(response: Response, mode: str, errors: list[dict]) -> None:
+    # atomic: при ошибках ничего не записано; partial: часть элементов прошла
+    if errors and mode == "atomic":
+        raise HTTPException(status_code=422, detail={"errors": errors})
+    if errors:
+        response.status_code = 207
+
+
 @router.put("/{task_id}")
 async def update_task(
-    task_id: int, task_data: TaskUpdate, db: Session = Depends(get_db)
+    task_id: int, task_data: TaskUpdate, db: AsyncSession = Depends(get_db)
 ):
     service = TaskService(db)
-    task = await service.update_task(task_id, task_data)
+    try:
+        task = await service.update_task(task_id, task_data)
+    except InvalidRuleError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from None
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     return TaskResponse.model_validate(task)
 
 
 @router.delete("/{task_id}")
-async def delete_task(task_id: int, db: Session = Depends(get_db)):
+async def delete_task(task_id: int, db: AsyncSession = Depends(get_db)):
     service = TaskService(db)
     success = await service.delete_task(task_id)
     if not success:
@@ -66,10 +243,37 @@ async def delete_task(task_id: int, db: Session = Depends(get_db)):
     return {"deleted": True}
 
 
+@router.put("/{task_id}/occurrences/{occurrence}", response_model=CalendarTask)
+async def update_occurrence(
+    task_id: int,
+    occurrence: datetime,
+    data: OccurrenceUpdate,
+    db: AsyncSession = Depends(get_db),
+):
+    service = TaskService(db)
+    record = await service.update_occurrence(task_id, occurrence, data)
+    if not record:
+        raise HTTPException(status_code=404, detail="Occurrence not found")
+    return record
+
+
+@router.delete("/{task_id}/occurrences/{occurrence}")
+async def reset_occurrence(
+    task_id: int, occurrence: datetime, db: AsyncSession = Depends(get_db)
+):
+    service = TaskService(db)
+    success = await service.reset_occurrence(task_id, occurrence)
+    if not success:
+        raise HTTPException(status_code=404, detail="Occurrence not found")
+    return {"deleted": True}
+
+
 @router.post("/{task_id}/duplicate", status_code=201)
-async def duplicate_task(task_id: int, db: Session = Depends(get_db)):
+async def duplicate_task(
+    task_id: int, deep: bool = False, db: AsyncSession = Depends(get_db)
+):
     service = TaskService(db)
-    duplicate = await service.duplicate_task(task_id)
+    duplicate = await service.duplicate_task(task_id, deep)
     if not duplicate:
         raise HTTPException(status_code=404, detail="Task not found")
     return TaskResponse.model_validate(duplicate)
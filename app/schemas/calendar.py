@@ -0,0 +1,53 @@
+from datetime import date
+
+from pydantic import BaseModel
+
+from app.schemas.task import CalendarTask
+
+
+class MonthCalendar(BaseModel):
+    year: int
+    month: int
+    # ключ — дата в ISO-формате, только дни с задачами
+    days: dict[str, list[CalendarTask]]
+    total_tasks: int
+
+
+class CalendarDay(BaseModel):
+    date: date
+    tasks: list[CalendarTask]
+    count: int
+
+
+class WeekCalendar(BaseModel):
+    week_start: date
+    week_end: date
+    days: list[CalendarDay]
+    total_tasks: int
+
+
+class DayCalendar(BaseModel):
+    date: date
+    tasks: list[CalendarTask]
+    total_tasks: int
+
+
+class HeatmapDay(BaseModel):
+    date: date
+    count: int
+    by_status: dict[str, int]
+    by_priority: dict[str, int]
+
+
+class Heatmap(BaseModel):
+    start_date: date
+    end_date: date
+    days: list[HeatmapDay]
+    total_tasks: int
+
+
+class OverdueTasks(BaseModel):
+    tasks: list[CalendarTask]
+    total_overdue: int | None
+    next_cursor: str | None
+    has_more: bool
@@ -28,3 +28,10 @@ class CategoryResponse(CategoryBase):
 
     class Config:
         from_attributes = True
+
+
+class CategoryList(BaseModel):
+    categories: list[CategoryResponse]
+    total: int | None
+    next_cursor: str | None
+    has_more: bool
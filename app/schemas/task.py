@@ -1,6 +1,16 @@
 from datetime import datetime
+from typing import Any
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator, model_validator
+
+from app.models.task import TaskPriority, TaskStatus
+from app.utils.recurrence import parse_rule
+
+
+def _check_rule(rule: str | None) -> str | None:
+    if rule is not None:
+        parse_rule(rule)
+    return rule
 
 
 class TaskBase(BaseModel):
@@ -11,10 +21,18 @@ class TaskBase(BaseModel):
     due_date: datetime | None = None
     category_id: int | None = None
     parent_id: int | None = None
+    # RRULE серии, например "FREQ=WEEKLY;BYDAY=MO"; первое повторение — due_date
+    recurrence_rule: str | None = Field(None, max_length=500)
 
 
 class TaskCreate(TaskBase):
-    pass
+    _check_rule = field_validator("recurrence_rule")(_check_rule)
+
+    @model_validator(mode="after")
+    def _rule_needs_due_date(self):
+        if self.recurrence_rule is not None and self.due_date is None:
+            raise ValueError("Recurring task needs a due_date")
+        return self
 
 
 class TaskUpdate(BaseModel):
@@ -24,6 +42,9 @@ class TaskUpdate(BaseModel):
     priority: str | None = None
     due_date: datetime | None = None
     category_id: int | None = None
+    recurrence_rule: str | None = Field(None, max_length=500)
+
+    _check_rule = field_validator("recurrence_rule")(_check_rule)
 
 
 class TaskResponse(TaskBase):
@@ -33,3 +54,52 @@ class TaskResponse(TaskBase):
 
     class Config:
         from_attributes = True
+
+
+class TaskList(BaseModel):
+    tasks: list[TaskResponse]
+    total: int | None
+    next_cursor: str | None
+    has_more: bool
+
+
+class TaskSearchResult(TaskResponse):
+    rank: float
+    snippet: str | None = None
+
+
+class TaskTreeNode(TaskResponse):
+    # по всем потомкам узла в пределах max_depth
+    descendant_count: int = 0
+    completed_count: int = 0
+    # у узла на границе max_depth есть подзадачи, не вошедшие в дерево
+    truncated: bool = False
+    subtasks: list["TaskTreeNode"] = []
+
+
+class CalendarTask(TaskResponse):
+    # у повторения серии: исходное время по правилу, ключ для /occurrences
+    occurrence: datetime | None = None
+
+
+class OccurrenceUpdate(BaseModel):
+    """Изменения одного повторения; null — значение серии"""
+
+    title: str | None = Field(None, min_length=1, max_length=200)
+    status: TaskStatus | None = None
+    priority: TaskPriority | None = None
+    due_date: datetime | None = None
+
+
+class TaskBulkCreate(BaseModel):
+    # элементы проверяются по TaskCreate поштучно, чтобы ошибки были по элементам
+    items: list[dict[str, Any]] = Field(..., min_length=1, max_length=1000)
+
+
+class TaskBulkUpdate(BaseModel):
+    # каждый элемент — поля TaskUpdate и id задачи
+    items: list[dict[str, Any]] = Field(..., min_length=1, max_length=1000)
+
+
+class TaskBulkDelete(BaseModel):
+    ids: list[int] = Field(..., min_length=1, max_length=1000)
@@ -1,28 +1,174 @@
 from calendar import monthrange
 from datetime import date, datetime, timedelta
 
-from sqlalchemy import and_, func, select
-from sqlalchemy.orm import Session
+from sqlalchemy import Date, and_, bindparam, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models import Task, TaskStatus
+from app.models import (
+    TASK_COLUMNS,
+    OccurrenceRecord,
+    Task,
+    TaskOccurrence,
+    TaskRecord,
+    TaskStatus,
+    task_records,
+)
+from app.utils.cache import due_between, result_cache
+from app.utils.recurrence import naive_utc, occurrences, parse_rule, window
+
+# серии, пересекающиеся с окном, и серии, повторения которых перенесены в
+# окно: каждая ветвь OR идет по своему индексу
+SERIES_IN_WINDOW = or_(
+    and_(
+        Task.recurrence_rule.is_not(None),
+        Task.due_date <= bindparam("window_end"),
+        or_(
+            Task.recurrence_end.is_(None),
+            Task.recurrence_end >= bindparam("series_start"),
+        ),
+    ),
+    Task.id.in_(
+        select(TaskOccurrence.task_id).where(
+            TaskOccurrence.due_date.between(
+                bindparam("window_start"), bindparam("window_end")
+            )
+        )
+    ),
+)
+# задачи со сроком в [start, end] для task_records, без ORM-объектов. Запрос
+# собирается один раз, при выполнении меняются только параметры, и ключ
+# кэша скомпилированного SQL тоже вычисляется один раз. Вместе с разовыми
+# задачами читаются серии окна
+TASKS_DUE_BETWEEN = select(*TASK_COLUMNS).where(
+    or_(
+        and_(
+            Task.recurrence_rule.is_(None),
+            Task.due_date >= bindparam("start"),
+            Task.due_date <= bindparam("end"),
+        ),
+        SERIES_IN_WINDOW,
+    )
+)
+# recurrence_end считается в UTC, а SQLite хранит срок без зоны: запас на
+# любое смещение часового пояса
+SERIES_END_MARGIN = timedelta(days=1)
+
+
+def _window_params(window_start: datetime, window_end: datetime) -> dict:
+    return {
+        "window_start": window_start,
+        "window_end": window_end,
+        "series_start": window_start - SERIES_END_MARGIN,
+    }
+
+
+async def series_between(
+    db: AsyncSession, window_start: datetime, window_end: datetime, *conditions
+) -> dict[int, TaskRecord]:
+    """Серии окна по id; conditions — дополнительные условия на серию"""
+    query = select(*TASK_COLUMNS).where(SERIES_IN_WINDOW, *conditions)
+    result = await db.execute(query, _window_params(window_start, window_end))
+    return {record.id: record for record in task_records(result)}
+
+
+async def series_occurrences(
+    db: AsyncSession,
+    series: dict[int, TaskRecord],
+    window_start: datetime,
+    window_end: datetime,
+) -> list[OccurrenceRecord]:
+    """Повторения серий в окне с учетом изменений отдельных повторений"""
+    result = await db.scalars(
+        select(TaskOccurrence).where(
+            # ветви OR по разным индексам: PK (task_id, occurrence) и due_date
+            or_(
+                and_(
+                    TaskOccurrence.task_id.in_(series),
+                    TaskOccurrence.occurrence.between(window_start, window_end),
+                ),
+                TaskOccurrence.due_date.between(window_start, window_end),
+            )
+        )
+    )
+    overrides = {
+        (override.task_id, naive_utc(override.occurrence)): override
+        for override in result.all()
+    }
+    items = []
+
+    def add(record: TaskRecord, occurrence: datetime, override) -> None:
+        item = OccurrenceRecord(record, occurrence, override)
+        # перенесенное повторение может уйти из окна или прийти в него
+        if window_start <= naive_utc(item.due_date) <= window_end:
+            items.append(item)
+
+    for record in series.values():
+        rule = parse_rule(record.recurrence_rule, record.due_date)
+        for occurrence in occurrences(rule, window_start, window_end):
+            add(record, occurrence, overrides.pop((record.id, occurrence), None))
+    # остались повторения других дней, перенесенные в окно; их серии
+    # прочитаны вместе с задачами окна
+    for (task_id, occurrence), override in overrides.items():
+        if override.due_date is not None and task_id in series:
+            add(series[task_id], occurrence, override)
+    return items
+
+
+def _group_by_day(tasks) -> dict[date, list[TaskRecord]]:
+    """Задачи по дням срока, порядок внутри дня сохраняется"""
+    by_day = {}
+    for task in tasks:
+        if task.due_date:
+            by_day.setdefault(task.due_date.date(), []).append(task)
+    return by_day
 
 
 class CalendarService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
 
+    async def _tasks_between(self, start: date, end: date) -> list[TaskRecord]:
+        """
+        Задачи со сроком в окне по порядку срока, вместе с повторениями серий.
+
+        Повторения разворачиваются только для окна, изменения повторений
+        читаются только для серий окна и перенесенных в окно: время и память
+        не зависят от длины серий.
+        """
+        window_start, window_end = window(start, end)
+        result = await self.db.execute(
+            TASKS_DUE_BETWEEN,
+            {"start": start, "end": end, **_window_params(window_start, window_end)},
+        )
+        tasks = []
+        series = {}
+        for record in task_records(result):
+            if record.recurrence_rule is None:
+                tasks.append(record)
+            else:
+                series[record.id] = record
+        if series:
+            tasks.extend(
+                await series_occurrences(self.db, series, window_start, window_end)
+            )
+        # MULTI-INDEX OR не отдает строки по порядку срока
+        tasks.sort(key=lambda task: naive_utc(task.due_date))
+        return tasks
+
     async def get_month_calendar(self, year: int, month: int) -> dict:
         first_day = date(year, month, 1)
         last_day = date(year, month, monthrange(year, month)[1])
-
-        query = (
-            select(Task)
-            .where(and_(Task.due_date >= first_day, Task.due_date <= last_day))
-            .order_by(Task.due_date.asc())
+        return await result_cache.fetch(
+            self.db,
+            ("calendar_month", year, month),
+            due_between(first_day, last_day),
+            lambda: self._load_month_calendar(year, month, first_day, last_day),
         )
 
-        result = self.db.execute(query)
-        tasks = result.scalars().all()
+    async def _load_month_calendar(
+        self, year: int, month: int, first_day: date, last_day: date
+    ) -> dict:
+        tasks = await self._tasks_between(first_day, last_day)
 
         days_dict = {}
         for task in tasks:
@@ -42,22 +188,21 @@ class CalendarService:
     async def get_week_calendar(self, target_date: date) -> dict:
         week_start = target_date - timedelta(days=target_date.weekday())
         week_end = week_start + timedelta(days=6)
-
-        query = (
-            select(Task)
-            .where(and_(Task.due_date >= week_start, Task.due_date <= week_end))
-            .order_by(Task.due_date.asc())
+        return await result_cache.fetch(
+            self.db,
+            ("calendar_week", week_start),
+            due_between(week_start, week_end),
+            lambda: self._load_week_calendar(week_start, week_end),
         )
 
-        result = self.db.execute(query)
-        tasks = result.scalars().all()
+    async def _load_week_calendar(self, week_start: date, week_end: date) -> dict:
+        tasks = await self._tasks_between(week_start, week_end)
 
+        by_day = _group_by_day(tasks)
         days = []
         current_day = week_start
         while current_day <= week_end:
-            day_tasks = [
-                t for t in tasks if t.due_date and t.due_date.date() == current_day
-            ]
+            day_tasks = by_day.get(current_day, [])
             days.append(
                 {
                     "date": current_day.isoformat(),
@@ -75,17 +220,18 @@ class CalendarService:
         }
 
     async def get_day_calendar(self, target_date: date) -> dict:
+        return await result_cache.fetch(
+            self.db,
+            ("calendar_day", target_date),
+            due_between(target_date, target_date),
+            lambda: self._load_day_calendar(target_date),
+        )
+
+    async def _load_day_calendar(self, target_date: date) -> dict:
         start_datetime = datetime.combine(target_date, datetime.min.time())
         end_datetime = datetime.combine(target_date, datetime.max.time())
 
-        query = (
-            select(Task)
-            .where(and_(Task.due_date >= start_datetime, Task.due_date <= end_datetime))
-            .order_by(Task.due_date.asc())
-        )
-
-        result = self.db.execute(query)
-        tasks = result.scalars().all()
+        tasks = await self._tasks_between(start_datetime, end_datetime)
 
         return {
             "date": target_date.isoformat(),
@@ -96,22 +242,16 @@ class CalendarService:
     async def get_calendar_range(
         self, start_date: date, end_date: date, group_by: str = "day"
     ) -> dict:
-        query = (
-            select(Task)
-            .where(and_(Task.due_date >= start_date, Task.due_date <= end_date))
-            .order_by(Task.due_date.asc())
-        )
-
-        result = self.db.execute(query)
-        tasks = result.scalars().all()
+        tasks = await self._tasks_between(start_date, end_date)
 
+        # задачи раскладываются по корзинам за один проход, затем корзины
+        # выводятся по порядку, включая пустые
+        by_day = _group_by_day(tasks)
         groups = []
         if group_by == "day":
             current = start_date
             while current <= end_date:
-                day_tasks = [
-                    t for t in tasks if t.due_date and t.due_date.date() == current
-                ]
+                day_tasks = by_day.get(current, [])
                 groups.append(
                     {
                         "date": current.isoformat(),
@@ -121,14 +261,13 @@ class CalendarService:
                 )
                 current += timedelta(days=1)
         elif group_by == "week":
+            by_week = {}
+            for day, day_tasks in by_day.items():
+                by_week.setdefault((day - start_date).days // 7, []).extend(day_tasks)
             current = start_date
             while current <= end_date:
                 week_end = min(current + timedelta(days=6), end_date)
-                week_tasks = [
-                    t
-                    for t in tasks
-                    if t.due_date and current <= t.due_date.date() <= week_end
-                ]
+                week_tasks = by_week.get((current - start_date).days // 7, [])
                 groups.append(
                     {
                         "week_start": current.isoformat(),
@@ -139,18 +278,14 @@ class CalendarService:
                 )
                 current = week_end + timedelta(days=1)
         elif group_by == "month":
+            by_month = {}
+            for day, day_tasks in by_day.items():
+                by_month.setdefault((day.year, day.month), []).extend(day_tasks)
             current_month = start_date.replace(day=1)
             while current_month <= end_date:
-                month_end = date(
-                    current_month.year,
-                    current_month.month,
-                    monthrange(current_month.year, current_month.month)[1],
+                month_tasks = by_month.get(
+                    (current_month.year, current_month.month), []
                 )
-                month_tasks = [
-                    t
-                    for t in tasks
-                    if t.due_date and current_month <= t.due_date.date() <= month_end
-                ]
                 groups.append(
                     {
                         "month": f"{current_month.year}-{current_month.month:02d}",
@@ -171,57 +306,116 @@ class CalendarService:
             "total_tasks": len(tasks),
         }
 
+    async def get_heatmap(self, start_date: date, end_date: date) -> dict:
+        """
+        Количество задач по дням срока с разбивкой по статусу и приоритету.
+
+        Разовые задачи считаются агрегирующим запросом без загрузки задач,
+        серии — по своим повторениям в диапазоне, как в календаре. В ответ
+        попадают только дни, на которые есть задачи.
+        """
+        range_start = datetime.combine(start_date, datetime.min.time())
+        range_end = datetime.combine(end_date + timedelta(days=1), datetime.min.time())
+
+        due_day = func.date(Task.due_date, type_=Date)
+        query = (
+            select(due_day, Task.status, Task.priority, func.count())
+            .where(
+                and_(
+                    Task.recurrence_rule.is_(None),
+                    Task.due_date >= range_start,
+                    Task.due_date < range_end,
+                )
+            )
+            .group_by(due_day, Task.status, Task.priority)
+        )
+        result = await self.db.execute(query)
+        counts = result.all()
+
+        window_start, window_end = window(start_date, end_date)
+        series = await series_between(self.db, window_start, window_end)
+        if series:
+            items = await series_occurrences(self.db, series, window_start, window_end)
+            counts.extend(
+                (item.due_date.date(), item.status, item.priority, 1) for item in items
+            )
+
+        days = {}
+        for day, status, priority, count in sorted(counts, key=lambda row: row[0]):
+            bucket = days.setdefault(
+                day,
+                {
+                    "date": day.isoformat(),
+                    "count": 0,
+                    "by_status": {},
+                    "by_priority": {},
+                },
+            )
+            bucket["count"] += count
+            by_status = bucket["by_status"]
+            by_status[status.value] = by_status.get(status.value, 0) + count
+            by_priority = bucket["by_priority"]
+            by_priority[priority.value] = by_priority.get(priority.value, 0) + count
+
+        return {
+            "start_date": start_date.isoformat(),
+            "end_date": end_date.isoformat(),
+            "days": list(days.values()),
+            "total_tasks": sum(bucket["count"] for bucket in days.values()),
+        }
+
     async def get_today_tasks(self) -> dict:
         return await self.get_day_calendar(date.today())
 
     async def get_calendar_stats(self, start_date: date, end_date: date) -> dict:
-        created_query = select(Task).where(
-            and_(
-                func.date(Task.created_at) >= start_date,
-                func.date(Task.created_at) <= end_date,
+        # сравниваем сами колонки, а не date(...), чтобы работали индексы
+        range_start = datetime.combine(start_date, datetime.min.time())
+        range_end = datetime.combine(end_date + timedelta(days=1), datetime.min.time())
+
+        # считаем по дням в БД: GROUP BY по дате, без загрузки задач
+        created_day = func.date(Task.created_at, type_=Date)
+        created_query = (
+            select(created_day, func.count())
+            .where(
+                and_(
+                    Task.created_at >= range_start,
+                    Task.created_at < range_end,
+                )
             )
+            .group_by(created_day)
         )
-        created_result = self.db.execute(created_query)
-        created_tasks = created_result.scalars().all()
-
-        completed_query = select(Task).where(
-            and_(
-                Task.status == TaskStatus.COMPLETED,
-                func.date(Task.updated_at) >= start_date,
-                func.date(Task.updated_at) <= end_date,
+        created_result = await self.db.execute(created_query)
+        created_by_day = dict(created_result.all())
+
+        completed_day = func.date(Task.updated_at, type_=Date)
+        completed_query = (
+            select(completed_day, func.count())
+            .where(
+                and_(
+                    Task.status == TaskStatus.COMPLETED,
+                    Task.updated_at >= range_start,
+                    Task.updated_at < range_end,
+                )
             )
+            .group_by(completed_day)
         )
-        completed_result = self.db.execute(completed_query)
-        completed_tasks = completed_result.scalars().all()
+        completed_result = await self.db.execute(completed_query)
+        completed_by_day = dict(completed_result.all())
 
         daily_stats = []
         current = start_date
         while current <= end_date:
-            created_count = len(
-                [
-                    t
-                    for t in created_tasks
-                    if t.created_at and t.created_at.date() == current
-                ]
-            )
-            completed_count = len(
-                [
-                    t
-                    for t in completed_tasks
-                    if t.updated_at and t.updated_at.date() == current
-                ]
-            )
             daily_stats.append(
                 {
                     "date": current.isoformat(),
-                    "created": created_count,
-                    "completed": completed_count,
+                    "created": created_by_day.get(current, 0),
+                    "completed": completed_by_day.get(current, 0),
                 }
             )
             current += timedelta(days=1)
 
-        total_created = len(created_tasks)
-        total_completed = len(completed_tasks)
+        total_created = sum(created_by_day.values())
+        total_completed = sum(completed_by_day.values())
         completion_rate = (
             (total_completed / total_created * 100) if total_created > 0 else 0.0
         )
@@ -1,35 +1,45 @@
-from sqlalchemy import func, select
-from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models import Category, Task
+from app.utils.cache import bulk_written, task_row
+from app.utils.pagination import fetch_page
+from app.utils.totals import count_total
+
+
+class InvalidReassignError(ValueError):
+    pass
 
 
 class CategoryService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
 
     async def get_categories(
-        self, skip: int = 0, limit: int = 100
-    ) -> tuple[list[Category], int]:
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: str | None = None,
+        total_mode: str = "exact",
+    ) -> tuple[list[Category], int | None, str | None]:
         query = select(Category)
+        total = await count_total(self.db, query, total_mode, Category.__table__)
+
+        categories, next_cursor = await fetch_page(
+            self.db,
+            query,
+            Category.created_at,
+            Category.id,
+            "desc",
+            limit,
+            skip,
+            cursor,
+        )
 
-        count_query = select(func.count()).select_from(Category)
-        total = self.db.scalar(count_query)
-
-        query = query.order_by(Category.created_at.desc()).offset(skip).limit(limit)
-        result = self.db.execute(query)
-        categories = result.scalars().all()
-
-        return categories, total
+        return categories, total, next_cursor
 
     async def get_category(self, category_id: int) -> Category | None:
-        query = (
-            select(Category)
-            .where(Category.id == category_id)
-            .options(selectinload(Category.tasks))
-        )
-        result = self.db.execute(query)
-        return result.scalar_one_or_none()
+        return await self.db.get(Category, category_id)
 
     async def create_category(self, category_data) -> Category:
         category = Category(
@@ -39,8 +49,8 @@ class CategoryService:
             description=category_data.description,
         )
         self.db.add(category)
-        self.db.commit()
-        self.db.refresh(category)
+        await self.db.commit()
+        await self.db.refresh(category)
         return category
 
     async def update_category(self, category_id: int, category_data) -> Category | None:
@@ -52,72 +62,115 @@ class CategoryService:
         for field, value in update_data.items():
             setattr(category, field, value)
 
-        self.db.commit()
-        self.db.refresh(category)
+        await self.db.commit()
         return category
 
     async def delete_category(
         self, category_id: int, reassign_to: int | None = None
     ) -> bool:
-        category = await self.get_category(category_id)
-        if not category:
+        """
+        Удаляет категорию; ее задачи переносятся в reassign_to или остаются
+        без категории. Задачи переносятся одним UPDATE, без загрузки в ORM.
+        """
+        result = await self.db.scalars(
+            select(Category.id).where(
+                Category.id.in_({category_id, reassign_to} - {None})
+            )
+        )
+        found = set(result.all())
+        if category_id not in found:
             return False
-
-        if reassign_to:
-            query = select(Task).where(Task.category_id == category_id)
-            result = self.db.execute(query)
-            tasks = result.scalars().all()
-            for task in tasks:
-                task.category_id = reassign_to
-        else:
-            query = select(Task).where(Task.category_id == category_id)
-            result = self.db.execute(query)
-            tasks = result.scalars().all()
-            for task in tasks:
-                task.category_id = None
-
-        self.db.delete(category)
-        self.db.commit()
+        if reassign_to is not None and (
+            reassign_to == category_id or reassign_to not in found
+        ):
+            raise InvalidReassignError(reassign_to)
+
+        result = await self.db.execute(
+            update(Task)
+            .where(Task.category_id == category_id)
+            .values(category_id=reassign_to)
+            .returning(
+                Task.id,
+                Task.status,
+                Task.priority,
+                Task.category_id,
+                Task.due_date,
+                Task.recurrence_rule,
+            )
+        )
+        rows = [task_row(row) for row in result.all()]
+        await self.db.execute(delete(Category).where(Category.id == category_id))
+
+        await bulk_written(
+            self.db,
+            rows + [{**row, "category_id": category_id} for row in rows],
+            {Category.__tablename__: -1},
+            {"categories", "tasks"} if rows else {"categories"},
+        )
+        await self.db.commit()
         return True
 
     async def get_category_tasks(
-        self, category_id: int, skip: int = 0, limit: int = 100
-    ) -> tuple[list[Task], int]:
+        self,
+        category_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: str | None = None,
+        total_mode: str = "exact",
+    ) -> tuple[list[Task], int | None, str | None]:
         query = select(Task).where(Task.category_id == category_id)
+        total = await count_total(self.db, query, total_mode)
 
-        count_query = select(func.count()).select_from(query.subquery())
-        total = self.db.scalar(count_query)
-
-        query = query.order_by(Task.created_at.desc()).offset(skip).limit(limit)
-        result = self.db.execute(query)
-        tasks = result.scalars().all()
-
-        return tasks, total
+        tasks, next_cursor = await fetch_page(
+            self.db, query, Task.created_at, Task.id, "desc", limit, skip, cursor
+        )
 
-    async def get_category_stats(self, category_id: int) -> dict:
-        query = select(Task).where(Task.category_id == category_id)
-        result = self.db.execute(query)
-        tasks = result.scalars().all()
-
-        stats = {
-            "category_id": category_id,
-            "total_tasks": len(tasks),
-            "by_status": {
-                "pending": 0,
-                "in_progress": 0,
-                "completed": 0,
-                "cancelled": 0,
-            },
-            "by_priority": {
-                "low": 0,
-                "medium": 0,
-                "high": 0,
-                "urgent": 0,
-            },
-        }
-
-        for task in tasks:
-            stats["by_status"][task.status.value] += 1
-            stats["by_priority"][task.priority.value] += 1
-
-        return stats
+        return tasks, total, next_cursor
+
+    async def get_category_stats(self, category_id: int) -> dict | None:
+        query = _stats_query().where(Category.id == category_id)
+        result = await self.db.execute(query)
+        return _collect_stats(result.all()).get(category_id)
+
+    async def get_all_category_stats(self) -> list[dict]:
+        # статистика всех категорий одним агрегирующим запросом
+        result = await self.db.execute(_stats_query().order_by(Category.id))
+        return list(_collect_stats(result.all()).values())
+
+
+def _stats_query():
+    # outer join, чтобы категории без задач тоже попали в ответ
+    return (
+        select(Category.id, Task.status, Task.priority, func.count(Task.id))
+        .outerjoin(Task, Task.category_id == Category.id)
+        .group_by(Category.id, Task.status, Task.priority)
+    )
+
+
+def _collect_stats(rows) -> dict[int, dict]:
+    stats = {}
+    for category_id, status, priority, count in rows:
+        category_stats = stats.get(category_id)
+        if category_stats is None:
+            category_stats = stats[category_id] = {
+                "category_id": category_id,
+                "total_tasks": 0,
+                "by_status": {
+                    "pending": 0,
+                    "in_progress": 0,
+                    "completed": 0,
+                    "cancelled": 0,
+                },
+                "by_priority": {
+                    "low": 0,
+                    "medium": 0,
+                    "high": 0,
+                    "urgent": 0,
+                },
+            }
+        if status is None:
+            continue
+        category_stats["total_tasks"] += count
+        category_stats["by_status"][status.value] += count
+        category_stats["by_priority"][priority.value] += count
+    return stats
@@ -0,0 +1,236 @@
+import csv
+import json
+from collections.abc import AsyncIterator, Callable
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Category, Task
+from app.services.task_service import validate_new_task
+from app.utils.cache import bulk_written
+
+IMPORT_FORMATS = ("ndjson", "csv")
+# сколько ошибок по записям попадает в отчет, остальные только считаются
+MAX_REPORTED_ERRORS = 100
+
+
+class InvalidRecordError(ValueError):
+    pass
+
+
+def _decode(line: bytes) -> str | InvalidRecordError:
+    try:
+        return line.decode().rstrip("\r")
+    except UnicodeDecodeError:
+        return InvalidRecordError("Invalid UTF-8")
+
+
+async def read_lines(
+    chunks: AsyncIterator[bytes],
+) -> AsyncIterator[str | InvalidRecordError]:
+    """
+    Строки из потока байтов, без загрузки всего потока в память; вместо
+    строки не в UTF-8 — ошибка, запись пропускается
+    """
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield _decode(line)
+    if buffer:
+        yield _decode(buffer)
+
+
+async def _csv_records(
+    lines: AsyncIterator[str | InvalidRecordError],
+) -> AsyncIterator[str | InvalidRecordError]:
+    # запись CSV может занимать несколько строк, если перенос внутри кавычек:
+    # запись закончена, когда кавычек четное число
+    pending = None
+    async for line in lines:
+        if isinstance(line, InvalidRecordError):
+            # неразборчивая строка портит всю запись, в которую входит
+            pending = None
+            yield line
+            continue
+        pending = line if pending is None else f"{pending}\n{line}"
+        if pending.count('"') % 2 == 0:
+            yield pending
+            pending = None
+    if pending is not None:
+        yield pending
+
+
+async def read_records(
+    lines: AsyncIterator[str | InvalidRecordError], import_format: str
+) -> AsyncIterator[dict | InvalidRecordError]:
+    """Записи файла по одной; вместо неразборчивой записи — ошибка"""
+    if import_format == "csv":
+        header = None
+        async for line in _csv_records(lines):
+            if isinstance(line, InvalidRecordError):
+                yield line
+                continue
+            values = next(csv.reader([line]), [])
+            if header is None:
+                header = values
+            elif len(values) != len(header):
+                yield InvalidRecordError("Wrong number of columns")
+            else:
+                # пустая ячейка — поле не задано
+                pairs = zip(header, values, strict=True)
+                yield {key: value for key, value in pairs if value != ""}
+        return
+
+    async for line in lines:
+        if isinstance(line, InvalidRecordError):
+            yield line
+            continue
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield InvalidRecordError("Invalid JSON")
+            continue
+        if isinstance(record, dict):
+            yield record
+        else:
+            yield InvalidRecordError("Record is not an object")
+
+
+class ImportService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self._categories: dict[str, int] = {}
+
+    async def import_tasks(
+        self,
+        lines: AsyncIterator[str],
+        import_format: str,
+        batch_size: int = 1000,
+        offset: int = 0,
+        on_progress: Callable[[dict], None] | None = None,
+    ) -> dict:
+        """
+        Импортирует задачи пачками по batch_size, каждая пачка — коммит.
+
+        Запись — поля TaskCreate; вместо category_id можно указать имя
+        категории в поле category, недостающие категории создаются.
+        Неверные записи пропускаются и попадают в errors. offset в отчете —
+        номер первой еще не записанной записи: с него импорт можно
+        продолжить, передав тот же файл и этот offset.
+        """
+        report = {
+            "offset": offset,
+            "inserted": 0,
+            "skipped": 0,
+            "categories_created": 0,
+            "errors": [],
+            "completed": False,
+        }
+        # все категории одним запросом; новые добавляются по ходу импорта
+        result = await self.db.execute(select(Category.name, Category.id))
+        self._categories = dict(result.all())
+
+        batch = []
+        index = 0
+        async for record in read_records(lines, import_format):
+            if index >= offset:
+                batch.append((index, record))
+            index += 1
+            if len(batch) >= batch_size:
+                if not await self._write_batch(batch, report):
+                    return report
+                batch = []
+                if on_progress:
+                    on_progress(report)
+        if batch:
+            if not await self._write_batch(batch, report):
+                return report
+            if on_progress:
+                on_progress(report)
+
+        report["completed"] = True
+        return report
+
+    async def _write_batch(self, batch: list, report: dict) -> bool:
+        """Пишет пачку одной транзакцией; False, если транзакция откатилась"""
+        skipped = []
+        rows = []
+        known_ids = set(self._categories.values())
+        for index, record in batch:
+            if isinstance(record, InvalidRecordError):
+                skipped.append((index, [{"loc": [], "msg": str(record)}]))
+                continue
+            record = dict(record)
+            category = record.pop("category", None)
+            values, errors = validate_new_task(record)
+            if not errors and category is not None:
+                if not isinstance(category, str) or not 0 < len(category) <= 100:
+                    errors = [{"loc": ["category"], "msg": "Invalid category name"}]
+            elif not errors and values["category_id"] not in known_ids | {None}:
+                errors = [{"loc": ["category_id"], "msg": "Category not found"}]
+            if errors:
+                skipped.append((index, errors))
+            else:
+                rows.append((index, values, category))
+
+        try:
+            parent_ids = {values["parent_id"] for _, values, _ in rows} - {None}
+            if parent_ids:
+                result = await self.db.scalars(
+                    select(Task.id).where(Task.id.in_(parent_ids))
+                )
+                parent_ids -= set(result.all())
+
+            names = {category for _, _, category in rows if category is not None}
+            created = await self._create_categories(names - set(self._categories))
+            tasks = []
+            for index, values, category in rows:
+                if values["parent_id"] in parent_ids:
+                    msg = "Parent task not found"
+                    skipped.append((index, [{"loc": ["parent_id"], "msg": msg}]))
+                    continue
+                if category is not None:
+                    values["category_id"] = self._categories[category]
+                tasks.append(values)
+
+            if tasks:
+                await self.db.execute(insert(Task), tasks)
+            # пачка может попасть в любую выборку: кэш сбрасывается целиком
+            await bulk_written(
+                self.db,
+                [None],
+                {Task.__tablename__: len(tasks), Category.__tablename__: created},
+                {"tasks", "categories"} if created else {"tasks"},
+            )
+            await self.db.commit()
+        except SQLAlchemyError as exc:
+            await self.db.rollback()
+            # категории, созданные в откаченной пачке, нужно перечитать
+            result = await self.db.execute(select(Category.name, Category.id))
+            self._categories = dict(result.all())
+            report["error"] = f"{type(exc).__name__}: {getattr(exc, 'orig', exc)}"
+            return False
+
+        report["offset"] = batch[-1][0] + 1
+        report["inserted"] += len(tasks)
+        report["categories_created"] += created
+        report["skipped"] += len(skipped)
+        for index, errors in sorted(skipped):
+            if len(report["errors"]) < MAX_REPORTED_ERRORS:
+                report["errors"].append({"offset": index, "errors": errors})
+        return True
+
+    async def _create_categories(self, names: set[str]) -> int:
+        if not names:
+            return 0
+        result = await self.db.execute(
+            insert(Category).returning(Category.name, Category.id),
+            [{"name": name} for name in sorted(names)],
+        )
+        self._categories.update(result.all())
+        return len(names)
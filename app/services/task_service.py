@@ -1,13 +1,162 @@
-from datetime import date, datetime, timedelta
-
-from sqlalchemy import and_, func, or_, select
-from sqlalchemy.orm import Session, selectinload
-
-from app.models import Task, TaskPriority, TaskStatus
+from collections.abc import AsyncIterator
+from datetime import UTC, date, datetime, timedelta
+from itertools import groupby
+
+from pydantic import ValidationError
+from sqlalchemy import Row, and_, delete, insert, literal, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import (
+    CLOSED_STATUSES,
+    TASK_COLUMNS,
+    Category,
+    OccurrenceRecord,
+    Task,
+    TaskOccurrence,
+    TaskPriority,
+    TaskRecord,
+    TaskStatus,
+    open_task_filter,
+    task_records,
+)
+from app.schemas.task import OccurrenceUpdate, TaskCreate, TaskTreeNode, TaskUpdate
+from app.services.calendar_service import series_between, series_occurrences
+from app.utils.cache import (
+    bulk_written,
+    record_task_changes,
+    result_cache,
+    task_filters,
+    task_row,
+)
+from app.utils.due_index import due_index
+from app.utils.pagination import decode_cursor, encode_cursor, fetch_page
+from app.utils.recurrence import (
+    InvalidRuleError,
+    last_occurrence,
+    naive_utc,
+    occurrences,
+    parse_rule,
+    series_end,
+    window,
+)
+from app.utils.search import match_clause, ranked_search, search_terms, snippet
+from app.utils.totals import count_total
+
+SORT_FIELDS = (
+    "id",
+    "title",
+    "status",
+    "priority",
+    "due_date",
+    "created_at",
+    "updated_at",
+)
+
+EXPORT_BATCH = 1000
+
+STATUS_VALUES = {status.value for status in TaskStatus}
+PRIORITY_VALUES = {priority.value for priority in TaskPriority}
+
+
+def _due_key(task: TaskRecord) -> tuple[datetime, int]:
+    return naive_utc(task.due_date), task.id
+
+
+def _merge_overdue(
+    tasks: list[TaskRecord],
+    more: bool,
+    items: list[OccurrenceRecord],
+    limit: int,
+    skip: int,
+    after: tuple | None,
+) -> tuple[list[TaskRecord], str | None]:
+    """
+    Страница просроченных задач вместе с повторениями серий в порядке
+    (срок, id). tasks — разовые задачи после курсора after или, в режиме
+    offset, от начала списка; more — есть ли разовые задачи за ними.
+    """
+    if after is not None:
+        due_date, last_id = after
+        items = [
+            item
+            for item in items
+            if due_date is not None and _due_key(item) > (naive_utc(due_date), last_id)
+        ]
+    merged = sorted([*tasks, *items], key=_due_key)
+    page = merged[skip : skip + limit]
+    if not page or not (more or len(merged) > skip + limit):
+        return page, None
+    last = page[-1]
+    return page, encode_cursor("due_date", "asc", last.due_date, last.id)
+
+
+def _validation_errors(exc: ValidationError) -> list[dict]:
+    return [{"loc": list(error["loc"]), "msg": error["msg"]} for error in exc.errors()]
+
+
+def _value_errors(values: dict) -> list[dict]:
+    errors = []
+    if "title" in values and values["title"] is None:
+        errors.append({"loc": ["title"], "msg": "Title cannot be null"})
+    if "status" in values and values["status"] not in STATUS_VALUES:
+        errors.append({"loc": ["status"], "msg": "Invalid status"})
+    if "priority" in values and values["priority"] not in PRIORITY_VALUES:
+        errors.append({"loc": ["priority"], "msg": "Invalid priority"})
+    return errors
+
+
+def _with_enums(values: dict) -> dict:
+    values = dict(values)
+    if "status" in values:
+        values["status"] = TaskStatus(values["status"])
+    if "priority" in values:
+        values["priority"] = TaskPriority(values["priority"])
+    return values
+
+
+def recurrence_end(rule: str | None, due_date: datetime | None) -> datetime | None:
+    """Значение recurrence_end для серии; InvalidRuleError, если правило неверно"""
+    if rule is None:
+        return None
+    if due_date is None:
+        raise InvalidRuleError("Recurring task needs a due_date")
+    end = series_end(parse_rule(rule, due_date))
+    return end.replace(tzinfo=UTC) if end else None
+
+
+def validate_new_task(item: dict) -> tuple[dict | None, list[dict]]:
+    """Проверяет элемент как TaskCreate: (значения для INSERT, ошибки)"""
+    try:
+        values = TaskCreate.model_validate(item).model_dump()
+    except ValidationError as exc:
+        return None, _validation_errors(exc)
+    if errors := _value_errors(values):
+        return None, errors
+    values["recurrence_end"] = recurrence_end(
+        values["recurrence_rule"], values["due_date"]
+    )
+    return _with_enums(values), []
+
+
+def _subtree(task_id: int, max_depth: int | None = None):
+    """CTE (id, depth) задачи и ее подзадач до max_depth уровней"""
+    tree = (
+        select(Task.id, literal(0).label("depth"))
+        .where(Task.id == task_id)
+        .cte("tree", recursive=True)
+    )
+    # подзадача создается после родителя, так что условие на id отсекает
+    # циклы в parent_id, если они появятся
+    step = select(Task.id, tree.c.depth + 1).where(
+        Task.parent_id == tree.c.id, Task.id > tree.c.id
+    )
+    if max_depth is not None:
+        step = step.where(tree.c.depth < max_depth)
+    return tree.union_all(step)
 
 
 class TaskService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
 
     async def get_tasks(
@@ -22,9 +171,85 @@ class TaskService:
         date_to: datetime | None = None,
         sort_by: str = "created_at",
         order: str = "desc",
-    ) -> tuple[list[Task], int]:
-        query = select(Task).options(selectinload(Task.category))
+        cursor: str | None = None,
+        total_mode: str = "exact",
+    ) -> tuple[list[TaskRecord], int | None, str | None]:
+        if sort_by not in SORT_FIELDS:
+            sort_by = "created_at"
+        if order != "asc":
+            order = "desc"
+        params = {
+            "skip": skip,
+            "limit": limit,
+            "status": status,
+            "priority": priority,
+            "category_id": category_id,
+            "search": search,
+            "date_from": date_from,
+            "date_to": date_to,
+            "sort_by": sort_by,
+            "order": order,
+            "cursor": cursor,
+            "total_mode": total_mode,
+        }
+        return await result_cache.fetch(
+            self.db,
+            ("tasks", *params.values()),
+            task_filters(status, priority, category_id, date_from, date_to),
+            lambda: self._load_tasks(**params),
+        )
+
+    async def _load_tasks(
+        self,
+        skip: int,
+        limit: int,
+        status: str | None,
+        priority: str | None,
+        category_id: int | None,
+        search: str | None,
+        date_from: datetime | None,
+        date_to: datetime | None,
+        sort_by: str,
+        order: str,
+        cursor: str | None,
+        total_mode: str,
+    ) -> tuple[list[TaskRecord], int | None, str | None]:
+        # строки колонок: ответ только сериализуется, ORM-объекты не нужны
+        query = self._filter_tasks(
+            select(*TASK_COLUMNS),
+            status,
+            priority,
+            category_id,
+            search,
+            date_from,
+            date_to,
+        )
+
+        filtered = any(
+            value is not None
+            for value in (status, priority, category_id, search, date_from, date_to)
+        )
+        total = await count_total(
+            self.db, query, total_mode, None if filtered else Task.__table__
+        )
+
+        sort_column = getattr(Task, sort_by)
+        rows, next_cursor = await fetch_page(
+            self.db, query, sort_column, Task.id, order, limit, skip, cursor
+        )
+
+        return task_records(rows), total, next_cursor
 
+    def _filter_tasks(
+        self,
+        query,
+        status: str | None = None,
+        priority: str | None = None,
+        category_id: int | None = None,
+        search: str | None = None,
+        date_from: datetime | None = None,
+        date_to: datetime | None = None,
+    ):
         if status:
             query = query.where(Task.status == status)
         if priority:
@@ -32,40 +257,61 @@ class TaskService:
         if category_id:
             query = query.where(Task.category_id == category_id)
         if search:
-            search_pattern = f"%{search}%"
-            query = query.where(
-                or_(
-                    Task.title.ilike(search_pattern),
-                    Task.description.ilike(search_pattern),
-                )
-            )
+            query = query.where(match_clause(self.db.bind.dialect.name, search))
         if date_from:
             query = query.where(Task.due_date >= date_from)
         if date_to:
             query = query.where(Task.due_date <= date_to)
+        return query
 
-        count_query = select(func.count()).select_from(query.subquery())
-        total = self.db.scalar(count_query)
-
-        sort_column = getattr(Task, sort_by, Task.created_at)
-        if order == "asc":
-            query = query.order_by(sort_column.asc())
-        else:
-            query = query.order_by(sort_column.desc())
-
-        query = query.offset(skip).limit(limit)
-        result = self.db.execute(query)
-        tasks = result.scalars().all()
-
-        return tasks, total
+    async def export_tasks(
+        self,
+        status: str | None = None,
+        priority: str | None = None,
+        category_id: int | None = None,
+        search: str | None = None,
+        date_from: datetime | None = None,
+        date_to: datetime | None = None,
+    ) -> AsyncIterator[list[Row]]:
+        """
+        Задачи под фильтрами get_tasks пачками строк, по возрастанию id.
+
+        Строки читаются потоком (yield_per, на PostgreSQL — серверный
+        курсор) без ORM-объектов, поэтому память не зависит от размера
+        выгрузки.
+        """
+        query = self._filter_tasks(
+            select(*TASK_COLUMNS),
+            status,
+            priority,
+            category_id,
+            search,
+            date_from,
+            date_to,
+        ).order_by(Task.id)
+        result = await self.db.stream(
+            query, execution_options={"yield_per": EXPORT_BATCH}
+        )
+        async for rows in result.partitions():
+            yield rows
+
+    async def search_tasks(
+        self, search: str, limit: int = 20
+    ) -> list[tuple[Task, float, str]]:
+        if not search_terms(search):
+            return []
+        query = ranked_search(self.db.bind.dialect.name, search, limit)
+        result = await self.db.execute(query)
+        terms = tuple(search_terms(search))
+        return [
+            (task, rank, snippet(task.title, task.description, terms))
+            for task, rank in result.all()
+        ]
 
     async def get_task(self, task_id: int) -> Task | None:
-        query = (
-            select(Task)
-            .where(Task.id == task_id)
-            .options(selectinload(Task.category), selectinload(Task.subtasks))
-        )
-        result = self.db.execute(query)
+        # связи не загружаются: в ответы попадают только колонки задачи
+        query = select(Task).where(Task.id == task_id)
+        result = await self.db.execute(query)
         return result.scalar_one_or_none()
 
     async def create_task(self, task_data) -> Task:
@@ -83,17 +329,265 @@ class TaskService:
             category_id=task_data.category_id,
             due_date=task_data.due_date,
             parent_id=task_data.parent_id,
+            recurrence_rule=task_data.recurrence_rule,
+            recurrence_end=recurrence_end(
+                task_data.recurrence_rule, task_data.due_date
+            ),
         )
         self.db.add(task)
-        self.db.commit()
-        self.db.refresh(task)
+        await self.db.commit()
+        await self.db.refresh(task)
         return task
 
+    async def bulk_create_tasks(
+        self, items: list[dict], atomic: bool = True
+    ) -> tuple[list[Task], list[dict]]:
+        """
+        Создает задачи одним INSERT ... RETURNING.
+
+        Возвращает (созданные задачи, ошибки по элементам). В режиме atomic
+        при любой ошибке ничего не записывается.
+        """
+        errors = []
+        rows = {}
+        for index, item in enumerate(items):
+            values, item_errors = validate_new_task(item)
+            if item_errors:
+                errors.append({"index": index, "errors": item_errors})
+            else:
+                rows[index] = values
+
+        errors.extend(await self._reference_errors(rows))
+        errors.sort(key=lambda error: error["index"])
+        if (errors and atomic) or not rows:
+            return [], errors
+
+        result = await self.db.scalars(
+            insert(Task).returning(Task, sort_by_parameter_order=True),
+            list(rows.values()),
+        )
+        tasks = list(result.all())
+        await bulk_written(
+            self.db,
+            [task_row(task) for task in tasks],
+            {"tasks": len(tasks)},
+            {"tasks"},
+        )
+        await self.db.commit()
+        return tasks, errors
+
+    async def bulk_update_tasks(
+        self, items: list[dict], atomic: bool = True
+    ) -> tuple[list[Task], list[dict]]:
+        """
+        Обновляет задачи: элементы с одинаковыми изменениями — одним
+        UPDATE ... WHERE id IN (...) RETURNING.
+        """
+        errors = []
+        changes = {}
+        for index, item in enumerate(items):
+            task_id = item.get("id")
+            if not isinstance(task_id, int) or isinstance(task_id, bool):
+                errors.append(
+                    {"index": index, "errors": [{"loc": ["id"], "msg": "Invalid id"}]}
+                )
+                continue
+            fields = {key: value for key, value in item.items() if key != "id"}
+            try:
+                values = TaskUpdate.model_validate(fields).model_dump(
+                    exclude_unset=True
+                )
+            except ValidationError as exc:
+                errors.append({"index": index, "errors": _validation_errors(exc)})
+                continue
+            if item_errors := _value_errors(values):
+                errors.append({"index": index, "errors": item_errors})
+                continue
+            if task_id in (change[0] for change in changes.values()):
+                errors.append(
+                    {
+                        "index": index,
+                        "errors": [{"loc": ["id"], "msg": "Duplicate id"}],
+                    }
+                )
+                continue
+            changes[index] = (task_id, _with_enums(values))
+
+        ids = [task_id for task_id, _ in changes.values()]
+        result = await self.db.execute(
+            select(
+                Task.id,
+                Task.status,
+                Task.priority,
+                Task.category_id,
+                Task.due_date,
+                Task.recurrence_rule,
+            ).where(Task.id.in_(ids))
+        )
+        previous = {row.id: task_row(row) for row in result.all()}
+        for index, (task_id, values) in list(changes.items()):
+            if task_id not in previous:
+                del changes[index]
+                errors.append(
+                    {
+                        "index": index,
+                        "errors": [{"loc": ["id"], "msg": "Task not found"}],
+                    }
+                )
+                continue
+            was_rule = previous[task_id]["recurrence_rule"]
+            rule = values.get("recurrence_rule", was_rule)
+            if {"recurrence_rule", "due_date"} & values.keys() and (rule or was_rule):
+                # правило проверяется вместе со сроком, один из них может
+                # остаться прежним
+                due_date = values.get("due_date", previous[task_id]["due_date"])
+                try:
+                    values["recurrence_end"] = recurrence_end(rule, due_date)
+                except InvalidRuleError as exc:
+                    del changes[index]
+                    msg = str(exc)
+                    errors.append(
+                        {
+                            "index": index,
+                            "errors": [{"loc": ["recurrence_rule"], "msg": msg}],
+                        }
+                    )
+
+        errors.extend(
+            await self._reference_errors(
+                {index: values for index, (_, values) in changes.items()}
+            )
+        )
+        for error in errors:
+            changes.pop(error["index"], None)
+        errors.sort(key=lambda error: error["index"])
+        if (errors and atomic) or not changes:
+            return [], errors
+
+        rescheduled = [
+            task_id
+            for task_id, values in changes.values()
+            if "recurrence_end" in values and previous[task_id]["recurrence_rule"]
+        ]
+        if rescheduled:
+            await self._delete_occurrences(rescheduled)
+
+        groups = {}
+        for task_id, values in changes.values():
+            groups.setdefault(tuple(sorted(values.items())), []).append(task_id)
+        updated = {}
+        for values, task_ids in groups.items():
+            if values:
+                query = (
+                    update(Task)
+                    .where(Task.id.in_(task_ids))
+                    .values(dict(values))
+                    .returning(Task)
+                )
+            else:
+                query = select(Task).where(Task.id.in_(task_ids))
+            result = await self.db.scalars(query)
+            updated.update((task.id, task) for task in result.all())
+        tasks = [updated[task_id] for task_id, _ in changes.values()]
+
+        rows = [previous[task.id] for task in tasks]
+        rows.extend(task_row(task) for task in tasks)
+        await bulk_written(self.db, rows, {}, {"tasks"})
+        await self.db.commit()
+        return tasks, errors
+
+    async def bulk_delete_tasks(
+        self, ids: list[int], atomic: bool = True
+    ) -> tuple[list[int], list[dict]]:
+        """Удаляет задачи одним DELETE, у подзадач обнуляется parent_id"""
+        result = await self.db.execute(
+            select(
+                Task.id,
+                Task.status,
+                Task.priority,
+                Task.category_id,
+                Task.due_date,
+                Task.recurrence_rule,
+            ).where(Task.id.in_(ids))
+        )
+        previous = {row.id: task_row(row) for row in result.all()}
+        errors = []
+        found = []
+        for index, task_id in enumerate(ids):
+            if task_id not in previous:
+                msg = "Task not found"
+            elif task_id in found:
+                msg = "Duplicate id"
+            else:
+                found.append(task_id)
+                continue
+            errors.append({"index": index, "errors": [{"loc": ["id"], "msg": msg}]})
+        if (errors and atomic) or not found:
+            return [], errors
+
+        # как и при удалении через ORM, подзадачи остаются без родителя
+        result = await self.db.execute(
+            update(Task)
+            .where(Task.parent_id.in_(found), Task.id.not_in(found))
+            .values(parent_id=None)
+            .returning(
+                Task.id,
+                Task.status,
+                Task.priority,
+                Task.category_id,
+                Task.due_date,
+                Task.recurrence_rule,
+            )
+        )
+        rows = [task_row(row) for row in result.all()]
+        # внешние ключи в SQLite не включены: изменения повторений удаляем сами
+        series = [task_id for task_id in found if previous[task_id]["recurrence_rule"]]
+        if series:
+            await self._delete_occurrences(series)
+        await self.db.execute(delete(Task).where(Task.id.in_(found)))
+
+        rows.extend(previous[task_id] for task_id in found)
+        await bulk_written(self.db, rows, {"tasks": -len(found)}, {"tasks"})
+        await self.db.commit()
+        return found, errors
+
+    async def _reference_errors(self, rows: dict[int, dict]) -> list[dict]:
+        """Ошибки для элементов, ссылающихся на несуществующие категории и задачи"""
+        category_ids = {row.get("category_id") for row in rows.values()} - {None}
+        parent_ids = {row.get("parent_id") for row in rows.values()} - {None}
+        if category_ids:
+            result = await self.db.scalars(
+                select(Category.id).where(Category.id.in_(category_ids))
+            )
+            category_ids -= set(result.all())
+        if parent_ids:
+            result = await self.db.scalars(
+                select(Task.id).where(Task.id.in_(parent_ids))
+            )
+            parent_ids -= set(result.all())
+
+        errors = []
+        for index, row in list(rows.items()):
+            item_errors = []
+            if row.get("category_id") in category_ids:
+                item_errors.append(
+                    {"loc": ["category_id"], "msg": "Category not found"}
+                )
+            if row.get("parent_id") in parent_ids:
+                item_errors.append(
+                    {"loc": ["parent_id"], "msg": "Parent task not found"}
+                )
+            if item_errors:
+                del rows[index]
+                errors.append({"index": index, "errors": item_errors})
+        return errors
+
     async def update_task(self, task_id: int, task_data) -> Task | None:
-        task = await self.get_task(task_id)
+        task = await self.db.get(Task, task_id)
         if not task:
             return None
 
+        was_series = task.recurrence_rule is not None
         update_data = task_data.model_dump(exclude_unset=True)
         for field, value in update_data.items():
             if field == "priority" and value:
@@ -102,36 +596,154 @@ class TaskService:
                 setattr(task, field, TaskStatus(value))
             else:
                 setattr(task, field, value)
-
-        self.db.commit()
-        self.db.refresh(task)
+        if {"recurrence_rule", "due_date"} & update_data.keys():
+            # InvalidRuleError до записи: сессия закроется без коммита
+            task.recurrence_end = recurrence_end(task.recurrence_rule, task.due_date)
+            if was_series:
+                # у серии с другим правилом или началом старые повторения
+                # могут не совпасть с новыми: их изменения сбрасываются
+                await self._delete_occurrences([task.id])
+
+        await self.db.commit()
         return task
 
+    async def _delete_occurrences(self, task_ids: list[int]) -> None:
+        await self.db.execute(
+            delete(TaskOccurrence).where(TaskOccurrence.task_id.in_(task_ids))
+        )
+
+    async def _get_occurrence(
+        self, task_id: int, occurrence: datetime
+    ) -> tuple[Task | None, datetime | None]:
+        """Серия и повторение в UTC без зоны; None, если серии или повторения нет"""
+        task = await self.db.get(Task, task_id)
+        if not task or task.recurrence_rule is None:
+            return None, None
+        key = naive_utc(occurrence)
+        rule = parse_rule(task.recurrence_rule, task.due_date)
+        if key not in occurrences(rule, key, key):
+            return None, None
+        return task, key
+
+    def _record_occurrence_change(self, task: Task, *due_dates) -> None:
+        # серия попадает во все окна после начала, перенесенное повторение —
+        # только в окна своего срока
+        row = task_row(task)
+        rows = [row]
+        rows.extend(
+            {**row, "due_date": due_date, "recurrence_rule": None}
+            for due_date in due_dates
+            if due_date is not None
+        )
+        record_task_changes(self.db, rows)
+
+    async def update_occurrence(
+        self, task_id: int, occurrence: datetime, data: OccurrenceUpdate
+    ) -> OccurrenceRecord | None:
+        """
+        Изменяет одно повторение серии: хранится только отличие от серии.
+
+        Поле null возвращает значение серии; повторение без отличий удаляется.
+        """
+        task, key = await self._get_occurrence(task_id, occurrence)
+        if not task:
+            return None
+        override = await self.db.get(TaskOccurrence, (task_id, key.replace(tzinfo=UTC)))
+        moved_from = override.due_date if override else None
+        if override is None:
+            override = TaskOccurrence(
+                task_id=task_id, occurrence=key.replace(tzinfo=UTC)
+            )
+            self.db.add(override)
+        for field, value in data.model_dump(exclude_unset=True).items():
+            setattr(override, field, value)
+
+        fields = ("title", "status", "priority", "due_date")
+        if all(getattr(override, field) is None for field in fields):
+            if override in self.db.new:
+                self.db.expunge(override)
+            else:
+                await self.db.delete(override)
+            record = OccurrenceRecord(task, key)
+        else:
+            record = OccurrenceRecord(task, key, override)
+        self._record_occurrence_change(task, moved_from, override.due_date)
+        await self.db.commit()
+        return record
+
+    async def reset_occurrence(self, task_id: int, occurrence: datetime) -> bool:
+        """Возвращает повторению значения серии"""
+        task, key = await self._get_occurrence(task_id, occurrence)
+        if not task:
+            return False
+        override = await self.db.get(TaskOccurrence, (task_id, key.replace(tzinfo=UTC)))
+        if not override:
+            return False
+        self._record_occurrence_change(task, override.due_date)
+        await self.db.delete(override)
+        await self.db.commit()
+        return True
+
     async def update_task_status(self, task_id: int, status: str) -> Task | None:
-        task = await self.get_task(task_id)
+        task = await self.db.get(Task, task_id)
         if not task:
             return None
 
         task.status = TaskStatus(status)
-        self.db.commit()
-        self.db.refresh(task)
+        await self.db.commit()
         return task
 
     async def delete_task(self, task_id: int) -> bool:
-        task = await self.get_task(task_id)
-        if not task:
-            return False
-
-        self.db.delete(task)
-        self.db.commit()
-        return True
+        # те же запросы, что и у массового удаления, без загрузки задачи в ORM
+        deleted, _ = await self.bulk_delete_tasks([task_id])
+        return bool(deleted)
 
     async def get_subtasks(self, task_id: int) -> list[Task]:
         query = select(Task).where(Task.parent_id == task_id)
-        result = self.db.execute(query)
+        result = await self.db.execute(query)
         return result.scalars().all()
 
-    async def duplicate_task(self, task_id: int) -> Task | None:
+    async def get_task_tree(self, task_id: int, max_depth: int) -> TaskTreeNode | None:
+        """Поддерево задачи до max_depth уровней одним рекурсивным запросом"""
+        # уровень max_depth + 1 читается только для признака truncated
+        tree = _subtree(task_id, max_depth + 1)
+        # колонки вместо ORM-объектов: узлов может быть десятки тысяч
+        query = select(*TASK_COLUMNS, tree.c.depth).join(tree, Task.id == tree.c.id)
+        rows = (await self.db.execute(query)).all()
+        if not rows:
+            return None
+
+        # узлы собираются снизу вверх: к родителю приходят готовые поддеревья
+        children: dict[int, list[TaskTreeNode]] = {}
+        truncated = set()
+        root = None
+        for row in sorted(rows, key=lambda row: -row.depth):
+            task = row._asdict()
+            depth = task.pop("depth")
+            if depth > max_depth:
+                truncated.add(task["parent_id"])
+                continue
+            subtasks = sorted(children.pop(task["id"], []), key=lambda n: n.id)
+            node = TaskTreeNode(
+                **task,
+                descendant_count=sum(1 + n.descendant_count for n in subtasks),
+                completed_count=sum(
+                    (n.status == TaskStatus.COMPLETED) + n.completed_count
+                    for n in subtasks
+                ),
+                truncated=task["id"] in truncated,
+                subtasks=subtasks,
+            )
+            if depth == 0:
+                root = node
+            else:
+                children.setdefault(task["parent_id"], []).append(node)
+        return root
+
+    async def duplicate_task(self, task_id: int, deep: bool = False) -> Task | None:
+        if deep:
+            return await self._duplicate_tree(task_id)
+
         original = await self.get_task(task_id)
         if not original:
             return None
@@ -144,52 +756,240 @@ class TaskService:
             category_id=original.category_id,
             due_date=original.due_date,
             parent_id=original.parent_id,
+            recurrence_rule=original.recurrence_rule,
+            recurrence_end=original.recurrence_end,
         )
         self.db.add(duplicate)
-        self.db.commit()
-        self.db.refresh(duplicate)
+        await self.db.commit()
+        await self.db.refresh(duplicate)
         return duplicate
 
+    async def _duplicate_tree(self, task_id: int) -> Task | None:
+        """
+        Копирует задачу со всеми подзадачами в одной транзакции.
+
+        Уровни дерева вставляются по одному INSERT ... RETURNING: новые id
+        уровня нужны как parent_id следующего.
+        """
+        tree = _subtree(task_id)
+        query = (
+            select(*TASK_COLUMNS, Task.recurrence_end, tree.c.depth)
+            .join(tree, Task.id == tree.c.id)
+            .order_by(tree.c.depth, Task.id)
+        )
+        rows = (await self.db.execute(query)).all()
+        if not rows:
+            return None
+
+        copies = {}
+        written = []
+        for _, level in groupby(rows, key=lambda row: row.depth):
+            level = list(level)
+            values = [
+                {
+                    "title": row.title if row.depth else f"{row.title} (копия)",
+                    "description": row.description,
+                    "priority": row.priority,
+                    "status": TaskStatus.PENDING,
+                    "category_id": row.category_id,
+                    "due_date": row.due_date,
+                    "parent_id": copies[row.parent_id] if row.depth else row.parent_id,
+                    "recurrence_rule": row.recurrence_rule,
+                    "recurrence_end": row.recurrence_end,
+                }
+                for row in level
+            ]
+            result = await self.db.execute(
+                insert(Task).returning(*TASK_COLUMNS, sort_by_parameter_order=True),
+                values,
+            )
+            created = result.all()
+            copies.update(
+                (row.id, copy.id) for row, copy in zip(level, created, strict=True)
+            )
+            written.extend(task_row(copy) for copy in created)
+
+        await bulk_written(self.db, written, {"tasks": len(written)}, {"tasks"})
+        await self.db.commit()
+        return await self.get_task(copies[task_id])
+
     async def get_overdue_tasks(
-        self, skip: int = 0, limit: int = 100
-    ) -> tuple[list[Task], int]:
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: str | None = None,
+        total_mode: str = "exact",
+    ) -> tuple[list[TaskRecord], int | None, str | None]:
         now = datetime.now()
-        query = select(Task).where(
-            and_(
-                Task.due_date < now,
-                Task.status.not_in([TaskStatus.COMPLETED, TaskStatus.CANCELLED]),
+        if due_index.enabled:
+            return await self._indexed_overdue_tasks(
+                now, skip, limit, cursor, total_mode
             )
+        overdue = and_(Task.due_date < now, open_task_filter())
+        # COUNT без условия на серию идет только по частичному индексу; серии
+        # вычитаются, вместо них считаются их просроченные повторения
+        total = await count_total(
+            self.db, select(*TASK_COLUMNS).where(overdue), total_mode
         )
+        result = await self.db.execute(
+            select(*TASK_COLUMNS).where(overdue, Task.recurrence_rule.is_not(None))
+        )
+        series = task_records(result)
+        items = await self._overdue_occurrences(series, now)
+        if total is not None:
+            total += len(items) - len(series)
+        query = select(*TASK_COLUMNS).where(overdue, Task.recurrence_rule.is_(None))
+
+        if not items:
+            rows, next_cursor = await fetch_page(
+                self.db, query, Task.due_date, Task.id, "asc", limit, skip, cursor
+            )
+            return task_records(rows), total, next_cursor
+
+        # вместе с повторениями страница в режиме offset собирается от начала
+        offset = 0 if cursor else skip
+        rows, next_cursor = await fetch_page(
+            self.db,
+            query,
+            Task.due_date,
+            Task.id,
+            "asc",
+            offset + limit,
+            cursor=cursor,
+        )
+        after = decode_cursor(cursor, "asc", Task.due_date) if cursor else None
+        tasks, next_cursor = _merge_overdue(
+            task_records(rows), next_cursor is not None, items, limit, offset, after
+        )
+        return tasks, total, next_cursor
 
-        count_query = select(func.count()).select_from(query.subquery())
-        total = self.db.scalar(count_query)
-
-        query = query.order_by(Task.due_date.asc()).offset(skip).limit(limit)
-        result = self.db.execute(query)
-        tasks = result.scalars().all()
-
-        return tasks, total
+    async def _indexed_overdue_tasks(
+        self,
+        now: datetime,
+        skip: int,
+        limit: int,
+        cursor: str | None,
+        total_mode: str,
+    ) -> tuple[list[TaskRecord], int | None, str | None]:
+        """get_overdue_tasks по due_index: тот же порядок, курсоры и total"""
+        entries = await due_index.get(self.db)
+        end = entries.position(now)
+        after = decode_cursor(cursor, "asc", Task.due_date) if cursor else None
+        start = entries.position(*after) if cursor else 0
+        series = [
+            record
+            for record in entries.series.values()
+            if naive_utc(record.due_date) < naive_utc(now)
+        ]
+        items = await self._overdue_occurrences(series, now)
+        total = None if total_mode == "none" else end + len(items)
+
+        if not items:
+            start = start if cursor else skip
+            tasks = entries.take(start, min(start + limit + 1, end))
+            next_cursor = None
+            if len(tasks) > limit:
+                tasks = tasks[:limit]
+                last = tasks[-1]
+                next_cursor = encode_cursor("due_date", "asc", last.due_date, last.id)
+            return tasks, total, next_cursor
+
+        offset = 0 if cursor else skip
+        tasks = entries.take(start, min(start + offset + limit + 1, end))
+        more = len(tasks) > offset + limit
+        tasks, next_cursor = _merge_overdue(
+            tasks[: offset + limit], more, items, limit, offset, after
+        )
+        return tasks, total, next_cursor
+
+    async def _overdue_occurrences(
+        self, series: list[TaskRecord], now: datetime
+    ) -> list[OccurrenceRecord]:
+        """
+        Просроченные повторения незавершенных серий. У серии просрочено только
+        последнее наступившее повторение, если оно не завершено и не
+        перенесено вперед: пропущенные раньше повторения не копятся.
+        """
+        latest = {}
+        for record in series:
+            rule = parse_rule(record.recurrence_rule, record.due_date)
+            occurrence = last_occurrence(rule, naive_utc(now))
+            if occurrence is not None:
+                latest[record.id, occurrence] = record
+        if not latest:
+            return []
+        result = await self.db.scalars(
+            select(TaskOccurrence).where(
+                tuple_(TaskOccurrence.task_id, TaskOccurrence.occurrence).in_(
+                    [
+                        (task_id, occurrence.replace(tzinfo=UTC))
+                        for task_id, occurrence in latest
+                    ]
+                )
+            )
+        )
+        overrides = {
+            (override.task_id, naive_utc(override.occurrence)): override
+            for override in result.all()
+        }
+        items = []
+        for (task_id, occurrence), record in latest.items():
+            item = OccurrenceRecord(
+                record, occurrence, overrides.get((task_id, occurrence))
+            )
+            overdue = naive_utc(item.due_date) < naive_utc(now)
+            if overdue and item.status not in CLOSED_STATUSES:
+                items.append(item)
+        return items
 
     async def get_upcoming_tasks(
         self, days: int = 7, priority: str | None = None
-    ) -> list[Task]:
+    ) -> list[Task | TaskRecord]:
+        """
+        Незавершенные задачи со сроком в ближайшие days дней по порядку срока,
+        вместе с незавершенными повторениями серий
+        """
         now = datetime.now()
         future = now + timedelta(days=days)
-
-        query = select(Task).where(
-            and_(
-                Task.due_date >= now,
-                Task.due_date <= future,
-                Task.status.not_in([TaskStatus.COMPLETED, TaskStatus.CANCELLED]),
+        window_start, window_end = window(now, future)
+
+        if due_index.enabled:
+            entries = await due_index.get(self.db)
+            tasks = entries.take(entries.position(now), entries.end_of(future))
+            if priority:
+                tasks = [task for task in tasks if task.priority == priority]
+            series = entries.series
+        else:
+            query = select(Task).where(
+                and_(
+                    Task.due_date >= now,
+                    Task.due_date <= future,
+                    Task.recurrence_rule.is_(None),
+                    open_task_filter(),
+                )
             )
-        )
 
-        if priority:
-            query = query.where(Task.priority == priority)
+            if priority:
+                query = query.where(Task.priority == priority)
 
-        query = query.order_by(Task.due_date.asc())
-        result = self.db.execute(query)
-        return result.scalars().all()
+            query = query.order_by(Task.due_date.asc())
+            result = await self.db.execute(query)
+            tasks = result.scalars().all()
+            series = await series_between(
+                self.db, window_start, window_end, open_task_filter()
+            )
+
+        if not series:
+            return tasks
+        items = [
+            item
+            for item in await series_occurrences(
+                self.db, series, window_start, window_end
+            )
+            if item.status not in CLOSED_STATUSES
+            and (not priority or item.priority == priority)
+        ]
+        return sorted([*tasks, *items], key=lambda task: naive_utc(task.due_date))
 
     async def get_tasks_by_date_range(
         self, start_date: date, end_date: date
@@ -200,5 +1000,5 @@ class TaskService:
             .order_by(Task.due_date.asc())
         )
 
-        result = self.db.execute(query)
+        result = await self.db.execute(query)
         return result.scalars().all()
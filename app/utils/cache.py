@@ -0,0 +1,274 @@
+import math
+import time
+import weakref
+from collections import OrderedDict
+from datetime import date, datetime
+from enum import Enum
+
+from sqlalchemy import event, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models import Task, bump_data_versions, record_data_versions
+from app.utils.due_index import due_index
+from app.utils.totals import record_row_changes
+
+# сколько своих версий данных помнить на область
+WRITTEN_VERSIONS = 4096
+# поля задачи, от которых зависит, в какие кэшированные выборки она попадает
+ROW_FIELDS = ("status", "priority", "category_id", "due_date", "recurrence_rule")
+
+
+class ResultCache:
+    """
+    In-process LRU-кэш результатов чтения с TTL и ограничением размера.
+
+    Каждая запись хранит предикат scope(row): попадает ли задача с такими
+    полями в кэшированную выборку. После коммита, изменившего задачи,
+    удаляются только записи, в которые попадает старое или новое состояние
+    хотя бы одной задачи. Записи разделены по engine, как и счетчики строк;
+    реплика пишет в раздел основной БД (db.info["primary"]).
+
+    Записи других воркеров этот процесс не видит. Поэтому запись кэша
+    помнит версии данных, которые conditional() прочитал перед загрузкой, и
+    подходит, только если все версии после них записал этот же процесс:
+    такие записи уже сбросили ее по scope.
+    """
+
+    def __init__(self, max_entries: int = 512, ttl: float = 30.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self._generations: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self._invalidated_at: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        # версии данных, записанные коммитами этого процесса, по областям
+        self._written: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    async def fetch(self, db: AsyncSession, key: tuple, scope, load):
+        """Возвращает закэшированный результат или вызывает load() и запоминает"""
+        engine = db.info.get("primary", db.bind).sync_engine
+        versions = db.info.get("data_versions")
+        entries = self._entries.setdefault(engine, OrderedDict())
+        entry = entries.get(key)
+        if (
+            entry is not None
+            and entry[0] > time.monotonic()
+            and self._only_own_writes(engine, entry[3], versions)
+        ):
+            entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+        self.misses += 1
+        generation = self._generations.get(engine, 0)
+        value = await load()
+        # если пока шел запрос данные поменялись, результат мог устареть;
+        # реплика могла еще не получить недавнюю запись
+        lag = db.info.get("replica_lag", 0)
+        recent = time.monotonic() - self._invalidated_at.get(engine, -math.inf) < lag
+        if self._generations.get(engine, 0) == generation and not recent:
+            entries[key] = (time.monotonic() + self.ttl, scope, value, versions)
+            entries.move_to_end(key)
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+        return value
+
+    def invalidate(self, engine, rows: list[dict | None]) -> None:
+        self._generations[engine] = self._generations.get(engine, 0) + 1
+        self._invalidated_at[engine] = time.monotonic()
+        entries = self._entries.get(engine)
+        if not entries:
+            return
+        # строка None — состояние задачи неизвестно, она может попасть куда угодно
+        for key, (_, scope, _, _) in list(entries.items()):
+            if any(row is None or scope(row) for row in rows):
+                del entries[key]
+
+    def written(self, engine, versions: list[tuple[str, int]]) -> None:
+        """Версии данных, записанные закоммиченной транзакцией этого процесса"""
+        written = self._written.setdefault(engine, {})
+        for scope, version in versions:
+            scope_versions = written.setdefault(scope, set())
+            scope_versions.add(version)
+            if len(scope_versions) > WRITTEN_VERSIONS:
+                # записи старше оставшихся версий станут промахами
+                keep = sorted(scope_versions)[-WRITTEN_VERSIONS // 2 :]
+                written[scope] = set(keep)
+
+    def _only_own_writes(self, engine, loaded, current) -> bool:
+        # без conditional() версии неизвестны: как раньше, только TTL и scope
+        if loaded is None or current is None:
+            return True
+        loaded = dict(loaded)
+        written = self._written.get(engine, {})
+        for scope, version in current:
+            since = loaded.get(scope)
+            if since is None or version < since:
+                return False
+            own = written.get(scope, ())
+            if any(v not in own for v in range(since + 1, version + 1)):
+                return False
+        return True
+
+    def clear(self, engine=None) -> None:
+        if engine is None:
+            for engine in list(self._entries.keys()):
+                self.clear(engine)
+            return
+        self._generations[engine] = self._generations.get(engine, 0) + 1
+        self._invalidated_at[engine] = time.monotonic()
+        self._entries.pop(engine, None)
+
+    def stats(self) -> dict:
+        requests = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / requests, 4) if requests else 0.0,
+            "entries": sum(len(entries) for entries in self._entries.values()),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+        }
+
+
+result_cache = ResultCache()
+
+
+def due_between(start: date, end: date):
+    """scope для календарных выборок: срок задачи попадает в [start, end]"""
+
+    def scope(row: dict) -> bool:
+        due_date = row["due_date"]
+        if due_date is None:
+            return False
+        # серия попадает во все окна после своего начала
+        if row["recurrence_rule"]:
+            return due_date.date() <= end
+        return start <= due_date.date() <= end
+
+    return scope
+
+
+def task_filters(
+    status: str | None = None,
+    priority: str | None = None,
+    category_id: int | None = None,
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+):
+    """
+    scope для списка задач с фильтрами.
+
+    Поиск по тексту не проверяется: под запрос с поиском считается
+    подходящей любая задача.
+    """
+
+    def scope(row: dict) -> bool:
+        if status and row["status"] != status:
+            return False
+        if priority and row["priority"] != priority:
+            return False
+        if category_id and row["category_id"] != category_id:
+            return False
+        if date_from or date_to:
+            due_date = row["due_date"]
+            if due_date is None:
+                return False
+            try:
+                if date_from and due_date < date_from:
+                    return False
+                if date_to and due_date > date_to:
+                    return False
+            except TypeError:
+                # наивное и aware-время не сравнить: считаем, что подходит
+                return True
+        return True
+
+    return scope
+
+
+def _row(instance: Task, previous: bool = False) -> dict | None:
+    """Поля задачи для scope; None, если какое-то поле не загружено"""
+    state = inspect(instance)
+    row = {"id": state.dict.get("id")}
+    for name in ROW_FIELDS:
+        history = state.attrs[name].history
+        if previous and history.deleted:
+            value = history.deleted[0]
+        elif name in state.dict:
+            value = state.dict[name]
+        else:
+            return None
+        row[name] = value.value if isinstance(value, Enum) else value
+    return row
+
+
+def record_task_changes(session: AsyncSession, rows: list[dict | None]) -> None:
+    """Состояния задач, измененных мимо flush: записи сбросятся после коммита"""
+    session.sync_session.info.setdefault("result_cache_rows", []).extend(rows)
+
+
+async def bulk_written(
+    db: AsyncSession,
+    rows: list[dict | None],
+    row_deltas: dict[str, int],
+    scopes: set[str],
+) -> None:
+    """
+    Учет записи мимо flush ORM-сессии: состояния задач для кэша результатов
+    и due_index, сдвиги счетчиков строк и версии областей данных. Массовые
+    INSERT/UPDATE/DELETE вызывают его в своей транзакции до коммита.
+    """
+    record_task_changes(db, rows)
+    record_row_changes(db, row_deltas)
+    result = await db.execute(bump_data_versions(scopes))
+    record_data_versions(db, result)
+
+
+def task_row(values) -> dict:
+    """Состояние задачи для scope из строки RETURNING или выборки с id"""
+    row = {name: getattr(values, name) for name in ("id", *ROW_FIELDS)}
+    return {
+        name: value.value if isinstance(value, Enum) else value
+        for name, value in row.items()
+    }
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_task_changes(session, flush_context):
+    rows = []
+    for instance in session.new:
+        if isinstance(instance, Task):
+            rows.append(_row(instance))
+    for instance in session.dirty:
+        if isinstance(instance, Task) and session.is_modified(instance):
+            rows.extend((_row(instance, previous=True), _row(instance)))
+    for instance in session.deleted:
+        if isinstance(instance, Task):
+            rows.append(_row(instance))
+            # у подзадач удаленной задачи обнуляется parent_id
+            for subtask in instance.__dict__.get("subtasks", ()):
+                rows.append(_row(subtask))
+    if rows:
+        session.info.setdefault("result_cache_rows", []).extend(rows)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    engine = session.get_bind()
+    rows = session.info.pop("result_cache_rows", None)
+    if rows:
+        result_cache.invalidate(engine, rows)
+        due_index.invalidate(engine, rows)
+    versions = session.info.pop("data_versions_written", None)
+    if versions:
+        result_cache.written(engine, versions)
+        due_index.written(engine, versions)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session):
+    session.info.pop("result_cache_rows", None)
+    session.info.pop("data_versions_written", None)
@@ -0,0 +1,100 @@
+import hashlib
+from collections.abc import Callable
+from datetime import UTC, date, datetime, time
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import Depends, HTTPException, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.replicas import get_read_db
+from app.models import DataVersion
+
+
+def today_start() -> datetime:
+    """Начало текущих суток: ответ /calendar/today меняется в полночь"""
+    return datetime.combine(date.today(), time.min).astimezone(UTC)
+
+
+def minute_start() -> datetime:
+    """Начало текущей минуты: просроченные задачи меняются со временем"""
+    return datetime.now(UTC).replace(second=0, microsecond=0)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    # для GET If-None-Match сравнивается слабо: W/ не учитывается
+    if header.strip() == "*":
+        return True
+    candidates = (value.strip().removeprefix("W/") for value in header.split(","))
+    return etag in candidates
+
+
+def _not_modified_since(header: str, last_modified: datetime) -> bool:
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=UTC)
+    return last_modified.replace(microsecond=0) <= since
+
+
+def conditional(*scopes: str, period_start: Callable[[], datetime] | None = None):
+    """
+    Зависимость для GET: ETag и Last-Modified по версиям областей данных.
+
+    Версии читаются одним запросом по первичному ключу до выполнения
+    основного запроса. Если клиентская копия актуальна, отвечает 304 без
+    тела, и обработчик не вызывается. period_start — для ответов, которые
+    меняются со временем без записей в БД: начало текущего периода входит в
+    ETag и ограничивает Last-Modified снизу.
+    """
+
+    async def check(
+        request: Request, response: Response, db: AsyncSession = Depends(get_read_db)
+    ):
+        result = await db.execute(
+            select(DataVersion.scope, DataVersion.version, DataVersion.updated_at)
+            .where(DataVersion.scope.in_(scopes))
+            .order_by(DataVersion.scope)
+        )
+        rows = result.all()
+        # кэш результатов берет записи только этих версий: запись другого
+        # воркера меняет версию, но не сбрасывает кэш этого
+        db.info["data_versions"] = tuple((scope, version) for scope, version, _ in rows)
+
+        # SQLite возвращает время без зоны, оно записано в UTC
+        updated = [
+            value.astimezone(UTC) if value.tzinfo else value.replace(tzinfo=UTC)
+            for _, _, value in rows
+        ]
+        parts = [f"{scope}:{version}" for scope, version, _ in rows]
+        if period_start is not None:
+            start = period_start()
+            updated.append(start)
+            parts.append(start.isoformat())
+        last_modified = max(updated, default=datetime.fromtimestamp(0, UTC))
+
+        # ETag зависит и от адреса: у разных фильтров разные ответы
+        parts.append(str(request.url))
+        digest = hashlib.sha256("|".join(parts).encode()).hexdigest()[:32]
+        headers = {
+            "ETag": f'"{digest}"',
+            "Last-Modified": format_datetime(last_modified, usegmt=True),
+            "Cache-Control": "no-cache",
+        }
+
+        if_none_match = request.headers.get("if-none-match")
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_none_match is not None:
+            not_modified = _etag_matches(if_none_match, headers["ETag"])
+        elif if_modified_since is not None:
+            not_modified = _not_modified_since(if_modified_since, last_modified)
+        else:
+            not_modified = False
+        if not_modified:
+            raise HTTPException(status_code=304, headers=headers)
+
+        response.headers.update(headers)
+
+    return Depends(check)
@@ -0,0 +1,280 @@
+import math
+import time
+import weakref
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.config import settings
+from app.models import (
+    TASK_COLUMNS,
+    DataVersion,
+    Task,
+    TaskRecord,
+    open_task_filter,
+    task_records,
+)
+from app.utils.recurrence import naive_utc
+
+# незавершенные задачи со сроком, по частичному индексу ix_tasks_open_due_date
+OPEN_DUE_TASKS = select(*TASK_COLUMNS).where(
+    Task.due_date.is_not(None), open_task_filter()
+)
+# столько измененных задач перечитывается по id, больше — индекс целиком
+REFRESH_LIMIT = 1000
+TASKS_VERSION = select(DataVersion.version).where(DataVersion.scope == "tasks")
+
+
+def _key(record: TaskRecord) -> tuple[datetime, int]:
+    # срок без зоны в UTC: так сравниваются значения из SQLite и PostgreSQL
+    return naive_utc(record.due_date), record.id
+
+
+class DueIndexEntries:
+    """
+    Незавершенные задачи со сроком одной БД: ключи (срок, id) разовых задач
+    по порядку и серии, повторения которых разворачиваются при чтении
+    """
+
+    def __init__(self):
+        self.keys: list[tuple[datetime, int]] = []
+        self.records: dict[int, TaskRecord] = {}
+        self.series: dict[int, TaskRecord] = {}
+        # id измененной задачи -> номер изменения, после которого ее перечитать
+        self.dirty: dict[int, int] = {}
+        self.generation = 0
+        # номер последнего изменения с неизвестными задачами (импорт)
+        self.reset_at = 0
+        self.loaded_at: int | None = None
+        # версия данных задач, которую отражает индекс, и время загрузки
+        self.version: int | None = None
+        self.loaded_time = -math.inf
+        # версии, записанные этим процессом и еще не учтенные в version
+        self.own_versions: set[int] = set()
+
+    @property
+    def loaded(self) -> bool:
+        return self.loaded_at is not None and self.loaded_at >= self.reset_at
+
+    def position(self, due_date: datetime | None, after_id: int | None = None) -> int:
+        """
+        Позиция в порядке (срок, id): первая задача со сроком не раньше
+        due_date или, с after_id, первая после задачи (due_date, after_id)
+        """
+        if due_date is None:
+            return len(self.keys)
+        if after_id is None:
+            return bisect_left(self.keys, (naive_utc(due_date),))
+        return bisect_right(self.keys, (naive_utc(due_date), after_id))
+
+    def end_of(self, due_date: datetime) -> int:
+        """Позиция сразу после задач со сроком не позже due_date"""
+        return bisect_right(self.keys, (naive_utc(due_date), math.inf))
+
+    def take(self, start: int, stop: int) -> list[TaskRecord]:
+        return [self.records[task_id] for _, task_id in self.keys[start:stop]]
+
+    def load(
+        self, records: list[TaskRecord], generation: int, version: int | None
+    ) -> None:
+        self.records = {}
+        self.series = {}
+        keys = []
+        for record in records:
+            if record.recurrence_rule is None:
+                self.records[record.id] = record
+                keys.append(_key(record))
+            else:
+                self.series[record.id] = record
+        self.keys = sorted(keys)
+        self.loaded_at = generation
+        self.loaded_time = time.monotonic()
+        self.version = version
+        self.advance()
+        # изменения, закоммиченные после начала загрузки, перечитаются
+        self.dirty = {
+            task_id: marked
+            for task_id, marked in self.dirty.items()
+            if marked > generation
+        }
+
+    def advance(self) -> None:
+        """Учитывает свои версии, идущие подряд за version"""
+        if self.version is None:
+            return
+        while self.version + 1 in self.own_versions:
+            self.version += 1
+        self.own_versions = {v for v in self.own_versions if v > self.version}
+
+    def apply(self, marked: dict[int, int], records: list[TaskRecord]) -> None:
+        found = {record.id: record for record in records}
+        for task_id, generation in marked.items():
+            # задачу изменили еще раз, пока шел запрос: перечитаем позже
+            if self.dirty.get(task_id) != generation:
+                continue
+            del self.dirty[task_id]
+            self.series.pop(task_id, None)
+            old = self.records.pop(task_id, None)
+            if old is not None:
+                del self.keys[bisect_left(self.keys, _key(old))]
+            record = found.get(task_id)
+            if record is None:
+                continue
+            if record.recurrence_rule is None:
+                self.records[task_id] = record
+                insort(self.keys, _key(record))
+            else:
+                self.series[task_id] = record
+
+
+class DueIndex:
+    """
+    In-process индекс незавершенных задач со сроком для просроченных и
+    предстоящих задач.
+
+    Ключи (срок, id) лежат в отсортированном списке, выборка по сроку —
+    бинарный поиск и срез без запроса к таблице задач. Коммит, изменивший
+    задачи, помечает их id по тем же строкам, что сбрасывают кэш
+    результатов; перед следующим чтением помеченные задачи перечитываются
+    одним запросом по id.
+    Строка без id (импорт) — индекс загружается заново.
+
+    Записи других воркеров через invalidate() не приходят. Индекс помнит
+    версию данных задач из data_versions, на которой загружен, и свои
+    коммиты ее сдвигают; если версия в БД выросла не от своих коммитов,
+    индекс загружается заново. Раз в ttl секунд он загружается заново в
+    любом случае — от записей мимо data_versions. Серии хранятся
+    отдельно от ключей: их повторения и изменения повторений разворачивает
+    сервис задач. Индексы разделены по engine и всегда читают основную БД,
+    а не реплику.
+    """
+
+    def __init__(self, enabled: bool = False, ttl: float = 300.0):
+        self.enabled = enabled
+        self.ttl = ttl
+        self._entries: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    async def get(self, db: AsyncSession) -> DueIndexEntries:
+        """Актуальный индекс БД сессии"""
+        source, engine = _primary(db)
+        entries = self._entries.setdefault(engine, DueIndexEntries())
+        version = _known_version(db, source)
+        if version is None:
+            version = await _read(source, TASKS_VERSION, _scalar)
+        stale = version is not None and (
+            entries.version is None or version > entries.version
+        )
+        expired = time.monotonic() - entries.loaded_time > self.ttl
+        if entries.loaded and (stale or expired):
+            entries.reset_at = entries.generation = entries.generation + 1
+        return await self._refresh(source, engine, version)
+
+    async def rebuild(self, engine: AsyncEngine) -> DueIndexEntries:
+        """Загружает индекс заново, например при старте воркера"""
+        entries = self._entries.setdefault(engine.sync_engine, DueIndexEntries())
+        entries.reset_at = entries.generation = entries.generation + 1
+        version = await _read(engine, TASKS_VERSION, _scalar)
+        return await self._refresh(engine, engine.sync_engine, version)
+
+    def invalidate(self, engine, rows: list[dict | None]) -> None:
+        entries = self._entries.get(engine)
+        if entries is None:
+            return
+        entries.generation += 1
+        for row in rows:
+            if row is None or row.get("id") is None:
+                entries.reset_at = entries.generation
+                return
+            entries.dirty[row["id"]] = entries.generation
+
+    def written(self, engine, versions: list[tuple[str, int]]) -> None:
+        """Версии данных, записанные закоммиченной транзакцией этого процесса"""
+        entries = self._entries.get(engine)
+        if entries is None:
+            return
+        entries.own_versions.update(v for scope, v in versions if scope == "tasks")
+        entries.advance()
+
+    async def check(self, db: AsyncSession) -> dict:
+        """
+        Сравнивает индекс с БД: задачи, которых нет в индексе (missing),
+        лишние (extra) и с другими значениями полей (stale).
+
+        Записи, закоммиченные во время проверки, могут дать ложное расхождение.
+        """
+        entries = await self.get(db)
+        source, _ = _primary(db)
+        expected = {record.id: record for record in await _fetch(source)}
+        indexed = {**entries.records, **entries.series}
+        missing = expected.keys() - indexed.keys()
+        extra = indexed.keys() - expected.keys()
+        stale = {
+            task_id
+            for task_id in expected.keys() & indexed.keys()
+            if _values(expected[task_id]) != _values(indexed[task_id])
+        }
+        return {
+            "consistent": not (missing or extra or stale),
+            "tasks": len(indexed),
+            "missing": sorted(missing),
+            "extra": sorted(extra),
+            "stale": sorted(stale),
+        }
+
+    async def _refresh(self, source, engine, version: int | None) -> DueIndexEntries:
+        entries = self._entries.setdefault(engine, DueIndexEntries())
+        if entries.loaded and not entries.dirty:
+            return entries
+        generation = entries.generation
+        if not entries.loaded or len(entries.dirty) > REFRESH_LIMIT:
+            # версия прочитана до задач: запись между ними даст лишнюю загрузку,
+            # но не пропущенное изменение
+            records = await _fetch(source)
+            # другая загрузка могла закончиться раньше и с более новыми данными
+            if entries.loaded_at is None or entries.loaded_at <= generation:
+                entries.load(records, generation, version)
+            return entries
+        marked = dict(entries.dirty)
+        records = await _fetch(source, Task.id.in_(marked))
+        entries.apply(marked, records)
+        return entries
+
+
+def _primary(db: AsyncSession) -> tuple:
+    # сессия реплики: читаем основную БД отдельным соединением
+    primary = db.info.get("primary", db.bind)
+    if primary is db.bind:
+        return db, db.bind.sync_engine
+    return primary, primary.sync_engine
+
+
+def _known_version(db: AsyncSession, source) -> int | None:
+    # conditional() уже прочитал версии; у реплики они могут отставать
+    if source is not db:
+        return None
+    return dict(db.info.get("data_versions", ())).get("tasks")
+
+
+async def _read(source, query, convert):
+    if isinstance(source, AsyncEngine):
+        async with source.connect() as connection:
+            return convert(await connection.execute(query))
+    return convert(await source.execute(query))
+
+
+def _scalar(result):
+    return result.scalar()
+
+
+async def _fetch(source, condition=None) -> list[TaskRecord]:
+    query = OPEN_DUE_TASKS if condition is None else OPEN_DUE_TASKS.where(condition)
+    return await _read(source, query, task_records)
+
+
+def _values(record: TaskRecord) -> tuple:
+    return tuple(getattr(record, name) for name in TaskRecord.__slots__)
+
+
+due_index = DueIndex(enabled=settings.due_index)
@@ -0,0 +1,43 @@
+import csv
+import io
+import json
+from collections.abc import AsyncIterator
+from datetime import datetime
+from enum import Enum
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _value(value):
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+async def export_lines(
+    batches: AsyncIterator, export_format: str, fields: list[str]
+) -> AsyncIterator[str]:
+    """
+    Текст выгрузки по пачкам строк: одна пачка — один кусок ответа.
+
+    ndjson — объект JSON на строку, csv — строка заголовка с fields и строки
+    данных, пустые значения выводятся пустыми ячейками.
+    """
+    if export_format == "csv":
+        yield ",".join(fields) + "\n"
+    async for rows in batches:
+        buffer = io.StringIO()
+        if export_format == "csv":
+            writer = csv.writer(buffer, lineterminator="\n")
+            writer.writerows([_value(value) for value in row] for row in rows)
+        else:
+            for row in rows:
+                data = dict(zip(fields, map(_value, row), strict=True))
+                buffer.write(json.dumps(data, ensure_ascii=False))
+                buffer.write("\n")
+        yield buffer.getvalue()
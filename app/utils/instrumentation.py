@@ -0,0 +1,111 @@
+import logging
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+
+logger = logging.getLogger("app.sql")
+
+# сколько самых медленных запросов попадает в лог запроса
+SLOWEST_STATEMENTS = 3
+
+
+class QueryStats:
+    """Запросы к БД в рамках одного HTTP-запроса"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.slowest: list[tuple[float, str]] = []
+
+    def record(self, statement: str, duration: float) -> None:
+        self.count += 1
+        self.duration += duration
+        if len(self.slowest) < SLOWEST_STATEMENTS or duration > self.slowest[-1][0]:
+            self.slowest.append((duration, statement))
+            self.slowest.sort(key=lambda item: item[0], reverse=True)
+            del self.slowest[SLOWEST_STATEMENTS:]
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.duration * 1000:.1f};desc="{self.count} queries"'
+
+
+_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Считает запросы всех engine, выполненные в текущем контексте"""
+    stats = QueryStats()
+    token = _stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _stats.reset(token)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_query(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._query_started = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _finish_query(conn, cursor, statement, parameters, context, executemany):
+    stats = _stats.get()
+    if stats is not None and context is not None:
+        stats.record(statement, time.perf_counter() - context._query_started)
+
+
+class QueryStatsMiddleware:
+    """
+    Server-Timing и строка лога с числом запросов и временем БД на запрос.
+
+    Заголовок отправляется вместе с началом ответа: у потоковых ответов
+    (/tasks/export) в нем только запросы до первого байта тела, в логе — все.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = None
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", stats.server_timing())
+            await send(message)
+
+        with track_queries() as stats:
+            try:
+                await self.app(scope, receive, send_with_timing)
+            finally:
+                logger.info(
+                    "%s %s: %d queries, %.1f ms",
+                    scope["method"],
+                    scope["path"],
+                    stats.count,
+                    stats.duration * 1000,
+                    extra={
+                        "method": scope["method"],
+                        "path": scope["path"],
+                        "status": status,
+                        "queries": stats.count,
+                        "db_ms": round(stats.duration * 1000, 1),
+                        "slowest": [
+                            {"ms": round(duration * 1000, 1), "statement": statement}
+                            for duration, statement in stats.slowest
+                        ],
+                    },
+                )
@@ -0,0 +1,123 @@
+import time
+
+from prometheus_client import Counter, Gauge, Histogram
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.registry import REGISTRY
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Время обработки запроса",
+    ["method", "route"],
+)
+REQUESTS = Counter(
+    "http_requests",
+    "Запросы по коду ответа",
+    ["method", "route", "status"],
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "Запросы в обработке",
+    ["method"],
+)
+RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes",
+    "Размер тела ответа",
+    ["method", "route"],
+    buckets=(100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000, float("inf")),
+)
+POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Ожидание соединения из пула, включая открытие нового",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30, float("inf")),
+)
+POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out",
+    "Соединения, выданные из пула",
+)
+
+
+class MetricsMiddleware:
+    """
+    Метрики HTTP-запросов для /metrics.
+
+    Маршрут берется из шаблона пути (/tasks/{task_id}), а не из URL, чтобы
+    число серий не росло с числом id; запросы мимо маршрутов — "unmatched".
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+        size = 0
+
+        async def send_with_metrics(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        REQUESTS_IN_PROGRESS.labels(method).inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            elapsed = time.perf_counter() - started
+            REQUESTS_IN_PROGRESS.labels(method).dec()
+            # маршрут известен только после роутинга: Starlette дописывает его в scope
+            route = getattr(scope.get("route"), "path", "unmatched")
+            REQUEST_DURATION.labels(method, route).observe(elapsed)
+            REQUESTS.labels(method, route, str(status)).inc()
+            RESPONSE_SIZE.labels(method, route).observe(size)
+
+
+class _PoolCollector:
+    # размер и переполнение есть только у QueuePool; SQLite работает с NullPool
+    def __init__(self, engine: AsyncEngine):
+        self.engine = engine
+
+    def collect(self):
+        pool = self.engine.sync_engine.pool
+        for name, attribute, documentation in (
+            ("db_pool_size", "size", "Размер пула"),
+            ("db_pool_checked_in", "checkedin", "Свободные соединения в пуле"),
+            ("db_pool_overflow", "overflow", "Соединения сверх размера пула"),
+        ):
+            if hasattr(pool, attribute):
+                yield GaugeMetricFamily(name, documentation, getattr(pool, attribute)())
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Метрики пула соединений engine: ожидание выдачи и занятость"""
+    sync_engine = engine.sync_engine
+    _time_checkouts(sync_engine.pool)
+    # dispose() создает новый пул взамен старого
+    event.listen(
+        sync_engine, "engine_disposed", lambda _: _time_checkouts(sync_engine.pool)
+    )
+    event.listen(sync_engine, "checkout", lambda *_: POOL_CHECKED_OUT.inc())
+    event.listen(sync_engine, "checkin", lambda *_: POOL_CHECKED_OUT.dec())
+    REGISTRY.register(_PoolCollector(engine))
+
+
+def _time_checkouts(pool) -> None:
+    # у пула нет события начала ожидания: оборачиваем выдачу соединения
+    connect = pool.connect
+
+    def timed_connect():
+        started = time.perf_counter()
+        try:
+            return connect()
+        finally:
+            POOL_CHECKOUT_WAIT.observe(time.perf_counter() - started)
+
+    pool.connect = timed_connect
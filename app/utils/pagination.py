@@ -0,0 +1,170 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import DateTime, Enum, Integer, String, and_, literal, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def encode_cursor(sort_by: str, order: str, value: Any, last_id: int) -> str:
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps([sort_by, order, value, last_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, order: str, column) -> tuple[Any, int]:
+    """
+    Разбирает курсор и возвращает (значение сортировки, id).
+
+    Курсор действителен только для той же сортировки, в которой он выдан, а
+    значение должно подходить по типу колонке, иначе InvalidCursorError.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        sort_by, cursor_order, value, last_id = payload
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError) as exc:
+        raise InvalidCursorError("Invalid cursor") from exc
+
+    if (sort_by, cursor_order) != (column.key, order):
+        raise InvalidCursorError("Invalid cursor")
+    if not isinstance(last_id, int) or isinstance(last_id, bool):
+        raise InvalidCursorError("Invalid cursor")
+    return _coerce_value(value, column), last_id
+
+
+def _coerce_value(value: Any, column) -> Any:
+    if value is None:
+        if not column.expression.nullable:
+            raise InvalidCursorError("Invalid cursor")
+        return None
+
+    column_type = column.type
+    if isinstance(column_type, DateTime):
+        if not isinstance(value, str):
+            raise InvalidCursorError("Invalid cursor")
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError as exc:
+            raise InvalidCursorError("Invalid cursor") from exc
+    if isinstance(column_type, Integer):
+        if not isinstance(value, int) or isinstance(value, bool):
+            raise InvalidCursorError("Invalid cursor")
+        return value
+    if isinstance(column_type, Enum):
+        if value not in column_type.enums and not (
+            column_type.enum_class
+            and value in {member.value for member in column_type.enum_class}
+        ):
+            raise InvalidCursorError("Invalid cursor")
+        return value
+    if isinstance(column_type, String):
+        if not isinstance(value, str):
+            raise InvalidCursorError("Invalid cursor")
+        return value
+    raise InvalidCursorError("Invalid cursor")
+
+
+def keyset_order_by(column, id_column, order: str) -> tuple:
+    # порядок NULL совпадает с порядком btree-индекса PostgreSQL по умолчанию:
+    # NULLS LAST для ASC и NULLS FIRST для DESC
+    if order == "asc":
+        return column.asc().nulls_last(), id_column.asc()
+    return column.desc().nulls_first(), id_column.desc()
+
+
+def _segments(column, id_column, order: str, after: tuple[Any, int] | None) -> list:
+    """
+    Условия для сегментов выборки после курсора, в порядке обхода.
+
+    Непустые значения и NULL выбираются отдельными запросами: внутри
+    сегмента порядок совпадает с индексом (column, id), а сравнение
+    кортежей превращается в range seek по индексу.
+    """
+    nullable = column.expression.nullable
+    is_null = column.is_(None)
+    not_null = column.is_not(None)
+
+    if after is None:
+        if not nullable:
+            return [None]
+        return [not_null, is_null] if order == "asc" else [is_null, not_null]
+
+    value, last_id = after
+    if column.key == id_column.key:
+        return [id_column > last_id if order == "asc" else id_column < last_id]
+
+    # значение связываем с типом колонки, чтобы Enum и DateTime были записаны
+    # так же, как хранятся в таблице
+    bound = (literal(value, column.type), last_id)
+
+    if order == "asc":
+        if value is None:
+            return [and_(is_null, id_column > last_id)]
+        row_after = tuple_(column, id_column) > tuple_(*bound)
+        return [row_after, is_null] if nullable else [row_after]
+
+    if value is None:
+        return [and_(is_null, id_column < last_id), not_null]
+    return [tuple_(column, id_column) < tuple_(*bound)]
+
+
+def _rows(query, result):
+    # select(Model) — объекты модели, select(*columns) — строки колонок
+    if len(query.column_descriptions) == 1:
+        return result.scalars().all()
+    return result.all()
+
+
+async def fetch_page(
+    db: AsyncSession,
+    query,
+    column,
+    id_column,
+    order: str,
+    limit: int,
+    skip: int = 0,
+    cursor: str | None = None,
+) -> tuple[list, str | None]:
+    """
+    Возвращает страницу и курсор следующей страницы.
+
+    Выбирается limit + 1 строка: next_cursor выдается только если за
+    страницей есть еще строки. При skip > 0 без курсора работает старый
+    режим offset.
+    """
+    want = limit + 1
+    if cursor is None and skip:
+        paged = query.order_by(*keyset_order_by(column, id_column, order))
+        result = await db.execute(paged.offset(skip).limit(want))
+        rows = list(_rows(query, result))
+    else:
+        after = decode_cursor(cursor, order, column) if cursor else None
+        if column.key == id_column.key:
+            segment_order = (id_column.asc() if order == "asc" else id_column.desc(),)
+        elif order == "asc":
+            segment_order = (column.asc(), id_column.asc())
+        else:
+            segment_order = (column.desc(), id_column.desc())
+
+        rows = []
+        for condition in _segments(column, id_column, order, after):
+            segment = query if condition is None else query.where(condition)
+            segment = segment.order_by(*segment_order).limit(want - len(rows))
+            result = await db.execute(segment)
+            rows.extend(_rows(query, result))
+            if len(rows) >= want:
+                break
+
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(column.key, order, getattr(last, column.key), last.id)
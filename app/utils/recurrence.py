@@ -0,0 +1,123 @@
+from datetime import UTC, date, datetime
+
+from dateutil.relativedelta import relativedelta
+from dateutil.rrule import DAILY, MONTHLY, WEEKLY, YEARLY, rrule, rrulestr
+
+# частота не чаще раза в день: окно календаря — дни, недели и месяцы
+FREQUENCIES = {DAILY: "days", WEEKLY: "weeks", MONTHLY: "months", YEARLY: "years"}
+# COUNT ограничен: последнее повторение ищется перебором при записи
+MAX_COUNT = 10_000
+# значения BY*, которые rrule берет из dtstart, если они не заданы в правиле
+IMPLICIT_PARTS = ("bymonth", "bymonthday", "byweekday")
+
+
+class InvalidRuleError(ValueError):
+    pass
+
+
+def naive_utc(value: datetime) -> datetime:
+    """Время в UTC без зоны: так хранит SQLite и так считаются повторения"""
+    if value.tzinfo is not None:
+        value = value.astimezone(UTC).replace(tzinfo=None)
+    return value
+
+
+def parse_rule(rule: str, dtstart: datetime | None = None) -> rrule:
+    """
+    RRULE (RFC 5545) одной строкой, с префиксом "RRULE:" или без.
+
+    dtstart — срок задачи, первое повторение серии; без него правило
+    проверяется только на синтаксис.
+    """
+    if "\n" in rule or "DTSTART" in rule.upper():
+        raise InvalidRuleError("Recurrence rule must be a single RRULE")
+    try:
+        parsed = rrulestr(
+            rule, dtstart=naive_utc(dtstart or datetime.now()), ignoretz=True
+        )
+    except (ValueError, TypeError) as exc:
+        raise InvalidRuleError(f"Invalid recurrence rule: {exc}") from None
+    if not isinstance(parsed, rrule):
+        raise InvalidRuleError("Recurrence rule must be a single RRULE")
+    if parsed._freq not in FREQUENCIES:
+        raise InvalidRuleError("FREQ must be DAILY, WEEKLY, MONTHLY or YEARLY")
+    if parsed._count is not None and parsed._count > MAX_COUNT:
+        raise InvalidRuleError(f"COUNT must not exceed {MAX_COUNT}")
+    return parsed
+
+
+def series_end(rule: rrule) -> datetime | None:
+    """Граница последнего повторения; None — серия бесконечна"""
+    if rule._count is not None:
+        last = None
+        for last in rule:  # noqa: B007
+            pass
+        return last
+    return rule._until
+
+
+def window(start: date, end: date) -> tuple[datetime, datetime]:
+    """Окно календаря в datetime: даты — целые дни включительно"""
+    if not isinstance(start, datetime):
+        start = datetime.combine(start, datetime.min.time())
+    if not isinstance(end, datetime):
+        end = datetime.combine(end, datetime.max.time())
+    return naive_utc(start), naive_utc(end)
+
+
+def occurrences(rule: rrule, start: datetime, end: datetime) -> list[datetime]:
+    """
+    Повторения серии в [start, end].
+
+    rrule перебирает повторения с dtstart, поэтому перед окном dtstart
+    переносится вперед на целое число периодов: время не зависит от того,
+    сколько серия уже длится. С COUNT так нельзя — номер повторения важен,
+    но такая серия ограничена MAX_COUNT.
+    """
+    dtstart = rule._dtstart
+    if start > dtstart and rule._count is None:
+        unit = FREQUENCIES[rule._freq]
+        if rule._freq == DAILY:
+            periods = (start - dtstart).days
+        elif rule._freq == WEEKLY:
+            periods = (start - dtstart).days // 7
+        elif rule._freq == MONTHLY:
+            periods = (start.year - dtstart.year) * 12 + start.month - dtstart.month
+        else:
+            periods = start.year - dtstart.year
+        # на один интервал меньше: повторение может прийтись на конец периода
+        skip = (periods // rule._interval - 1) * rule._interval
+        if skip > 0:
+            # неявные BY* фиксируем: иначе они возьмутся из нового dtstart,
+            # у которого день месяца мог сдвинуться (31 января + месяц)
+            implicit = {
+                part: getattr(rule, f"_{part}")
+                for part in IMPLICIT_PARTS
+                if part in rule._original_rule and rule._original_rule[part] is None
+            }
+            rule = rule.replace(
+                dtstart=dtstart + relativedelta(**{unit: skip}), **implicit
+            )
+    return rule.between(start, end, inc=True)
+
+
+def last_occurrence(rule: rrule, end: datetime) -> datetime | None:
+    """
+    Последнее повторение серии не позже end.
+
+    Ищется в окнах перед end, удваивающихся, пока повторение не найдется:
+    с переносом dtstart в occurrences время не зависит от длины серии.
+    """
+    dtstart = rule._dtstart
+    if end < dtstart:
+        return None
+    unit = FREQUENCIES[rule._freq]
+    span = rule._interval
+    while True:
+        start = max(end - relativedelta(**{unit: span}), dtstart)
+        found = occurrences(rule, start, end)
+        if found:
+            return found[-1]
+        if start == dtstart:
+            return None
+        span *= 2
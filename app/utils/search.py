@@ -0,0 +1,118 @@
+import html
+import re
+
+from sqlalchemy import column, false, func, literal_column, select, table
+
+from app.models import Task
+
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_END = "</mark>"
+# сколько самых новых совпадений ранжируется в /tasks/search
+SEARCH_CANDIDATES = 1000
+SNIPPET_WORDS = 12
+
+tasks_fts = table("tasks_fts", column("rowid"))
+search_vector = literal_column("tasks.search_vector")
+# конфигурация текстового поиска PostgreSQL, должна совпадать с миграцией
+ts_config = literal_column("'simple'::regconfig")
+
+
+def search_terms(search: str) -> list[str]:
+    """Слова запроса; каждое ищется как префикс: «отч» найдет «отчет»"""
+    return re.findall(r"\w+", search.lower())
+
+
+def _fts5_query(terms: list[str]) -> str:
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def _tsquery(terms: list[str]):
+    return func.to_tsquery(ts_config, " & ".join(f"{term}:*" for term in terms))
+
+
+def match_clause(dialect: str, search: str):
+    """Условие «задача подходит под запрос» для фильтра списка задач"""
+    terms = search_terms(search)
+    if not terms:
+        return false()
+    if dialect == "postgresql":
+        return search_vector.op("@@")(_tsquery(terms))
+    return Task.id.in_(
+        select(tasks_fts.c.rowid).where(
+            literal_column("tasks_fts").match(_fts5_query(terms))
+        )
+    )
+
+
+def ranked_search(dialect: str, search: str, limit: int):
+    """
+    Запрос (Task, rank), отсортированный по релевантности.
+
+    Ранжируются не больше SEARCH_CANDIDATES самых новых совпадений: для
+    частых слов ранжирование всех совпадений не укладывается в бюджет
+    задержки, а индекс отдает совпадения по убыванию id почти бесплатно.
+    """
+    terms = search_terms(search)
+    if dialect == "postgresql":
+        tsquery = _tsquery(terms)
+        candidates = (
+            select(Task.id, func.ts_rank(search_vector, tsquery).label("rank"))
+            .where(search_vector.op("@@")(tsquery))
+            .order_by(Task.id.desc())
+            .limit(SEARCH_CANDIDATES)
+            .subquery()
+        )
+    else:
+        # bm25 меньше у более релевантных строк; совпадение в заголовке весит
+        # больше
+        bm25 = func.bm25(literal_column("tasks_fts"), 10.0, 1.0)
+        candidates = (
+            select(tasks_fts.c.rowid.label("id"), (-bm25).label("rank"))
+            .where(literal_column("tasks_fts").match(_fts5_query(terms)))
+            .order_by(tasks_fts.c.rowid.desc())
+            .limit(SEARCH_CANDIDATES)
+            .subquery()
+        )
+    return (
+        select(Task, candidates.c.rank)
+        .join(candidates, Task.id == candidates.c.id)
+        .order_by(candidates.c.rank.desc(), Task.id)
+        .limit(limit)
+    )
+
+
+def snippet(title: str, description: str | None, terms: list[str]) -> str | None:
+    """
+    Фрагмент заголовка или описания вокруг первого совпадения.
+
+    Строится в Python только для задач на странице: повторный поиск по
+    индексу ради подсветки стоит дороже самого ранжирования. Найденные
+    слова оборачиваются в <mark>, остальной текст экранируется.
+    """
+    for text in (title, description):
+        if not text:
+            continue
+        words = list(re.finditer(r"\w+", text))
+        hits = [
+            i for i, word in enumerate(words) if word.group().lower().startswith(terms)
+        ]
+        if not hits:
+            continue
+        first = max(hits[0] - SNIPPET_WORDS // 4, 0)
+        window = words[first : first + SNIPPET_WORDS]
+        start, end = window[0].start(), window[-1].end()
+
+        parts = ["…"] if start > 0 else []
+        position = start
+        for i, word in enumerate(window, start=first):
+            if i in hits:
+                parts.append(html.escape(text[position : word.start()]))
+                parts.append(
+                    HIGHLIGHT_START + html.escape(word.group()) + HIGHLIGHT_END
+                )
+                position = word.end()
+        parts.append(html.escape(text[position:end]))
+        if end < len(text):
+            parts.append("…")
+        return "".join(parts)
+    return None
@@ -0,0 +1,16 @@
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from pydantic_core import to_json
+
+
+class PydanticJSONResponse(JSONResponse):
+    """
+    JSON-ответ, который кодирует pydantic-core, а не модуль json.
+
+    Маршрутам с response_model FastAPI передает уже сериализованные
+    pydantic-core данные; здесь они только превращаются в байты.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return to_json(content)
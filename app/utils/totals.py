@@ -0,0 +1,108 @@
+import json
+import time
+import weakref
+
+from sqlalchemy import Table, event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+
+class RowCounter:
+    """
+    Поддерживаемый счетчик строк таблиц для оценки total без COUNT.
+
+    Счетчик загружается точным COUNT при первом обращении, затем
+    корректируется на каждом flush ORM-сессии и раз в ttl секунд
+    перечитывается, чтобы не накапливать расхождение от массовых операций.
+    """
+
+    def __init__(self, ttl: float = 60.0):
+        self.ttl = ttl
+        self._counts: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    async def get(self, db: AsyncSession, table: Table) -> int:
+        counts = self._counts.setdefault(db.bind.sync_engine, {})
+        entry = counts.get(table.name)
+        if entry is None or time.monotonic() - entry[1] > self.ttl:
+            count = await db.scalar(select(func.count()).select_from(table))
+            counts[table.name] = [count, time.monotonic()]
+            return count
+        return entry[0]
+
+    def adjust(self, engine, table_name: str, delta: int) -> None:
+        entry = self._counts.get(engine, {}).get(table_name)
+        if entry is not None:
+            entry[0] = max(entry[0] + delta, 0)
+
+
+row_counter = RowCounter()
+
+
+@event.listens_for(Session, "after_flush")
+def _track_row_counts(session, flush_context):
+    deltas: dict[str, int] = {}
+    for instance in session.new:
+        name = instance.__table__.name
+        deltas[name] = deltas.get(name, 0) + 1
+    for instance in session.deleted:
+        name = instance.__table__.name
+        deltas[name] = deltas.get(name, 0) - 1
+    if deltas:
+        engine = session.get_bind()
+        for name, delta in deltas.items():
+            row_counter.adjust(engine, name, delta)
+
+
+def record_row_changes(session: AsyncSession, deltas: dict[str, int]) -> None:
+    """Строки, вставленные и удаленные мимо flush: счетчики сдвинутся после коммита"""
+    pending = session.sync_session.info.setdefault("row_count_deltas", {})
+    for name, delta in deltas.items():
+        pending[name] = pending.get(name, 0) + delta
+
+
+@event.listens_for(Session, "after_commit")
+def _adjust_after_commit(session):
+    deltas = session.info.pop("row_count_deltas", None)
+    if deltas:
+        engine = session.get_bind()
+        for name, delta in deltas.items():
+            row_counter.adjust(engine, name, delta)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session):
+    session.info.pop("row_count_deltas", None)
+
+
+async def _planner_estimate(db: AsyncSession, query) -> int:
+    compiled = query.compile(
+        dialect=db.bind.dialect, compile_kwargs={"literal_binds": True}
+    )
+    # exec_driver_sql, чтобы двоеточия в литералах не считались параметрами
+    connection = await db.connection()
+    result = await connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}")
+    plan = result.scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+async def count_total(
+    db: AsyncSession, query, mode: str = "exact", table: Table | None = None
+) -> int | None:
+    """
+    Считает total для списка в выбранном режиме.
+
+    table передается, если query выбирает всю таблицу без фильтров: тогда
+    оценка берется из поддерживаемого счетчика. На PostgreSQL оценка
+    берется из статистики планировщика, в остальных случаях без счетчика
+    выполняется точный COUNT.
+    """
+    if mode == "none":
+        return None
+    if mode == "estimate":
+        if db.bind.dialect.name == "postgresql":
+            return await _planner_estimate(db, query)
+        if table is not None:
+            return await row_counter.get(db, table)
+    return await db.scalar(select(func.count()).select_from(query.subquery()))
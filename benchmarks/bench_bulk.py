@@ -0,0 +1,64 @@
+"""
+Создание задач по одной против POST /tasks/bulk.
+
+Создает временную SQLite-базу и записывает N задач двумя способами через
+сервис: create_task на каждую задачу и bulk_create_tasks пачками:
+
+    PYTHONPATH=. python benchmarks/bench_bulk.py --rows 10000
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.models import Base
+from app.schemas.task import TaskCreate
+from app.services.task_service import TaskService
+
+BATCH = 1000
+
+
+def items(rows: int) -> list[dict]:
+    return [
+        {"title": f"Задача {i}", "priority": "high", "due_date": "2024-12-02T10:00"}
+        for i in range(rows)
+    ]
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10_000)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    data = items(args.rows)
+    async with AsyncSession(engine, expire_on_commit=False) as db:
+        service = TaskService(db)
+
+        started = time.perf_counter()
+        for item in data:
+            await service.create_task(TaskCreate.model_validate(item))
+        single = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for offset in range(0, args.rows, BATCH):
+            await service.bulk_create_tasks(data[offset : offset + BATCH])
+        bulk = time.perf_counter() - started
+
+    print(f"{'method':>12} {'total, s':>9} {'tasks/s':>9}")
+    print(f"{'one by one':>12} {single:>9.2f} {args.rows / single:>9.0f}")
+    print(f"{'bulk':>12} {bulk:>9.2f} {args.rows / bulk:>9.0f}")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,99 @@
+"""
+Латентность календарных представлений за год.
+
+Создает временную SQLite-базу с N задачами, сроки и даты создания которых
+распределены по году, и замеряет диапазон за год с группировкой по дням,
+неделям и месяцам, а также статистику за год:
+
+    PYTHONPATH=. python benchmarks/bench_calendar.py --rows 100000
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.models import Base, Task, TaskPriority, TaskStatus
+from app.services.calendar_service import CalendarService
+from app.utils.cache import result_cache
+
+CHUNK = 50_000
+PRIORITIES = list(TaskPriority)
+YEAR_START = datetime(2024, 1, 1)
+YEAR_SECONDS = 366 * 24 * 3600
+
+
+async def seed(engine, rows: int) -> None:
+    step = YEAR_SECONDS // rows
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        for offset in range(0, rows, CHUNK):
+            await conn.execute(
+                insert(Task),
+                [
+                    {
+                        "title": f"Задача {i}",
+                        "status": (
+                            TaskStatus.COMPLETED if i % 3 == 0 else TaskStatus.PENDING
+                        ),
+                        "priority": PRIORITIES[i % 4],
+                        "created_at": YEAR_START + timedelta(seconds=i * step),
+                        "updated_at": YEAR_START + timedelta(seconds=i * step + 3600),
+                        "due_date": YEAR_START
+                        + timedelta(seconds=(i * 7919 % rows) * step),
+                    }
+                    for i in range(offset, min(offset + CHUNK, rows))
+                ],
+            )
+
+
+async def timed(coro_factory, repeats: int) -> float:
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        await coro_factory()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    started = time.perf_counter()
+    await seed(engine, args.rows)
+    print(f"seeded {args.rows} rows in {time.perf_counter() - started:.1f} s")
+
+    start, end = date(2024, 1, 1), date(2024, 12, 31)
+    # замеряем запросы к БД, а не кэш результатов
+    result_cache.max_entries = 0
+    async with AsyncSession(engine) as db:
+        service = CalendarService(db)
+        cases = {
+            "range, day": lambda: service.get_calendar_range(start, end, "day"),
+            "range, week": lambda: service.get_calendar_range(start, end, "week"),
+            "range, month": lambda: service.get_calendar_range(start, end, "month"),
+            "week": lambda: service.get_week_calendar(date(2024, 6, 12)),
+            "stats": lambda: service.get_calendar_stats(start, end),
+        }
+        print(f"{'view':>14} {'ms':>10}")
+        for name, factory in cases.items():
+            elapsed = await timed(factory, args.repeats)
+            db.expunge_all()
+            print(f"{name:>14} {elapsed:>10.2f}")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
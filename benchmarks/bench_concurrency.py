@@ -0,0 +1,96 @@
+"""
+Нагрузочный бенчмарк: латентность при N одновременных клиентах.
+
+Скрипт наполняет сервис задачами и параллельно опрашивает календарь и список
+задач, после чего печатает p50/p95/p99 и пропускную способность. Чтобы
+сравнить «до» и «после», запустите его против двух сборок сервиса:
+
+    uvicorn app.main:app --port 8000
+    python benchmarks/bench_concurrency.py --url http://127.0.0.1:8000
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+import httpx
+
+ENDPOINTS = (
+    "/calendar/month?year={year}&month={month}",
+    "/tasks?limit=50",
+    "/calendar/overdue",
+)
+
+
+async def seed(client: httpx.AsyncClient, count: int) -> None:
+    start = datetime(2024, 1, 1)
+    semaphore = asyncio.Semaphore(20)
+
+    async def create(i: int) -> None:
+        async with semaphore:
+            await client.post(
+                "/tasks",
+                json={
+                    "title": f"Задача {i}",
+                    "due_date": (start + timedelta(hours=i * 7)).isoformat(),
+                    "priority": random.choice(["low", "medium", "high", "urgent"]),
+                },
+            )
+
+    await asyncio.gather(*(create(i) for i in range(count)))
+
+
+async def worker(
+    client: httpx.AsyncClient,
+    deadline: float,
+    latencies: list[float],
+    errors: list[str],
+) -> None:
+    while time.perf_counter() < deadline:
+        path = random.choice(ENDPOINTS).format(year=2024, month=random.randint(1, 12))
+        started = time.perf_counter()
+        try:
+            response = await client.get(path)
+            response.raise_for_status()
+        except httpx.HTTPError as exc:
+            errors.append(type(exc).__name__)
+        latencies.append(time.perf_counter() - started)
+
+
+def percentile(values: list[float], pct: float) -> float:
+    return statistics.quantiles(values, n=100, method="inclusive")[int(pct) - 1]
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--seed", type=int, default=500, help="0 — не наполнять")
+    args = parser.parse_args()
+
+    limits = httpx.Limits(max_connections=args.clients)
+    async with httpx.AsyncClient(
+        base_url=args.url, limits=limits, timeout=60.0
+    ) as client:
+        if args.seed:
+            await seed(client, args.seed)
+
+        latencies: list[float] = []
+        errors: list[str] = []
+        deadline = time.perf_counter() + args.duration
+        await asyncio.gather(
+            *(worker(client, deadline, latencies, errors) for _ in range(args.clients))
+        )
+
+    print(f"clients={args.clients} requests={len(latencies)} errors={len(errors)}")
+    print(f"rps={len(latencies) / args.duration:.1f}")
+    for pct in (50, 95, 99):
+        print(f"p{pct}={percentile(latencies, pct) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
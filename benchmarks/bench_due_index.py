@@ -0,0 +1,129 @@
+"""
+Просроченные и предстоящие задачи: запрос к БД против due_index.
+
+Создает временную SQLite-базу с N задачами, сроки равномерно в пределах
+года до и после текущего момента, треть задач выполнена. Сравнивает
+get_overdue_tasks (страница из 100 с точным total) и get_upcoming_tasks
+(7 дней) через частичный индекс ix_tasks_open_due_date и через due_index;
+отдельно — чтение после изменения одной задачи, загрузка индекса и его
+память:
+
+    PYTHONPATH=. python benchmarks/bench_due_index.py --rows 100000
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.models import Base, Task, TaskStatus
+from app.schemas.task import TaskUpdate
+from app.services.task_service import TaskService
+from app.utils.due_index import due_index
+
+REPEAT = 50
+STATUSES = (TaskStatus.PENDING, TaskStatus.COMPLETED)
+
+
+async def seed(engine, rows: int) -> None:
+    now = datetime.now()
+    step = 2 * 365 * 24 * 3600 / rows
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(
+            insert(Task),
+            [
+                {
+                    "title": f"Задача {i}",
+                    "description": "Описание задачи",
+                    "status": STATUSES[i % 3 == 0],
+                    "due_date": now - timedelta(days=365, seconds=-i * step),
+                }
+                for i in range(rows)
+            ],
+        )
+
+
+async def median(engine, call) -> float:
+    timings = []
+    async with AsyncSession(engine) as db:
+        await call(TaskService(db))
+        for _ in range(REPEAT):
+            started = time.perf_counter()
+            await call(TaskService(db))
+            timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+async def overdue(service: TaskService) -> None:
+    tasks, total, _ = await service.get_overdue_tasks(limit=100)
+    assert len(tasks) == 100 and total
+
+
+async def upcoming(service: TaskService) -> None:
+    assert await service.get_upcoming_tasks(days=7)
+
+
+async def after_write(engine) -> float:
+    # изменение одной задачи: индекс перечитывает ее при следующем чтении
+    timings = []
+    async with AsyncSession(engine) as db:
+        service = TaskService(db)
+        for i in range(REPEAT):
+            await service.update_task(2, TaskUpdate(title=f"Задача {i}"))
+            started = time.perf_counter()
+            await overdue(service)
+            timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    await seed(engine, args.rows)
+
+    results = {}
+    for enabled in (False, True):
+        due_index.enabled = enabled
+        results[enabled] = (
+            await median(engine, overdue),
+            await median(engine, upcoming),
+            await after_write(engine),
+        )
+
+    print(f"{'':>12} {'overdue':>10} {'upcoming':>10} {'after write':>12}")
+    for enabled, name in ((False, "database"), (True, "due_index")):
+        print(
+            f"{name:>12}"
+            + "".join(f" {value * 1e6:>9.0f}µs" for value in results[enabled])
+        )
+
+    started = time.perf_counter()
+    entries = await due_index.rebuild(engine)
+    elapsed = time.perf_counter() - started
+    # память отдельной загрузкой: tracemalloc сильно замедляет выполнение
+    tracemalloc.start()
+    await due_index.rebuild(engine)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(
+        f"rebuild: {len(entries.keys)} tasks, {elapsed * 1000:.0f} ms,"
+        f" {size / 2**20:.1f} MB"
+    )
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
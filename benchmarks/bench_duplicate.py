@@ -0,0 +1,81 @@
+"""
+Глубокое копирование поддерева: duplicate_task(deep=True) против копирования
+по узлу через create_task, как это приходилось делать клиенту:
+
+    PYTHONPATH=. python benchmarks/bench_duplicate.py
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from bench_tree import SHAPES, seed
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.models import Base
+from app.schemas.task import TaskCreate
+from app.services.task_service import TaskService
+
+
+async def copy_by_node(service: TaskService, task_id: int) -> int:
+    # обход в ширину: родитель копируется раньше подзадач
+    copies = {}
+    level = [await service.get_task(task_id)]
+    parent_id = level[0].parent_id
+    while level:
+        next_level = []
+        for task in level:
+            copy = await service.create_task(
+                TaskCreate(
+                    title=task.title,
+                    description=task.description,
+                    priority=task.priority,
+                    category_id=task.category_id,
+                    due_date=task.due_date,
+                    parent_id=copies.get(task.parent_id, parent_id),
+                )
+            )
+            copies[task.id] = copy.id
+            next_level += await service.get_subtasks(task.id)
+        level = next_level
+    return len(copies)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    print(f"{'shape':>10} {'nodes':>7} {'by node, ms':>12} {'deep, ms':>9}")
+    async with AsyncSession(engine, expire_on_commit=False) as db:
+        service = TaskService(db)
+        for branching, depth in SHAPES:
+            root = await seed(db, branching, depth)
+
+            started = time.perf_counter()
+            nodes = await copy_by_node(service, root)
+            by_node = time.perf_counter() - started
+            db.expunge_all()
+
+            started = time.perf_counter()
+            copy = await service.duplicate_task(root, deep=True)
+            deep = time.perf_counter() - started
+            db.expunge_all()
+            tree = await service.get_task_tree(copy.id, max_depth=100)
+            assert tree.descendant_count + 1 == nodes
+            db.expunge_all()
+
+            shape = f"{branching}^{depth}"
+            print(f"{shape:>10} {nodes:>7} {by_node * 1000:>12.0f} {deep * 1000:>9.0f}")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,119 @@
+"""
+Память сервиса при потоковой выгрузке /tasks/export.
+
+Создает временную SQLite-базу с N задачами, запускает на ней uvicorn,
+выкачивает выгрузку и печатает пиковый RSS процесса сервиса (VmHWM):
+
+    PYTHONPATH=. python benchmarks/bench_export.py --rows 5000000
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import httpx
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.models import Base, Task, TaskPriority, TaskStatus
+
+CHUNK = 50_000
+PRIORITIES = list(TaskPriority)
+
+
+async def seed(url: str, rows: int) -> None:
+    engine = create_async_engine(url)
+    start = datetime(2024, 1, 1)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        for offset in range(0, rows, CHUNK):
+            await conn.execute(
+                insert(Task),
+                [
+                    {
+                        "title": f"Задача {i}",
+                        "description": "Описание задачи для выгрузки",
+                        "status": TaskStatus.PENDING,
+                        "priority": PRIORITIES[i % 4],
+                        "due_date": start + timedelta(minutes=i),
+                    }
+                    for i in range(offset, min(offset + CHUNK, rows))
+                ],
+            )
+    await engine.dispose()
+
+
+def memory_kb(pid: int, field: str) -> int:
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith(field):
+                return int(line.split()[1])
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument(
+        "--formats", nargs="+", default=["ndjson", "csv"], choices=("ndjson", "csv")
+    )
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    url = f"sqlite+aiosqlite:///{path}"
+    started = time.perf_counter()
+    asyncio.run(seed(url, args.rows))
+    print(f"seeded {args.rows} rows in {time.perf_counter() - started:.1f} s")
+
+    for export_format in args.formats:
+        measure(url, export_format, args.port)
+
+
+def measure(url: str, export_format: str, port: int) -> None:
+    # свежий процесс на каждый формат, чтобы пики памяти не смешивались
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port)],
+        env={**os.environ, "DATABASE_URL": url},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    base = f"http://127.0.0.1:{port}"
+    try:
+        for _ in range(100):
+            try:
+                httpx.get(f"{base}/health")
+                break
+            except httpx.HTTPError:
+                time.sleep(0.1)
+        idle = memory_kb(server.pid, "VmRSS")
+
+        lines = size = 0
+        started = time.perf_counter()
+        with httpx.stream(
+            "GET", f"{base}/tasks/export?format={export_format}", timeout=None
+        ) as response:
+            for chunk in response.iter_bytes():
+                size += len(chunk)
+                lines += chunk.count(b"\n")
+        elapsed = time.perf_counter() - started
+        peak = memory_kb(server.pid, "VmHWM")
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f"\nformat:    {export_format}")
+    print(f"lines:     {lines}")
+    print(f"size:      {size / 2**20:.0f} MB")
+    print(f"time:      {elapsed:.1f} s ({lines / elapsed:.0f} rows/s)")
+    print(f"RSS idle:  {idle / 1024:.0f} MB")
+    print(f"RSS peak:  {peak / 1024:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
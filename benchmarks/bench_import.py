@@ -0,0 +1,84 @@
+"""
+Импорт задач из файла через ImportService (то же, что python -m app.cli import).
+
+Создает временную SQLite-базу и NDJSON- или CSV-файл с N задачами в 50
+категориях (по имени), импортирует его и печатает время и пиковый RSS:
+
+    PYTHONPATH=. python benchmarks/bench_import.py --rows 1000000
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import os
+import resource
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.cli import run_import
+from app.models import Base
+
+PRIORITIES = ["low", "medium", "high", "urgent"]
+
+
+def records(rows: int):
+    start = datetime(2024, 1, 1)
+    for i in range(rows):
+        yield {
+            "title": f"Задача {i}",
+            "description": "Описание импортированной задачи",
+            "priority": PRIORITIES[i % 4],
+            "due_date": (start + timedelta(minutes=i)).isoformat(),
+            "category": f"Категория {i % 50}",
+        }
+
+
+def write_file(path: str, import_format: str, rows: int) -> None:
+    with open(path, "w", newline="") as file:
+        if import_format == "csv":
+            writer = csv.DictWriter(file, fieldnames=next(records(1)).keys())
+            writer.writeheader()
+            writer.writerows(records(rows))
+        else:
+            for record in records(rows):
+                file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--format", default="ndjson", choices=("ndjson", "csv"))
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, f"tasks.{args.format}")
+    write_file(path, args.format, args.rows)
+    print(f"file: {os.path.getsize(path) / 2**20:.0f} MB")
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{directory}/bench.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    started = time.perf_counter()
+    report = await run_import(
+        async_sessionmaker(engine, expire_on_commit=False),
+        path,
+        args.format,
+        args.batch_size,
+    )
+    elapsed = time.perf_counter() - started
+    await engine.dispose()
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"inserted:  {report['inserted']} (skipped {report['skipped']})")
+    print(f"time:      {elapsed:.1f} s ({report['inserted'] / elapsed:.0f} rows/s)")
+    print(f"RSS peak:  {peak / 1024:.0f} MB")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,109 @@
+"""
+Латентность глубоких страниц: offset против курсора.
+
+Создает временную SQLite-базу с N задачами и замеряет выборку страницы на
+разной глубине обоими способами:
+
+    PYTHONPATH=. python benchmarks/bench_pagination.py --rows 1000000
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.models import Base, Task, TaskPriority, TaskStatus
+from app.utils.pagination import encode_cursor, fetch_page, keyset_order_by
+
+CHUNK = 50_000
+PRIORITIES = list(TaskPriority)
+
+
+async def seed(engine, rows: int) -> None:
+    start = datetime(2020, 1, 1)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        for offset in range(0, rows, CHUNK):
+            await conn.execute(
+                insert(Task),
+                [
+                    {
+                        "title": f"Задача {i}",
+                        "status": TaskStatus.PENDING,
+                        "priority": PRIORITIES[i % 4],
+                        # по 10 задач на одну метку времени — проверяем связки
+                        "created_at": start + timedelta(seconds=i // 10),
+                        "due_date": None if i % 7 == 0 else start + timedelta(hours=i),
+                    }
+                    for i in range(offset, min(offset + CHUNK, rows))
+                ],
+            )
+
+
+async def timed(coro_factory, repeats: int) -> float:
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        await coro_factory()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    started = time.perf_counter()
+    await seed(engine, args.rows)
+    print(f"seeded {args.rows} rows in {time.perf_counter() - started:.1f} s")
+
+    query = select(Task)
+    depths = [0, 1_000, 10_000, 100_000, args.rows // 2, args.rows - args.limit * 2]
+    async with AsyncSession(engine) as db:
+        for sort_by, order in (("created_at", "desc"), ("due_date", "asc")):
+            column = getattr(Task, sort_by)
+            print(f"\nsort_by={sort_by} order={order}")
+            print(f"{'depth':>10} {'offset, ms':>12} {'cursor, ms':>12}")
+            for depth in depths:
+                cursor = None
+                if depth:
+                    # курсор на строку перед нужной страницей (не замеряется)
+                    anchor = await db.scalar(
+                        query.order_by(*keyset_order_by(column, Task.id, order))
+                        .offset(depth - 1)
+                        .limit(1)
+                    )
+                    value = getattr(anchor, sort_by)
+                    cursor = encode_cursor(sort_by, order, value, anchor.id)
+
+                offset_ms = await timed(
+                    lambda d=depth, c=column, o=order: fetch_page(
+                        db, query, c, Task.id, o, args.limit, skip=d
+                    ),
+                    args.repeats,
+                )
+                cursor_ms = await timed(
+                    lambda cur=cursor, c=column, o=order: fetch_page(
+                        db, query, c, Task.id, o, args.limit, cursor=cur
+                    ),
+                    args.repeats,
+                )
+                db.expunge_all()
+                print(f"{depth:>10} {offset_ms:>12.2f} {cursor_ms:>12.2f}")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,125 @@
+"""
+Календарь с повторяющимися задачами: время и память против возраста серий.
+
+Создает временную SQLite-базу с N сериями (ежедневные, еженедельные и
+ежемесячные правила), которые начались за A лет до запрошенного месяца, и
+с выполненными повторениями за каждый месяц истории. Месяц календаря
+(get_month_calendar без кэша) собирается с разворачиванием только окна
+(occurrences) и с перебором повторений от начала серии (rrule.between):
+
+    PYTHONPATH=. python benchmarks/bench_recurrence.py --series 100
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.models import Base, Task, TaskOccurrence, TaskStatus
+from app.services import calendar_service
+from app.services.calendar_service import CalendarService
+from app.utils.cache import result_cache
+from app.utils.recurrence import occurrences
+
+REPEAT = 10
+RULES = ("FREQ=DAILY", "FREQ=WEEKLY;BYDAY=MO,TH", "FREQ=MONTHLY;BYMONTHDAY=15")
+YEAR = 2024
+
+
+async def seed(engine, series: int, age: int) -> None:
+    start = datetime(YEAR - age, 1, 15, 9)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(
+            insert(Task),
+            [
+                {
+                    "title": f"Серия {i}",
+                    "due_date": start,
+                    "recurrence_rule": RULES[i % len(RULES)],
+                }
+                for i in range(series)
+            ],
+        )
+        # выполненное повторение 15-го числа каждого месяца истории
+        await conn.execute(
+            insert(TaskOccurrence),
+            [
+                {
+                    "task_id": task_id,
+                    "occurrence": datetime(year, month, 15, 9),
+                    "status": TaskStatus.COMPLETED,
+                }
+                for task_id in range(1, series + 1)
+                for year in range(YEAR - age, YEAR)
+                for month in range(1, 13)
+            ],
+        )
+
+
+def full_expansion(rule, start, end):
+    # перебор от начала серии, без переноса dtstart к окну
+    return rule.between(start, end, inc=True)
+
+
+async def run(engine) -> int:
+    async with AsyncSession(engine) as db:
+        calendar = await CalendarService(db).get_month_calendar(YEAR, 6)
+    return calendar["total_tasks"]
+
+
+async def measure(engine) -> tuple[float, float, int]:
+    total = await run(engine)
+    timings = []
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        await run(engine)
+        timings.append(time.perf_counter() - started)
+    tracemalloc.start()
+    await run(engine)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return statistics.median(timings), peak, total
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--series", type=int, default=100)
+    parser.add_argument("--ages", type=int, nargs="+", default=[1, 10, 50, 100])
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    result_cache.max_entries = 0
+
+    print(
+        f"{'age':>4} {'overrides':>10} {'tasks':>6}"
+        f" {'window, ms':>11} {'peak, MB':>9} {'full, ms':>9} {'peak, MB':>9}"
+    )
+    for age in args.ages:
+        await seed(engine, args.series, age)
+        calendar_service.occurrences = occurrences
+        lazy_time, lazy_peak, total = await measure(engine)
+        calendar_service.occurrences = full_expansion
+        full_time, full_peak, full_total = await measure(engine)
+        assert total == full_total
+        print(
+            f"{age:>4} {args.series * age * 12:>10} {total:>6}"
+            f" {lazy_time * 1000:>11.1f} {lazy_peak / 2**20:>9.1f}"
+            f" {full_time * 1000:>9.1f} {full_peak / 2**20:>9.1f}"
+        )
+    calendar_service.occurrences = occurrences
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
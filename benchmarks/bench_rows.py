@@ -0,0 +1,129 @@
+"""
+Календарь на 10 000 задач: ORM-объекты против TaskRecord.
+
+Создает временную SQLite-базу с N задачами в одном месяце и сравнивает
+загрузку месяца через select(Task) (как было) и через строки TASK_COLUMNS
+в TaskRecord с заранее собранным запросом (get_month_calendar без кэша):
+время загрузки, время вместе с сериализацией ответа и пик памяти:
+
+    PYTHONPATH=. python benchmarks/bench_rows.py --rows 10000
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from sqlalchemy import and_, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.models import Base, Task, TaskPriority
+from app.schemas.calendar import MonthCalendar
+from app.services.calendar_service import CalendarService
+from app.utils.cache import result_cache
+from app.utils.serialization import PydanticJSONResponse
+
+REPEAT = 10
+FIELD = create_response_field("response", MonthCalendar)
+PRIORITIES = list(TaskPriority)
+
+
+async def seed(engine, rows: int) -> None:
+    start = datetime(2024, 12, 1)
+    step = 30 * 24 * 3600 // rows
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(
+            insert(Task),
+            [
+                {
+                    "title": f"Задача {i}",
+                    "description": "Описание задачи",
+                    "priority": PRIORITIES[i % 4],
+                    "due_date": start + timedelta(seconds=i * step),
+                }
+                for i in range(rows)
+            ],
+        )
+
+
+async def orm_month(db: AsyncSession) -> dict:
+    # загрузка месяца до перехода на строки колонок
+    first_day, last_day = date(2024, 12, 1), date(2024, 12, 31)
+    query = (
+        select(Task)
+        .where(and_(Task.due_date >= first_day, Task.due_date <= last_day))
+        .order_by(Task.due_date.asc())
+    )
+    tasks = (await db.execute(query)).scalars().all()
+    days = {}
+    for task in tasks:
+        days.setdefault(task.due_date.date().isoformat(), []).append(task)
+    return {"year": 2024, "month": 12, "days": days, "total_tasks": len(tasks)}
+
+
+async def rows_month(db: AsyncSession) -> dict:
+    return await CalendarService(db).get_month_calendar(2024, 12)
+
+
+async def run(engine, load, serialize: bool) -> None:
+    # новая сессия на каждый прогон: identity map не переживает запрос
+    async with AsyncSession(engine) as db:
+        calendar = await load(db)
+        if serialize:
+            content = await serialize_response(
+                field=FIELD, response_content=calendar, is_coroutine=True
+            )
+            PydanticJSONResponse(content)
+        assert calendar["total_tasks"]
+
+
+async def measure(engine, load, serialize: bool) -> tuple[float, float]:
+    timings = []
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        await run(engine, load, serialize)
+        timings.append(time.perf_counter() - started)
+    # память отдельным прогоном: tracemalloc сильно замедляет выполнение
+    tracemalloc.start()
+    await run(engine, load, serialize)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return statistics.median(timings), peak
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10_000)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    await seed(engine, args.rows)
+    result_cache.max_entries = 0
+
+    print(
+        f"{'path':>12} {'load, ms':>9} {'peak, MB':>9}"
+        f" {'+json, ms':>10} {'peak, MB':>9}"
+    )
+    for name, load in (("select(Task)", orm_month), ("TaskRecord", rows_month)):
+        # прогрев: кэш скомпилированного SQL, схемы pydantic
+        await measure(engine, load, serialize=True)
+        load_time, load_peak = await measure(engine, load, serialize=False)
+        full_time, full_peak = await measure(engine, load, serialize=True)
+        print(
+            f"{name:>12} {load_time * 1000:>9.1f} {load_peak / 2**20:>9.1f}"
+            f" {full_time * 1000:>10.1f} {full_peak / 2**20:>9.1f}"
+        )
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,107 @@
+"""
+Латентность полнотекстового поиска задач на большой таблице.
+
+Создает временную SQLite-базу с N задачами (FTS5-индекс заполняется
+триггерами) и замеряет ранжированный поиск и фильтр списка задач:
+
+    PYTHONPATH=. python benchmarks/bench_search.py --rows 1000000
+"""
+
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.models import Base, Task, TaskPriority, TaskStatus
+from app.services.task_service import TaskService
+from app.utils.cache import result_cache
+
+CHUNK = 50_000
+SYLLABLES = "ка ли мо ре ту на со ви ды пе ро за ми ла ко де шу ба".split()
+
+
+def vocabulary(rng: random.Random, size: int) -> list[str]:
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))))
+    return sorted(words)
+
+
+def sentence(rng: random.Random, words: list[str], cum_weights, count: int) -> str:
+    # частоты слов по закону Ципфа, как в естественном тексте
+    return " ".join(rng.choices(words, cum_weights=cum_weights, k=count))
+
+
+async def seed(engine, rows: int, words: list[str]) -> None:
+    rng = random.Random(42)
+    weights = list(itertools.accumulate(1 / rank for rank in range(1, len(words) + 1)))
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        for offset in range(0, rows, CHUNK):
+            await conn.execute(
+                insert(Task),
+                [
+                    {
+                        "title": sentence(rng, words, weights, 4),
+                        "description": sentence(rng, words, weights, 25),
+                        "status": TaskStatus.PENDING,
+                        "priority": TaskPriority.MEDIUM,
+                    }
+                    for _ in range(offset, min(offset + CHUNK, rows))
+                ],
+            )
+
+
+async def timed(coro_factory, repeats: int) -> float:
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        await coro_factory()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    words = vocabulary(random.Random(7), 20_000)
+    started = time.perf_counter()
+    await seed(engine, args.rows, words)
+    print(f"seeded {args.rows} rows in {time.perf_counter() - started:.1f} s")
+
+    # слова разной частоты (по рангу в словаре), их префиксы и пары слов
+    queries = [words[r] for r in (50, 500, 5_000)]
+    queries += [words[500][:4], f"{words[500]} {words[5_000]}"]
+
+    print(f"{'query':>20} {'matches':>8} {'search, ms':>11} {'list, ms':>9}")
+    # замеряем запросы к БД, а не кэш результатов
+    result_cache.max_entries = 0
+    async with AsyncSession(engine) as db:
+        service = TaskService(db)
+        for q in queries:
+            _, matches, _ = await service.get_tasks(search=q, limit=1)
+            search_ms = await timed(lambda q=q: service.search_tasks(q), args.repeats)
+            list_ms = await timed(
+                lambda q=q: service.get_tasks(search=q, limit=20, total_mode="none"),
+                args.repeats,
+            )
+            db.expunge_all()
+            print(f"{q:>20} {matches:>8} {search_ms:>11.2f} {list_ms:>9.2f}")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,99 @@
+"""
+Сериализация ответа с 10 000 задач: старый путь против response_model.
+
+Без БД и HTTP: через serialize_response FastAPI прогоняются те же данные,
+что возвращают маршруты, и измеряется время до готовых байтов тела:
+
+    PYTHONPATH=. python benchmarks/bench_serialization.py --tasks 10000
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.models import Task, TaskPriority, TaskStatus
+from app.schemas.calendar import MonthCalendar
+from app.schemas.task import TaskList, TaskResponse
+from app.utils.serialization import PydanticJSONResponse
+
+REPEAT = 5
+
+
+def make_tasks(count: int) -> list[Task]:
+    start = datetime(2024, 12, 1)
+    return [
+        Task(
+            id=i,
+            title=f"Задача {i}",
+            description="Описание задачи",
+            status=TaskStatus.PENDING,
+            priority=TaskPriority.HIGH,
+            due_date=start + timedelta(minutes=i),
+            created_at=start,
+            updated_at=None,
+            category_id=1,
+            parent_id=None,
+        )
+        for i in range(count)
+    ]
+
+
+async def render(content, response_model=None, response_class=JSONResponse) -> bytes:
+    field = (
+        create_response_field("response", response_model) if response_model else None
+    )
+    serialized = await serialize_response(
+        field=field, response_content=content, is_coroutine=True
+    )
+    return response_class(serialized).body
+
+
+async def measure(build) -> tuple[float, int]:
+    started = time.perf_counter()
+    for _ in range(REPEAT):
+        body = await build()
+    return (time.perf_counter() - started) / REPEAT, len(body)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=10_000)
+    args = parser.parse_args()
+
+    tasks = make_tasks(args.tasks)
+    page = {"total": len(tasks), "next_cursor": None, "has_more": False}
+    days = {}
+    for task in tasks:
+        days.setdefault(task.due_date.date().isoformat(), []).append(task)
+    month = {"year": 2024, "month": 12, "days": days, "total_tasks": len(tasks)}
+
+    cases = [
+        (
+            "list: model_validate + jsonable_encoder",
+            lambda: render(
+                {"tasks": [TaskResponse.model_validate(t) for t in tasks], **page}
+            ),
+        ),
+        (
+            "list: response_model",
+            lambda: render({"tasks": tasks, **page}, TaskList, PydanticJSONResponse),
+        ),
+        ("calendar: ORM + jsonable_encoder", lambda: render(month)),
+        (
+            "calendar: response_model",
+            lambda: render(month, MonthCalendar, PydanticJSONResponse),
+        ),
+    ]
+    print(f"{'path':>42} {'ms':>8} {'MB':>6}")
+    for name, build in cases:
+        elapsed, size = await measure(build)
+        print(f"{name:>42} {elapsed * 1000:>8.1f} {size / 2**20:>6.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
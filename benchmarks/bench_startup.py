@@ -0,0 +1,85 @@
+"""
+Холодный старт воркера: импорт app.main и время до первого ответа.
+
+Создает временную SQLite-базу, применяет к ней миграции и несколько раз
+запускает uvicorn, замеряя время от запуска процесса до первого ответа
+/health 200:
+
+    PYTHONPATH=. python benchmarks/bench_startup.py --runs 10
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+IMPORT = (
+    "import time; started = time.perf_counter(); import app.main;"
+    " print(time.perf_counter() - started)"
+)
+
+
+def first_response(env: dict, port: int) -> float:
+    # клиент создается заранее: новый httpx.Client на каждую попытку
+    # стоит десятки миллисекунд CPU, которые отнимаются у сервера
+    client = httpx.Client()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port)],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while True:
+            try:
+                response = client.get(f"http://127.0.0.1:{port}/health")
+                if response.status_code == 200:
+                    return time.perf_counter() - started
+            except httpx.HTTPError:
+                pass
+            if server.poll() is not None:
+                raise RuntimeError("uvicorn exited")
+            time.sleep(0.005)
+    finally:
+        client.close()
+        server.terminate()
+        server.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    url = f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/bench.db"
+    env = {**os.environ, "DATABASE_URL": url}
+    subprocess.run(
+        [sys.executable, "-m", "alembic", "upgrade", "head"],
+        env=env,
+        check=True,
+        capture_output=True,
+    )
+
+    imports = [
+        float(subprocess.check_output([sys.executable, "-c", IMPORT], env=env))
+        for _ in range(args.runs)
+    ]
+    starts = [first_response(env, args.port) for _ in range(args.runs)]
+
+    print(f"{'':>16} {'median, ms':>10} {'max, ms':>8}")
+    for name, values in (("import app.main", imports), ("first response", starts)):
+        print(
+            f"{name:>16} {statistics.median(values) * 1000:>10.0f}"
+            f" {max(values) * 1000:>8.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
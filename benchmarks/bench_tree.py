@@ -0,0 +1,91 @@
+"""
+Дерево подзадач: рекурсивный CTE против обхода по уровням.
+
+Создает временную SQLite-базу с деревьями около 10 000 узлов разной формы
+и сравнивает get_task_tree с обходом через get_subtasks (запрос на узел):
+
+    PYTHONPATH=. python benchmarks/bench_tree.py
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.models import Base, Task, TaskStatus
+from app.services.task_service import TaskService
+
+# (ветвление, глубина): 11 111, 16 383 и 10 000 узлов
+SHAPES = [(10, 4), (2, 13), (10_000, 1)]
+
+
+async def seed(db: AsyncSession, branching: int, depth: int) -> int:
+    root = await db.scalar(insert(Task).values(title="Корень").returning(Task.id))
+    level = [root]
+    for _ in range(depth):
+        rows = [
+            {
+                "title": f"Подзадача {parent}.{i}",
+                "parent_id": parent,
+                "status": TaskStatus.COMPLETED if i % 3 == 0 else TaskStatus.PENDING,
+            }
+            for parent in level
+            for i in range(branching)
+        ]
+        result = await db.scalars(insert(Task).returning(Task.id), rows)
+        level = result.all()
+    await db.commit()
+    return root
+
+
+async def walk(service: TaskService, task_id: int) -> int:
+    # как раньше: по запросу на каждый узел
+    count = 0
+    level = [task_id]
+    while level:
+        next_level = []
+        for parent in level:
+            next_level += [task.id for task in await service.get_subtasks(parent)]
+        count += len(next_level)
+        level = next_level
+    return count
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    print(f"{'shape':>10} {'nodes':>7} {'walk, ms':>9} {'tree, ms':>9}")
+    async with AsyncSession(engine, expire_on_commit=False) as db:
+        service = TaskService(db)
+        for branching, depth in SHAPES:
+            root = await seed(db, branching, depth)
+
+            started = time.perf_counter()
+            nodes = await walk(service, root)
+            walked = time.perf_counter() - started
+            db.expunge_all()
+
+            started = time.perf_counter()
+            tree = await service.get_task_tree(root, max_depth=100)
+            built = time.perf_counter() - started
+            db.expunge_all()
+            assert tree.descendant_count == nodes
+
+            shape = f"{branching}^{depth}"
+            print(f"{shape:>10} {nodes:>7} {walked * 1000:>9.0f} {built * 1000:>9.0f}")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,99 @@
+"""
+Запись задач конкурентными клиентами: настройки SQLite по умолчанию против
+create_engine_from_settings (WAL, synchronous=NORMAL, пул, busy_timeout).
+
+Каждый клиент в своей сессии создает задачи через create_task, пока не
+истечет время; параллельно читатели листают /tasks через get_tasks:
+
+    PYTHONPATH=. python benchmarks/bench_writes.py --clients 1 4 16 64
+"""
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.config import Settings
+from app.db.database import create_engine_from_settings
+from app.models import Base
+from app.schemas.task import TaskCreate
+from app.services.task_service import TaskService
+
+TASK = TaskCreate(title="Задача", priority="high", due_date="2024-12-02T10:00")
+
+
+async def writer(engine, deadline: float, latencies: list, errors: list) -> None:
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            async with AsyncSession(engine, expire_on_commit=False) as db:
+                await TaskService(db).create_task(TASK)
+        except OperationalError:
+            errors.append(1)
+            continue
+        latencies.append(time.perf_counter() - started)
+
+
+async def reader(engine, deadline: float, reads: list) -> None:
+    while time.perf_counter() < deadline:
+        try:
+            async with AsyncSession(engine) as db:
+                await TaskService(db).get_tasks(limit=50)
+        except OperationalError:
+            continue
+        reads.append(1)
+
+
+async def run(engine, clients: int, readers: int, seconds: float) -> dict:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    latencies, errors, reads = [], [], []
+    deadline = time.perf_counter() + seconds
+    await asyncio.gather(
+        *(writer(engine, deadline, latencies, errors) for _ in range(clients)),
+        *(reader(engine, deadline, reads) for _ in range(readers)),
+    )
+    await engine.dispose()
+    latencies.sort()
+    return {
+        "writes": len(latencies) / seconds,
+        "errors": len(errors),
+        "reads": len(reads) / seconds,
+        "p50": statistics.median(latencies) * 1000 if latencies else 0,
+        "p99": latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0,
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    print(
+        f"{'engine':>9} {'clients':>7} {'writes/s':>9} {'errors':>7}"
+        f" {'reads/s':>8} {'p50, ms':>8} {'p99, ms':>8}"
+    )
+    for clients in args.clients:
+        for name in ("default", "settings"):
+            url = f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/bench.db"
+            if name == "default":
+                engine = create_async_engine(url)
+            else:
+                settings = Settings(_env_file=None, database_url=url)
+                engine = create_engine_from_settings(settings)
+            result = await run(engine, clients, args.readers, args.seconds)
+            print(
+                f"{name:>9} {clients:>7} {result['writes']:>9.0f}"
+                f" {result['errors']:>7} {result['reads']:>8.0f}"
+                f" {result['p50']:>8.1f} {result['p99']:>8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,105 @@
+"""initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 19:18:43.892253
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0001"
+down_revision: str | None = None
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+OPEN_TASKS = sa.text("status NOT IN ('COMPLETED', 'CANCELLED')")
+
+
+def upgrade() -> None:
+    op.create_table(
+        "categories",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(length=100), nullable=False),
+        sa.Column("color", sa.String(length=7), nullable=True),
+        sa.Column("icon", sa.String(length=50), nullable=True),
+        sa.Column("description", sa.String(length=500), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=True,
+        ),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("name"),
+    )
+    op.create_index("ix_categories_id", "categories", ["id"])
+    op.create_index("ix_categories_created_at_id", "categories", ["created_at", "id"])
+
+    op.create_table(
+        "tasks",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("title", sa.String(length=200), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column(
+            "status",
+            sa.Enum(
+                "PENDING", "IN_PROGRESS", "COMPLETED", "CANCELLED", name="taskstatus"
+            ),
+            nullable=False,
+        ),
+        sa.Column(
+            "priority",
+            sa.Enum("LOW", "MEDIUM", "HIGH", "URGENT", name="taskpriority"),
+            nullable=False,
+        ),
+        sa.Column("due_date", sa.DateTime(timezone=True), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=True,
+        ),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("category_id", sa.Integer(), nullable=True),
+        sa.Column("parent_id", sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(
+            ["category_id"], ["categories.id"], ondelete="SET NULL"
+        ),
+        sa.ForeignKeyConstraint(["parent_id"], ["tasks.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_tasks_id", "tasks", ["id"])
+    # keyset-пагинация по каждому полю сортировки списка задач
+    op.create_index("ix_tasks_title_id", "tasks", ["title", "id"])
+    op.create_index("ix_tasks_status_id", "tasks", ["status", "id"])
+    op.create_index("ix_tasks_priority_id", "tasks", ["priority", "id"])
+    op.create_index("ix_tasks_due_date_id", "tasks", ["due_date", "id"])
+    op.create_index("ix_tasks_created_at_id", "tasks", ["created_at", "id"])
+    op.create_index("ix_tasks_updated_at_id", "tasks", ["updated_at", "id"])
+    # задачи категории и подзадачи
+    op.create_index(
+        "ix_tasks_category_id_created_at",
+        "tasks",
+        ["category_id", "created_at", "id"],
+    )
+    op.create_index("ix_tasks_parent_id", "tasks", ["parent_id"])
+    # просроченные и предстоящие задачи
+    op.create_index(
+        "ix_tasks_open_due_date",
+        "tasks",
+        ["due_date", "id"],
+        postgresql_where=OPEN_TASKS,
+        sqlite_where=OPEN_TASKS,
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("tasks")
+    op.drop_table("categories")
+    sa.Enum(name="taskpriority").drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name="taskstatus").drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,87 @@
+"""full-text search for tasks
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 19:40:12.118305
+
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+revision: str = "0002"
+down_revision: str | None = "0001"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+SQLITE_UPGRADE = (
+    """
+    CREATE VIRTUAL TABLE tasks_fts USING fts5(
+        title,
+        description,
+        content='tasks',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3 4'
+    )
+    """,
+    """
+    CREATE TRIGGER tasks_fts_insert AFTER INSERT ON tasks BEGIN
+        INSERT INTO tasks_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER tasks_fts_delete AFTER DELETE ON tasks BEGIN
+        INSERT INTO tasks_fts(tasks_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER tasks_fts_update
+    AFTER UPDATE OF title, description ON tasks BEGIN
+        INSERT INTO tasks_fts(tasks_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO tasks_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    # индексируем уже существующие задачи
+    "INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild')",
+)
+SQLITE_DOWNGRADE = (
+    "DROP TRIGGER tasks_fts_update",
+    "DROP TRIGGER tasks_fts_delete",
+    "DROP TRIGGER tasks_fts_insert",
+    "DROP TABLE tasks_fts",
+)
+
+POSTGRESQL_UPGRADE = (
+    """
+    ALTER TABLE tasks ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(title, '')), 'A')
+        || setweight(to_tsvector('simple', coalesce(description, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX ix_tasks_search_vector ON tasks USING gin (search_vector)",
+)
+POSTGRESQL_DOWNGRADE = (
+    "DROP INDEX ix_tasks_search_vector",
+    "ALTER TABLE tasks DROP COLUMN search_vector",
+)
+
+
+def upgrade() -> None:
+    dialect = op.get_context().dialect.name
+    statements = {"sqlite": SQLITE_UPGRADE, "postgresql": POSTGRESQL_UPGRADE}
+    for statement in statements.get(dialect, ()):
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    dialect = op.get_context().dialect.name
+    statements = {"sqlite": SQLITE_DOWNGRADE, "postgresql": POSTGRESQL_DOWNGRADE}
+    for statement in statements.get(dialect, ()):
+        op.execute(statement)
@@ -0,0 +1,40 @@
+"""data versions for conditional requests
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 20:05:41.530112
+
+"""
+
+from collections.abc import Sequence
+from datetime import UTC, datetime
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0003"
+down_revision: str | None = "0002"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    data_versions = op.create_table(
+        "data_versions",
+        sa.Column("scope", sa.String(length=20), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("scope"),
+    )
+    now = datetime.now(UTC)
+    op.bulk_insert(
+        data_versions,
+        [
+            {"scope": "tasks", "version": 0, "updated_at": now},
+            {"scope": "categories", "version": 0, "updated_at": now},
+        ],
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("data_versions")
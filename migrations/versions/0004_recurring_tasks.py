@@ -0,0 +1,79 @@
+"""recurring tasks
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 20:41:48.386187
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision: str = "0004"
+down_revision: str | None = "0003"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # типы taskstatus и taskpriority в PostgreSQL уже созданы миграцией 0001
+    op.create_table(
+        "task_occurrences",
+        sa.Column("task_id", sa.Integer(), nullable=False),
+        sa.Column("occurrence", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("title", sa.String(length=200), nullable=True),
+        sa.Column(
+            "status",
+            postgresql.ENUM(
+                "PENDING",
+                "IN_PROGRESS",
+                "COMPLETED",
+                "CANCELLED",
+                name="taskstatus",
+                create_type=False,
+            ),
+            nullable=True,
+        ),
+        sa.Column(
+            "priority",
+            postgresql.ENUM(
+                "LOW",
+                "MEDIUM",
+                "HIGH",
+                "URGENT",
+                name="taskpriority",
+                create_type=False,
+            ),
+            nullable=True,
+        ),
+        sa.Column("due_date", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["task_id"], ["tasks.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("task_id", "occurrence"),
+    )
+    op.create_index("ix_task_occurrences_due_date", "task_occurrences", ["due_date"])
+
+    op.add_column(
+        "tasks", sa.Column("recurrence_rule", sa.String(length=500), nullable=True)
+    )
+    op.add_column(
+        "tasks", sa.Column("recurrence_end", sa.DateTime(timezone=True), nullable=True)
+    )
+    op.create_index(
+        "ix_tasks_recurring_due_date",
+        "tasks",
+        ["due_date"],
+        postgresql_where=sa.text("recurrence_rule IS NOT NULL"),
+        sqlite_where=sa.text("recurrence_rule IS NOT NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_tasks_recurring_due_date", table_name="tasks")
+    # без batch: пересоздание tasks в SQLite удалило бы триггеры FTS5
+    op.drop_column("tasks", "recurrence_end")
+    op.drop_column("tasks", "recurrence_rule")
+    op.drop_index("ix_task_occurrences_due_date", table_name="task_occurrences")
+    op.drop_table("task_occurrences")
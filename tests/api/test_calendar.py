@@ -1,6 +1,12 @@
+import asyncio
+from datetime import date, datetime, timedelta
+
 from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.main import app
+from app.services.calendar_service import CalendarService
+from app.services.task_service import TaskService
 
 
 def test_get_month_calendar(test_db):
@@ -31,3 +37,310 @@ def test_get_overdue_tasks(test_db):
         data = response.json()
         assert "tasks" in data
         assert "total_overdue" in data
+
+
+def test_get_overdue_tasks_cursor_pagination(test_db):
+    with TestClient(app) as client:
+        for i in range(5):
+            client.post(
+                "/tasks",
+                json={
+                    "title": f"Overdue {i}",
+                    "due_date": f"2024-01-0{i % 2 + 1}T09:00",
+                },
+            )
+        client.post("/tasks", json={"title": "Done", "status": "completed"})
+
+        ids = []
+        cursor = None
+        for _ in range(5):
+            url = "/calendar/overdue?limit=2" + (f"&cursor={cursor}" if cursor else "")
+            page = client.get(url).json()
+            ids.extend(t["id"] for t in page["tasks"])
+            cursor = page["next_cursor"]
+            if not cursor:
+                break
+
+        assert cursor is None
+        assert ids == [1, 3, 5, 2, 4]
+
+
+def test_calendar_range_and_stats_buckets(test_db):
+    with TestClient(app) as client:
+        for due in ("2024-01-30T09:00", "2024-02-01T10:00", "2024-02-01T08:00"):
+            client.post("/tasks", json={"title": f"Task {due}", "due_date": due})
+        client.put("/tasks/2", json={"status": "completed"})
+
+    async def views():
+        async with AsyncSession(test_db) as db:
+            service = CalendarService(db)
+            return (
+                await service.get_calendar_range(
+                    date(2024, 1, 29), date(2024, 2, 10), "day"
+                ),
+                await service.get_calendar_range(
+                    date(2024, 1, 29), date(2024, 2, 10), "week"
+                ),
+                await service.get_calendar_range(
+                    date(2024, 1, 29), date(2024, 2, 10), "month"
+                ),
+                await service.get_calendar_stats(date.today(), date.today()),
+            )
+
+    by_day, by_week, by_month, stats = asyncio.run(views())
+
+    assert len(by_day["groups"]) == 13
+    assert [t.id for t in by_day["groups"][1]["tasks"]] == [1]
+    assert [t.id for t in by_day["groups"][3]["tasks"]] == [3, 2]
+    assert [
+        (g["week_start"], g["week_end"], g["count"]) for g in by_week["groups"]
+    ] == [
+        ("2024-01-29", "2024-02-04", 3),
+        ("2024-02-05", "2024-02-10", 0),
+    ]
+    assert [(g["month"], g["count"]) for g in by_month["groups"]] == [
+        ("2024-01", 1),
+        ("2024-02", 2),
+    ]
+    assert stats["daily_stats"] == [
+        {"date": date.today().isoformat(), "created": 3, "completed": 1}
+    ]
+    assert stats["summary"]["completion_rate"] == 33.33
+
+
+def test_get_heatmap(test_db):
+    with TestClient(app) as client:
+        for due, priority in (
+            ("2024-01-30T09:00", "high"),
+            ("2024-01-30T18:00", "low"),
+            ("2024-02-01T10:00", "high"),
+        ):
+            client.post(
+                "/tasks", json={"title": due, "due_date": due, "priority": priority}
+            )
+        client.put("/tasks/2", json={"status": "completed"})
+
+        response = client.get(
+            "/calendar/heatmap?start_date=2024-01-01&end_date=2024-12-31"
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total_tasks"] == 3
+        assert data["days"] == [
+            {
+                "date": "2024-01-30",
+                "count": 2,
+                "by_status": {"pending": 1, "completed": 1},
+                "by_priority": {"high": 1, "low": 1},
+            },
+            {
+                "date": "2024-02-01",
+                "count": 1,
+                "by_status": {"pending": 1},
+                "by_priority": {"high": 1},
+            },
+        ]
+
+        reversed_range = "/calendar/heatmap?start_date=2024-02-01&end_date=2024-01-01"
+        assert client.get(reversed_range).status_code == 400
+        too_long = "/calendar/heatmap?start_date=2000-01-01&end_date=2024-01-01"
+        assert client.get(too_long).status_code == 400
+
+
+def test_recurring_task_occurrences(test_db):
+    with TestClient(app) as client:
+        client.post(
+            "/tasks",
+            json={
+                "title": "Standup",
+                "due_date": "2024-01-01T09:00",
+                "recurrence_rule": "FREQ=WEEKLY;BYDAY=MO,WE",
+            },
+        )
+        client.post("/tasks", json={"title": "Once", "due_date": "2024-12-03T12:00"})
+
+        week = client.get("/calendar/week?target_date=2024-12-02").json()
+        assert [
+            [(t["title"], t["due_date"], t["occurrence"]) for t in day["tasks"]]
+            for day in week["days"][:3]
+        ] == [
+            [("Standup", "2024-12-02T09:00:00", "2024-12-02T09:00:00")],
+            [("Once", "2024-12-03T12:00:00", None)],
+            [("Standup", "2024-12-04T09:00:00", "2024-12-04T09:00:00")],
+        ]
+        assert week["total_tasks"] == 3
+        # до начала серии повторений нет
+        assert (
+            client.get("/calendar/month?year=2023&month=12").json()["total_tasks"] == 0
+        )
+
+        # перенос повторения на другую неделю и выполнение другого
+        response = client.put(
+            "/tasks/1/occurrences/2024-12-02T09:00",
+            json={"due_date": "2024-12-10T15:00", "title": "Moved"},
+        )
+        assert response.status_code == 200
+        assert response.json()["due_date"] == "2024-12-10T15:00:00"
+        client.put(
+            "/tasks/1/occurrences/2024-12-04T09:00", json={"status": "completed"}
+        )
+
+        week = client.get("/calendar/week?target_date=2024-12-02").json()
+        assert [(t["title"], t["status"]) for t in week["days"][2]["tasks"]] == [
+            ("Standup", "completed")
+        ]
+        assert week["days"][0]["tasks"] == []
+        day = client.get("/calendar/day?target_date=2024-12-10").json()
+        assert [(t["title"], t["occurrence"]) for t in day["tasks"]] == [
+            ("Moved", "2024-12-02T09:00:00")
+        ]
+
+        assert client.delete("/tasks/1/occurrences/2024-12-02T09:00").status_code == 200
+        day = client.get("/calendar/day?target_date=2024-12-10").json()
+        assert day["tasks"] == []
+
+        # не повторение серии и не серия
+        assert (
+            client.put(
+                "/tasks/1/occurrences/2024-12-03T09:00", json={"title": "x"}
+            ).status_code
+            == 404
+        )
+        assert (
+            client.put(
+                "/tasks/2/occurrences/2024-12-03T12:00", json={"title": "x"}
+            ).status_code
+            == 404
+        )
+        assert client.delete("/tasks/1/occurrences/2024-12-02T09:00").status_code == 404
+
+
+def test_recurring_tasks_in_heatmap(test_db):
+    with TestClient(app) as client:
+        client.post(
+            "/tasks",
+            json={
+                "title": "Daily",
+                "due_date": "2024-01-01T09:00",
+                "recurrence_rule": "FREQ=DAILY",
+                "priority": "high",
+            },
+        )
+        client.post("/tasks", json={"title": "Once", "due_date": "2024-01-02T12:00"})
+        client.put(
+            "/tasks/1/occurrences/2024-01-02T09:00", json={"status": "completed"}
+        )
+        # перенесенное в январь февральское повторение
+        client.put(
+            "/tasks/1/occurrences/2024-02-01T09:00",
+            json={"due_date": "2024-01-31T18:00"},
+        )
+
+        month = client.get("/calendar/month?year=2024&month=1").json()
+        heatmap = client.get(
+            "/calendar/heatmap?start_date=2024-01-01&end_date=2024-01-31"
+        ).json()
+        assert heatmap["total_tasks"] == month["total_tasks"] == 33
+        days = {day["date"]: day for day in heatmap["days"]}
+        assert len(days) == 31
+        assert days["2024-01-02"] == {
+            "date": "2024-01-02",
+            "count": 2,
+            "by_status": {"completed": 1, "pending": 1},
+            "by_priority": {"high": 1, "medium": 1},
+        }
+        assert days["2024-01-31"]["count"] == 2
+
+
+def test_recurring_tasks_in_overdue_and_upcoming(test_db):
+    now = datetime.now().replace(microsecond=0)
+    with TestClient(app) as client:
+        # ежедневная серия началась 10 дней назад, на час раньше текущего времени
+        client.post(
+            "/tasks",
+            json={
+                "title": "Daily",
+                "due_date": (now - timedelta(days=10, hours=1)).isoformat(),
+                "recurrence_rule": "FREQ=DAILY",
+            },
+        )
+        for days in (-2, 1):
+            client.post(
+                "/tasks",
+                json={"title": "Once", "due_date": (now + timedelta(days)).isoformat()},
+            )
+
+        # у серии просрочено только последнее наступившее повторение
+        overdue = client.get("/calendar/overdue").json()
+        latest = (now - timedelta(hours=1)).isoformat()
+        assert [(t["id"], t["occurrence"]) for t in overdue["tasks"]] == [
+            (2, None),
+            (1, latest),
+        ]
+        assert overdue["total_overdue"] == 2
+        first = client.get("/calendar/overdue?limit=1").json()
+        assert [t["id"] for t in first["tasks"]] == [2]
+        cursor = first["next_cursor"]
+        second = client.get(f"/calendar/overdue?limit=1&cursor={cursor}").json()
+        assert ([t["id"] for t in second["tasks"]], second["has_more"]) == ([1], False)
+        skipped = client.get("/calendar/overdue?skip=1&limit=1").json()
+        assert [t["id"] for t in skipped["tasks"]] == [1]
+
+        async def upcoming():
+            async with AsyncSession(test_db) as db:
+                tasks = await TaskService(db).get_upcoming_tasks(days=3)
+                return [(task.id, task.due_date) for task in tasks]
+
+        assert asyncio.run(upcoming()) == [
+            (1, now + timedelta(hours=23)),
+            (3, now + timedelta(days=1)),
+            (1, now + timedelta(days=1, hours=23)),
+            (1, now + timedelta(days=2, hours=23)),
+        ]
+
+        # выполненное повторение больше не просрочено и не предстоит
+        client.put(f"/tasks/1/occurrences/{latest}", json={"status": "completed"})
+        client.put(
+            f"/tasks/1/occurrences/{(now + timedelta(hours=23)).isoformat()}",
+            json={"status": "completed"},
+        )
+        overdue = client.get("/calendar/overdue").json()
+        assert ([t["id"] for t in overdue["tasks"]], overdue["total_overdue"]) == (
+            [2],
+            1,
+        )
+        assert [task_id for task_id, _ in asyncio.run(upcoming())] == [3, 1, 1]
+
+
+def test_recurring_task_validation(test_db):
+    with TestClient(app) as client:
+        for body in (
+            {"title": "No date", "recurrence_rule": "FREQ=DAILY"},
+            {"title": "Bad", "due_date": "2024-01-01", "recurrence_rule": "FREQ=OFTEN"},
+            {
+                "title": "Hourly",
+                "due_date": "2024-01-01",
+                "recurrence_rule": "FREQ=HOURLY",
+            },
+        ):
+            assert client.post("/tasks", json=body).status_code == 422
+
+        client.post(
+            "/tasks",
+            json={
+                "title": "Daily",
+                "due_date": "2024-01-01T09:00",
+                "recurrence_rule": "FREQ=DAILY;COUNT=3",
+            },
+        )
+        response = client.put("/tasks/1", json={"due_date": None})
+        assert response.status_code == 422
+
+        month = client.get("/calendar/month?year=2024&month=1").json()
+        assert month["total_tasks"] == 3
+        # новое правило сбрасывает кэш календаря и изменения повторений
+        client.put("/tasks/1/occurrences/2024-01-02T09:00", json={"title": "Moved"})
+        client.put("/tasks/1", json={"recurrence_rule": "FREQ=DAILY;COUNT=5"})
+        month = client.get("/calendar/month?year=2024&month=1").json()
+        assert month["total_tasks"] == 5
+        assert {t["title"] for day in month["days"].values() for t in day} == {"Daily"}
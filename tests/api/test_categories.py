@@ -74,3 +74,93 @@ def test_delete_category(test_db):
         assert response.status_code == 200
         data = response.json()
         assert data["deleted"] is True
+
+
+def test_get_categories_cursor_pagination(test_db):
+    with TestClient(app) as client:
+        for i in range(5):
+            client.post("/categories", json={"name": f"Category {i}"})
+
+        ids = []
+        cursor = None
+        for _ in range(5):
+            url = "/categories?limit=2" + (f"&cursor={cursor}" if cursor else "")
+            page = client.get(url).json()
+            ids.extend(c["id"] for c in page["categories"])
+            cursor = page["next_cursor"]
+            if not cursor:
+                break
+
+        assert cursor is None
+        assert ids == [5, 4, 3, 2, 1]
+
+
+def test_get_categories_total_modes(test_db):
+    with TestClient(app) as client:
+        for i in range(2):
+            client.post("/categories", json={"name": f"Category {i}"})
+
+        assert client.get("/categories?total=none").json()["total"] is None
+        assert client.get("/categories?total=estimate").json()["total"] == 2
+
+        category_id = client.get("/categories").json()["categories"][0]["id"]
+        client.delete(f"/categories/{category_id}")
+        assert client.get("/categories?total=estimate").json()["total"] == 1
+
+
+def test_category_stats(test_db):
+    with TestClient(app) as client:
+        client.post("/categories", json={"name": "Work"})
+        client.post("/categories", json={"name": "Empty"})
+        for priority in ("high", "high", "low"):
+            client.post(
+                "/tasks", json={"title": "Task", "priority": priority, "category_id": 1}
+            )
+        client.put("/tasks/1", json={"status": "completed"})
+        client.post("/tasks", json={"title": "No category"})
+
+        response = client.get("/categories/1/stats")
+        assert response.status_code == 200
+        work = response.json()
+        assert work == {
+            "category_id": 1,
+            "total_tasks": 3,
+            "by_status": {
+                "pending": 2,
+                "in_progress": 0,
+                "completed": 1,
+                "cancelled": 0,
+            },
+            "by_priority": {"low": 1, "medium": 0, "high": 2, "urgent": 0},
+        }
+
+        response = client.get("/categories/stats")
+        assert response.status_code == 200
+        stats = response.json()["categories"]
+        assert [s["category_id"] for s in stats] == [1, 2]
+        assert stats[0] == work
+        assert stats[1]["total_tasks"] == 0
+
+        assert client.get("/categories/999/stats").status_code == 404
+
+
+def test_delete_category_keeps_tasks(test_db):
+    with TestClient(app) as client:
+        client.post("/categories", json={"name": "Old"})
+        client.post("/categories", json={"name": "New"})
+        for _ in range(3):
+            client.post("/tasks", json={"title": "Task", "category_id": 1})
+        assert client.get("/tasks?category_id=1").json()["total"] == 3
+
+        assert client.delete("/categories/1?reassign_to=1").status_code == 400
+        assert client.delete("/categories/1?reassign_to=99").status_code == 400
+
+        assert client.delete("/categories/1?reassign_to=2").status_code == 200
+        assert client.get("/tasks?category_id=2").json()["total"] == 3
+        assert client.get("/tasks?category_id=1").json()["total"] == 0
+
+        assert client.delete("/categories/2").status_code == 200
+        tasks = client.get("/tasks").json()["tasks"]
+        assert [task["category_id"] for task in tasks] == [None, None, None]
+        assert client.get("/categories").json()["total"] == 0
+        assert client.delete("/categories/2").status_code == 404
@@ -1,3 +1,8 @@
+import base64
+import csv
+import io
+import json
+
 from fastapi.testclient import TestClient
 
 from app.main import app
@@ -84,3 +89,361 @@ def test_delete_task(test_db):
 
         get_response = client.get(f"/tasks/{task_id}")
         assert get_response.status_code == 404
+
+
+def _walk_pages(client, url, params, key, max_pages=20):
+    ids = []
+    cursor = None
+    for _ in range(max_pages):
+        page_params = dict(params)
+        if cursor:
+            page_params["cursor"] = cursor
+        data = client.get(url, params=page_params).json()
+        ids.extend(item["id"] for item in data[key])
+        cursor = data["next_cursor"]
+        if not cursor:
+            return ids
+    raise AssertionError("pagination did not terminate")
+
+
+def test_get_tasks_cursor_pagination(test_db):
+    with TestClient(app) as client:
+        for i in range(8):
+            client.post(
+                "/tasks",
+                json={
+                    "title": f"Task {i % 3}",
+                    "priority": ["low", "high", "urgent"][i % 3],
+                    "due_date": None if i % 4 == 0 else f"2024-12-0{i % 2 + 1}T10:00",
+                },
+            )
+        tasks = client.get("/tasks?limit=100").json()["tasks"]
+
+        for sort_by in ("id", "title", "priority", "due_date", "created_at"):
+            for order in ("asc", "desc"):
+                present = [t for t in tasks if t[sort_by] is not None]
+                missing = [t for t in tasks if t[sort_by] is None]
+                present.sort(
+                    key=lambda t, f=sort_by: (str(t[f]).upper(), t["id"]),
+                    reverse=order == "desc",
+                )
+                missing.sort(key=lambda t: t["id"], reverse=order == "desc")
+                ordered = present + missing if order == "asc" else missing + present
+                expected = [t["id"] for t in ordered]
+
+                params = {"sort_by": sort_by, "order": order, "limit": 3}
+                assert _walk_pages(client, "/tasks", params, "tasks") == expected
+
+                offset_ids = []
+                for skip in range(0, 8, 3):
+                    page = client.get("/tasks", params={**params, "skip": skip}).json()
+                    offset_ids.extend(t["id"] for t in page["tasks"])
+                assert offset_ids == expected
+
+
+def test_get_tasks_no_cursor_on_last_page(test_db):
+    with TestClient(app) as client:
+        client.post("/tasks", json={"title": "Only"})
+        data = client.get("/tasks?limit=1").json()
+        assert len(data["tasks"]) == 1
+        assert data["next_cursor"] is None
+
+
+def test_get_tasks_invalid_cursor(test_db):
+    with TestClient(app) as client:
+        client.post("/tasks", json={"title": "A"})
+        client.post("/tasks", json={"title": "B"})
+        cursor = client.get("/tasks?limit=1").json()["next_cursor"]
+        wrong_type = (
+            base64.urlsafe_b64encode(b'["created_at","desc",5,1]').decode().rstrip("=")
+        )
+
+        assert client.get("/tasks?cursor=not-a-cursor").status_code == 400
+        assert client.get(f"/tasks?cursor={wrong_type}").status_code == 400
+        response = client.get(f"/tasks?cursor={cursor}&sort_by=title")
+        assert response.status_code == 400
+
+
+def test_get_tasks_total_modes(test_db):
+    with TestClient(app) as client:
+        for i in range(3):
+            client.post("/tasks", json={"title": f"Task {i}", "priority": "high"})
+
+        data = client.get("/tasks?limit=2&total=none").json()
+        assert data["total"] is None
+        assert data["has_more"] is True
+
+        assert client.get("/tasks?total=estimate").json()["total"] == 3
+        client.post("/tasks", json={"title": "Task 3"})
+        assert client.get("/tasks?total=estimate").json()["total"] == 4
+
+        data = client.get("/tasks?priority=high&total=estimate").json()
+        assert data["total"] == 3
+        assert data["has_more"] is False
+
+        assert client.get("/tasks?total=bogus").status_code == 422
+
+
+def test_search_tasks(test_db):
+    with TestClient(app) as client:
+        client.post(
+            "/tasks", json={"title": "Купить молоко", "description": "И хлеб тоже"}
+        )
+        client.post(
+            "/tasks",
+            json={"title": "Годовой отчет", "description": "Собрать данные"},
+        )
+        report = client.post(
+            "/tasks",
+            json={"title": "Созвон", "description": "Обсудить отчетность и молоко"},
+        ).json()
+
+        data = client.get("/tasks/search?q=отч").json()
+        assert [r["title"] for r in data["results"]] == ["Годовой отчет", "Созвон"]
+        assert data["results"][0]["rank"] >= data["results"][1]["rank"]
+        assert "<mark>отчет</mark>" in data["results"][0]["snippet"]
+
+        assert client.get("/tasks/search?q=молоко хлеб").json()["results"][0][
+            "title"
+        ] == ("Купить молоко")
+
+        client.put(f"/tasks/{report['id']}", json={"description": "Ничего"})
+        titles = [t["title"] for t in client.get("/tasks?search=отч").json()["tasks"]]
+        assert titles == ["Годовой отчет"]
+
+        client.delete(f"/tasks/{report['id']}")
+        assert client.get("/tasks/search?q=созвон").json()["results"] == []
+        assert client.get("/tasks/search?q=!!!").json()["results"] == []
+
+
+def test_bulk_create_tasks(test_db):
+    with TestClient(app) as client:
+        items = [
+            {"title": "First", "priority": "high"},
+            {"title": ""},
+            {"title": "Bad status", "status": "unknown"},
+            {"title": "No category", "category_id": 99},
+            {"title": "Last", "due_date": "2024-12-02T10:00:00"},
+        ]
+
+        response = client.post("/tasks/bulk", json={"items": items})
+        assert response.status_code == 422
+        errors = response.json()["detail"]["errors"]
+        assert [error["index"] for error in errors] == [1, 2, 3]
+        assert client.get("/tasks").json()["total"] == 0
+
+        etag = client.get("/tasks").headers["etag"]
+        response = client.post("/tasks/bulk?mode=partial", json={"items": items})
+        assert response.status_code == 207
+        data = response.json()
+        assert [task["title"] for task in data["created"]] == ["First", "Last"]
+        assert data["created"][0]["priority"] == "high"
+        assert data["created"][1]["created_at"]
+        assert [error["index"] for error in data["errors"]] == [1, 2, 3]
+
+        response = client.get("/tasks", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.json()["total"] == 2
+
+        response = client.post("/tasks/bulk", json={"items": [{"title": "Ok"}]})
+        assert response.status_code == 201
+        assert response.json()["errors"] == []
+
+
+def test_bulk_update_tasks(test_db):
+    with TestClient(app) as client:
+        for i in range(3):
+            client.post("/tasks", json={"title": f"Task {i}"})
+        assert client.get("/tasks?status=completed").json()["total"] == 0
+
+        items = [
+            {"id": 1, "status": "completed"},
+            {"id": 2, "status": "completed"},
+            {"id": 3, "title": "Renamed", "priority": "urgent"},
+            {"id": 42, "status": "completed"},
+        ]
+        response = client.patch("/tasks/bulk", json={"items": items})
+        assert response.status_code == 422
+        assert response.json()["detail"]["errors"][0]["index"] == 3
+
+        response = client.patch("/tasks/bulk?mode=partial", json={"items": items})
+        assert response.status_code == 207
+        updated = response.json()["updated"]
+        assert [task["id"] for task in updated] == [1, 2, 3]
+        assert updated[2]["title"] == "Renamed"
+        assert updated[2]["priority"] == "urgent"
+        assert updated[2]["updated_at"]
+        assert client.get("/tasks?status=completed").json()["total"] == 2
+
+
+def test_bulk_delete_tasks(test_db):
+    with TestClient(app) as client:
+        client.post("/tasks", json={"title": "Parent"})
+        client.post("/tasks", json={"title": "Child", "parent_id": 1})
+        client.post("/tasks", json={"title": "Other"})
+        assert client.get("/tasks").json()["total"] == 3
+
+        response = client.request("DELETE", "/tasks/bulk", json={"ids": [1, 7]})
+        assert response.status_code == 422
+        assert client.get("/tasks").json()["total"] == 3
+
+        response = client.request(
+            "DELETE", "/tasks/bulk?mode=partial", json={"ids": [1, 3, 7]}
+        )
+        assert response.status_code == 207
+        assert response.json()["deleted"] == [1, 3]
+        tasks = client.get("/tasks").json()["tasks"]
+        assert [(task["id"], task["parent_id"]) for task in tasks] == [(2, None)]
+
+
+def test_export_tasks(test_db):
+    with TestClient(app) as client:
+        client.post("/tasks", json={"title": "Отчет", "priority": "high"})
+        client.post(
+            "/tasks", json={"title": 'Say "hi", then', "due_date": "2024-12-02T10:00"}
+        )
+        client.post("/tasks", json={"title": "Low", "priority": "low"})
+        listed = client.get("/tasks?sort_by=id&order=asc").json()["tasks"]
+
+        response = client.get("/tasks/export")
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        lines = response.text.splitlines()
+        assert [json.loads(line) for line in lines] == listed
+
+        response = client.get("/tasks/export?format=csv&priority=high")
+        assert response.headers["content-type"] == "text/csv; charset=utf-8"
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        assert [row["title"] for row in rows] == ["Отчет"]
+        assert rows[0]["due_date"] == ""
+
+        response = client.get("/tasks/export?format=csv&search=hi")
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        assert [row["title"] for row in rows] == ['Say "hi", then']
+
+        response = client.get("/tasks/export?format=csv&status=cancelled")
+        assert response.text.splitlines() == [",".join(listed[0])]
+
+
+def test_import_tasks(test_db):
+    with TestClient(app) as client:
+        client.post("/categories", json={"name": "Работа"})
+        records = [
+            {"title": "A", "category": "Работа"},
+            {"title": "B", "category": "Дом", "priority": "high"},
+            {"title": ""},
+            {"title": "C", "parent_id": 99},
+            {"title": "D", "category_id": 1},
+        ]
+        body = "\n".join(json.dumps(r, ensure_ascii=False) for r in records)
+        body += "\nnot json"
+
+        # первая пачка из двух записей; дальше продолжаем с offset
+        response = client.post("/tasks/import?batch_size=2", content=body)
+        assert response.status_code == 200
+        report = response.json()
+        assert report["completed"] is True
+        assert report["offset"] == 6
+        assert report["inserted"] == 3
+        assert report["categories_created"] == 1
+        assert [e["offset"] for e in report["errors"]] == [2, 3, 5]
+
+        tasks = client.get("/tasks?sort_by=id&order=asc").json()["tasks"]
+        assert [(t["title"], t["category_id"]) for t in tasks] == [
+            ("A", 1),
+            ("B", 2),
+            ("D", 1),
+        ]
+
+        response = client.post("/tasks/import?offset=4", content=body)
+        assert response.json()["inserted"] == 1
+        assert client.get("/tasks").json()["total"] == 4
+
+
+def test_import_tasks_csv(test_db):
+    with TestClient(app) as client:
+        body = (
+            "title,description,priority,category\r\n"
+            'Отчет,"две\nстроки",high,Работа\r\n'
+            "Звонок,,,\r\n"
+            "лишняя,колонка,low,x,y\r\n"
+        )
+        response = client.post("/tasks/import?format=csv", content=body.encode())
+        report = response.json()
+        assert report["inserted"] == 2
+        assert report["skipped"] == 1
+
+        tasks = client.get("/tasks?sort_by=id&order=asc").json()["tasks"]
+        assert tasks[0]["description"] == "две\nстроки"
+        assert tasks[0]["priority"] == "high"
+        assert tasks[1]["category_id"] is None
+
+
+def test_import_skips_invalid_utf8(test_db):
+    with TestClient(app) as client:
+        body = b'{"title": "A"}\n{"title": "\xff\xfe"}\n{"title": "B"}'
+        report = client.post("/tasks/import", content=body).json()
+        assert (report["inserted"], report["skipped"]) == (2, 1)
+        assert report["errors"][0]["offset"] == 1
+        assert report["errors"][0]["errors"][0]["msg"] == "Invalid UTF-8"
+
+        body = "title\r\nВ\r\n".encode() + b"\xff\r\nC\r\n"
+        report = client.post("/tasks/import?format=csv", content=body).json()
+        assert (report["inserted"], report["skipped"]) == (2, 1)
+
+
+def test_task_tree(test_db):
+    with TestClient(app) as client:
+        client.post("/tasks", json={"title": "Корень"})
+        for title, parent_id in [("A", 1), ("B", 1), ("A1", 2), ("A2", 2), ("A1a", 4)]:
+            client.post("/tasks", json={"title": title, "parent_id": parent_id})
+        client.put("/tasks/4", json={"status": "completed"})
+        client.put("/tasks/3", json={"status": "completed"})
+
+        tree = client.get("/tasks/1/tree").json()
+        assert tree["title"] == "Корень"
+        assert (tree["descendant_count"], tree["completed_count"]) == (5, 2)
+        a, b = tree["subtasks"]
+        assert (a["title"], b["title"]) == ("A", "B")
+        assert (a["descendant_count"], a["completed_count"]) == (3, 1)
+        assert [t["title"] for t in a["subtasks"]] == ["A1", "A2"]
+        assert a["subtasks"][0]["subtasks"][0]["title"] == "A1a"
+
+        tree = client.get("/tasks/1/tree?max_depth=1").json()
+        assert tree["descendant_count"] == 2
+        a, b = tree["subtasks"]
+        assert (a["subtasks"], a["truncated"], b["truncated"]) == ([], True, False)
+
+        tree = client.get("/tasks/2/tree?max_depth=0").json()
+        assert (tree["subtasks"], tree["truncated"]) == ([], True)
+
+        assert client.get("/tasks/99/tree").status_code == 404
+
+
+def test_duplicate_task_deep(test_db):
+    with TestClient(app) as client:
+        client.post("/categories", json={"name": "Шаблоны"})
+        client.post("/tasks", json={"title": "Проект", "category_id": 1})
+        for title, parent_id in [("A", 1), ("B", 1), ("A1", 2)]:
+            client.post("/tasks", json={"title": title, "parent_id": parent_id})
+        client.put("/tasks/4", json={"status": "completed"})
+
+        response = client.post("/tasks/1/duplicate?deep=true")
+        assert response.status_code == 201
+        copy = response.json()
+        assert copy["id"] == 5
+        assert (copy["title"], copy["category_id"]) == ("Проект (копия)", 1)
+
+        tree = client.get("/tasks/5/tree").json()
+        assert tree["descendant_count"] == 3
+        assert tree["completed_count"] == 0
+        a, b = tree["subtasks"]
+        assert (a["title"], b["title"]) == ("A", "B")
+        assert [t["title"] for t in a["subtasks"]] == ["A1"]
+        assert a["parent_id"] == 5
+        assert a["subtasks"][0]["parent_id"] == a["id"]
+
+        # оригинал не изменился
+        assert client.get("/tasks/1/tree").json()["descendant_count"] == 3
+        assert client.get("/tasks").json()["total"] == 8
+        assert client.post("/tasks/99/duplicate?deep=true").status_code == 404
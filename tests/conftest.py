@@ -1,9 +1,13 @@
+import asyncio
+from collections import Counter
+from contextlib import contextmanager
+
 import pytest
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.pool import StaticPool
 
-from app.db.database import get_db
+from app.db.database import get_db, get_sessionmaker
 from app.main import app
 from app.models import Base  # импортируем все модели
 
@@ -11,29 +15,67 @@ from app.models import Base  # импортируем все модели
 @pytest.fixture(scope="function")
 def test_db():
     """Создает чистую БД для каждого теста"""
-    # используем in-memory SQLite с StaticPool для избежания threading issues
-    engine = create_engine(
-        "sqlite://",
-        connect_args={"check_same_thread": False},
-        poolclass=StaticPool,
-    )
+    # используем in-memory SQLite с StaticPool, чтобы все сессии делили одно
+    # соединение
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+
+    async def create_tables():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    async def drop_tables():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+        await engine.dispose()
 
     # создаем таблицы
-    Base.metadata.create_all(bind=engine)
+    asyncio.run(create_tables())
 
-    testing_session_local = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    testing_session_local = async_sessionmaker(
+        bind=engine, autoflush=False, expire_on_commit=False
+    )
 
-    def override_get_db():
-        try:
-            db = testing_session_local()
+    async def override_get_db():
+        async with testing_session_local() as db:
             yield db
-        finally:
-            db.close()
 
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_sessionmaker] = lambda: testing_session_local
 
-    yield
+    yield engine
 
     # очистка после теста
-    Base.metadata.drop_all(bind=engine)
+    asyncio.run(drop_tables())
     app.dependency_overrides.clear()
+
+
+class QueryLog:
+    """Запросы к тестовой БД; max_queries ограничивает их число в блоке"""
+
+    def __init__(self):
+        self.statements = []
+
+    @contextmanager
+    def max_queries(self, limit: int):
+        start = len(self.statements)
+        yield
+        executed = self.statements[start:]
+        if len(executed) > limit:
+            # одинаковые запросы подряд по числу объектов — признак N+1
+            repeated = "\n".join(
+                f"{count} x {' '.join(statement.split())}"
+                for statement, count in Counter(executed).most_common()
+            )
+            pytest.fail(f"{len(executed)} queries, expected <= {limit}:\n{repeated}")
+
+
+@pytest.fixture
+def queries(test_db):
+    log = QueryLog()
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        log.statements.append(statement)
+
+    event.listen(test_db.sync_engine, "before_cursor_execute", capture)
+    yield log
+    event.remove(test_db.sync_engine, "before_cursor_execute", capture)
@@ -0,0 +1,112 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.main import app
+from app.models import bump_data_versions
+from app.utils.cache import ResultCache, task_filters
+
+
+def _stats(client):
+    return client.get("/cache/stats").json()
+
+
+def test_calendar_day_cache_invalidated_by_matching_writes(test_db):
+    with TestClient(app) as client:
+        client.post("/tasks", json={"title": "Day", "due_date": "2024-12-02T10:00"})
+        url = "/calendar/day?target_date=2024-12-02"
+
+        assert client.get(url).json()["total_tasks"] == 1
+        before = _stats(client)
+        assert client.get(url).json()["total_tasks"] == 1
+        assert _stats(client)["hits"] == before["hits"] + 1
+
+        # задача на другой день не сбрасывает запись
+        client.post("/tasks", json={"title": "Other", "due_date": "2024-12-20T10:00"})
+        before = _stats(client)
+        client.get(url)
+        assert _stats(client)["hits"] == before["hits"] + 1
+
+        # перенос задачи на этот день сбрасывает, как и уход с него
+        client.put("/tasks/2", json={"due_date": "2024-12-02T12:00"})
+        assert client.get(url).json()["total_tasks"] == 2
+        client.put("/tasks/1", json={"due_date": "2024-12-25T12:00"})
+        assert client.get(url).json()["total_tasks"] == 1
+        client.delete("/tasks/2")
+        assert client.get(url).json()["total_tasks"] == 0
+
+
+def test_task_list_cache_invalidated_by_filter(test_db):
+    with TestClient(app) as client:
+        client.post("/tasks", json={"title": "High", "priority": "high"})
+        url = "/tasks?priority=high"
+
+        assert client.get(url).json()["total"] == 1
+        client.post("/tasks", json={"title": "Low", "priority": "low"})
+        before = _stats(client)
+        assert client.get(url).json()["total"] == 1
+        assert _stats(client)["hits"] == before["hits"] + 1
+
+        client.put("/tasks/2", json={"priority": "high"})
+        assert client.get(url).json()["total"] == 2
+        client.put("/tasks/1", json={"title": "Renamed"})
+        titles = [task["title"] for task in client.get(url).json()["tasks"]]
+        assert "Renamed" in titles
+
+
+def test_result_cache_lru_and_ttl(test_db):
+    cache = ResultCache(max_entries=2, ttl=60.0)
+    loads = []
+
+    class Db:
+        bind = test_db
+        info = {}
+
+    async def fetch(key):
+        async def load():
+            loads.append(key)
+            return key
+
+        return await cache.fetch(Db, (key,), task_filters(), load)
+
+    async def scenario():
+        for key in ("a", "b", "a", "c", "b"):
+            await fetch(key)
+        cache.ttl = 0
+        await fetch("x")
+        await fetch("x")
+
+    asyncio.run(scenario())
+
+    # "b" вытеснен при добавлении "c", записи с нулевым TTL сразу устаревают
+    assert loads == ["a", "b", "c", "b", "x", "x"]
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["entries"] == 2
+
+
+def test_cache_entry_ignored_after_write_from_another_worker(test_db):
+    with TestClient(app) as client:
+        client.post("/tasks", json={"title": "First"})
+        first = client.get("/tasks")
+        assert first.json()["total"] == 1
+
+        # другой воркер: строка и версия данных меняются мимо этого процесса
+        async def write_elsewhere():
+            async with test_db.begin() as conn:
+                await conn.execute(
+                    text(
+                        "INSERT INTO tasks (title, status, priority) "
+                        "VALUES ('Second', 'PENDING', 'MEDIUM')"
+                    )
+                )
+                await conn.execute(bump_data_versions({"tasks"}))
+
+        asyncio.run(write_elsewhere())
+        second = client.get("/tasks")
+        assert second.json()["total"] == 2
+        assert second.headers["ETag"] != first.headers["ETag"]
+        revalidated = client.get(
+            "/tasks", headers={"If-None-Match": second.headers["ETag"]}
+        )
+        assert revalidated.status_code == 304
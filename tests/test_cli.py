@@ -0,0 +1,28 @@
+import asyncio
+import json
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.cli import run_import
+from app.models import Task
+
+
+def test_run_import(test_db, tmp_path):
+    path = tmp_path / "tasks.ndjson"
+    lines = [
+        json.dumps({"title": f"Задача {i}", "category": "Импорт"}) for i in range(5)
+    ]
+    path.write_text("\n".join(lines) + "\n")
+    sessionmaker = async_sessionmaker(test_db, expire_on_commit=False)
+
+    report = asyncio.run(run_import(sessionmaker, str(path), "ndjson", batch_size=2))
+    assert report["completed"] is True
+    assert report["offset"] == 5
+    assert report["inserted"] == 5
+
+    async def count():
+        async with sessionmaker() as db:
+            return await db.scalar(select(func.count()).select_from(Task))
+
+    assert asyncio.run(count()) == 5
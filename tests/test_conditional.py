@@ -0,0 +1,76 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.main import app
+
+
+def test_etag_not_modified_until_write(test_db):
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with TestClient(app) as client:
+        client.post("/tasks", json={"title": "Task", "due_date": "2024-12-02T10:00"})
+        response = client.get("/tasks")
+        etag = response.headers["etag"]
+        assert response.headers["cache-control"] == "no-cache"
+
+        event.listen(test_db.sync_engine, "before_cursor_execute", capture)
+        response = client.get("/tasks", headers={"If-None-Match": etag})
+        event.remove(test_db.sync_engine, "before_cursor_execute", capture)
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+        # 304 отвечается по версиям, без запроса к задачам
+        assert all("data_versions" in statement for statement in statements)
+
+        other = client.get("/tasks?priority=high").headers["etag"]
+        assert other != etag
+
+        client.put("/tasks/1", json={"title": "Renamed"})
+        response = client.get("/tasks", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.json()["tasks"][0]["title"] == "Renamed"
+        assert response.headers["etag"] != etag
+
+
+def test_scopes_are_independent(test_db):
+    with TestClient(app) as client:
+        client.post("/categories", json={"name": "Work"})
+        etag = client.get("/categories").headers["etag"]
+
+        client.post("/tasks", json={"title": "Task"})
+        response = client.get("/categories", headers={"If-None-Match": f"W/{etag}"})
+        assert response.status_code == 304
+
+        stats_etag = client.get("/categories/stats").headers["etag"]
+        client.post("/tasks", json={"title": "Task", "category_id": 1})
+        response = client.get(
+            "/categories/stats", headers={"If-None-Match": stats_etag}
+        )
+        assert response.status_code == 200
+
+
+def test_if_modified_since(test_db):
+    with TestClient(app) as client:
+        response = client.get("/calendar/month?year=2024&month=12")
+        last_modified = response.headers["last-modified"]
+
+        response = client.get(
+            "/calendar/month?year=2024&month=12",
+            headers={"If-Modified-Since": last_modified},
+        )
+        assert response.status_code == 304
+
+        response = client.get(
+            "/calendar/month?year=2024&month=12",
+            headers={"If-Modified-Since": "Mon, 01 Jan 2001 00:00:00 GMT"},
+        )
+        assert response.status_code == 200
+
+        response = client.get(
+            "/calendar/month?year=2024&month=12",
+            headers={"If-Modified-Since": "not a date"},
+        )
+        assert response.status_code == 200
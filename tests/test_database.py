@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.pool import AsyncAdaptedQueuePool, StaticPool
+
+from app.config import Settings
+from app.db.database import create_engine_from_settings
+
+
+def test_settings_from_env(monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", "postgresql+asyncpg://user:pw@db/tasks")
+    monkeypatch.setenv("DB_POOL_SIZE", "20")
+    monkeypatch.setenv("DB_POOL_PRE_PING", "false")
+    settings = Settings(_env_file=None)
+    assert settings.database_url == "postgresql+asyncpg://user:pw@db/tasks"
+    assert settings.db_pool_size == 20
+    assert settings.db_pool_pre_ping is False
+
+
+def test_postgres_engine_pool_and_statement_timeout():
+    settings = Settings(
+        _env_file=None,
+        database_url="postgresql+asyncpg://user:pw@db/tasks",
+        db_pool_size=20,
+        db_max_overflow=5,
+        db_pool_recycle=600,
+        db_statement_timeout=15_000,
+    )
+    engine = create_engine_from_settings(settings)
+    pool = engine.sync_engine.pool
+    assert isinstance(pool, AsyncAdaptedQueuePool)
+    assert pool.size() == 20
+    assert pool._max_overflow == 5
+    assert pool._recycle == 600
+    assert pool._pre_ping is True
+
+    # параметры соединения видны только при подключении: перехватываем его
+    captured = {}
+
+    @event.listens_for(engine.sync_engine, "do_connect")
+    def capture(dialect, connection_record, cargs, cparams):
+        captured.update(cparams)
+        raise ConnectionRefusedError
+
+    async def connect():
+        with pytest.raises(ConnectionRefusedError):
+            async with engine.connect():
+                pass
+
+    asyncio.run(connect())
+    assert captured["server_settings"] == {"statement_timeout": "15000"}
+
+
+def test_sqlite_engine_pragmas(tmp_path):
+    settings = Settings(
+        _env_file=None,
+        database_url=f"sqlite+aiosqlite:///{tmp_path}/app.db",
+        sqlite_mmap_size=2**20,
+        sqlite_busy_timeout=1234,
+    )
+    engine = create_engine_from_settings(settings)
+
+    async def pragmas():
+        async with engine.connect() as conn:
+            values = {
+                name: await conn.scalar(text(f"PRAGMA {name}"))
+                for name in ("journal_mode", "synchronous", "mmap_size", "busy_timeout")
+            }
+        await engine.dispose()
+        return values
+
+    assert isinstance(engine.sync_engine.pool, AsyncAdaptedQueuePool)
+    # synchronous=NORMAL — 1
+    assert asyncio.run(pragmas()) == {
+        "journal_mode": "wal",
+        "synchronous": 1,
+        "mmap_size": 2**20,
+        "busy_timeout": 1234,
+    }
+
+
+def test_sqlite_memory_engine_keeps_one_connection():
+    settings = Settings(_env_file=None, database_url="sqlite+aiosqlite://")
+    engine = create_engine_from_settings(settings)
+    assert isinstance(engine.sync_engine.pool, StaticPool)
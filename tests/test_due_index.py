@@ -0,0 +1,194 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.main import app
+from app.services.task_service import TaskService
+from app.utils.due_index import due_index
+
+
+@pytest.fixture
+def indexed(monkeypatch):
+    # включаем после старта: lifespan строил бы индекс основной БД
+    def enable():
+        monkeypatch.setattr(due_index, "enabled", True)
+
+    return enable
+
+
+def _due(days: float) -> str:
+    return (datetime.now() + timedelta(days=days)).isoformat(timespec="seconds")
+
+
+def _overdue_pages(client, limit: int) -> list[list[int]]:
+    pages, cursor = [], None
+    while True:
+        url = f"/calendar/overdue?limit={limit}" + (
+            f"&cursor={cursor}" if cursor else ""
+        )
+        page = client.get(url).json()
+        pages.append(([t["id"] for t in page["tasks"]], page["total_overdue"]))
+        cursor = page["next_cursor"]
+        if not cursor:
+            return pages
+
+
+def test_due_index_follows_writes(test_db, indexed, monkeypatch):
+    with TestClient(app) as client:
+        indexed()
+        client.post("/categories", json={"name": "Work"})
+        for i in range(6):
+            client.post(
+                "/tasks",
+                json={"title": f"Task {i}", "due_date": _due(i - 4), "category_id": 1},
+            )
+        client.post("/tasks", json={"title": "No date"})
+        assert client.get("/cache/due-index").json()["consistent"]
+
+        # записи через ORM, массовые операции, удаление категории и импорт
+        client.put("/tasks/1", json={"status": "completed"})
+        client.put("/tasks/7", json={"due_date": _due(-10)})
+        client.patch(
+            "/tasks/bulk",
+            json={"items": [{"id": 5, "due_date": _due(-2)}, {"id": 2, "title": "B"}]},
+        )
+        client.request("DELETE", "/tasks/bulk", json={"ids": [3]})
+        client.delete("/categories/1")
+        body = "\n".join(
+            json.dumps({"title": f"Imported {i}", "due_date": _due(-i - 1)})
+            for i in range(3)
+        )
+        client.post("/tasks/import", content=body)
+
+        check = client.get("/cache/due-index").json()
+        assert check == {
+            "enabled": True,
+            "consistent": True,
+            "tasks": 8,
+            "missing": [],
+            "extra": [],
+            "stale": [],
+        }
+        indexed_pages = _overdue_pages(client, limit=2)
+        monkeypatch.setattr(due_index, "enabled", False)
+        assert _overdue_pages(client, limit=2) == indexed_pages
+        assert client.get("/calendar/overdue?skip=3&limit=2").json()["tasks"]
+
+        # запись мимо сервисов индекс не видит, сверка ее находит
+        monkeypatch.setattr(due_index, "enabled", True)
+
+        async def write_directly():
+            async with test_db.begin() as conn:
+                await conn.execute(text("UPDATE tasks SET title = 'x' WHERE id = 2"))
+
+        asyncio.run(write_directly())
+        check = client.get("/cache/due-index").json()
+        assert (check["consistent"], check["stale"]) == (False, [2])
+
+
+def test_due_index_reloads_after_other_workers_writes(
+    test_db, indexed, queries, monkeypatch
+):
+    async def write_directly(*statements: str):
+        async with test_db.begin() as conn:
+            for statement in statements:
+                await conn.execute(text(statement))
+
+    def overdue() -> int:
+        return client.get("/calendar/overdue").json()["total_overdue"]
+
+    with TestClient(app) as client:
+        indexed()
+        for days in (-3, -2, -1):
+            client.post("/tasks", json={"title": "Task", "due_date": _due(days)})
+        assert overdue() == 3
+        # свои записи сдвигают версию индекса: перечитывается только задача
+        client.put("/tasks/1", json={"title": "Own"})
+        with queries.max_queries(2):
+            assert overdue() == 3
+
+        # запись другого воркера: задача и версия данных в одной транзакции
+        asyncio.run(
+            write_directly(
+                "UPDATE tasks SET status = 'COMPLETED' WHERE id = 2",
+                "UPDATE data_versions SET version = version + 1 WHERE scope = 'tasks'",
+            )
+        )
+        assert overdue() == 2
+        assert client.get("/cache/due-index").json()["consistent"]
+
+        # своя запись после чужой не прячет чужую
+        asyncio.run(
+            write_directly(
+                "UPDATE tasks SET status = 'COMPLETED' WHERE id = 3",
+                "UPDATE data_versions SET version = version + 1 WHERE scope = 'tasks'",
+            )
+        )
+        client.put("/tasks/1", json={"title": "Own again"})
+        assert overdue() == 1
+
+        # запись мимо data_versions видна после ttl
+        asyncio.run(write_directly("UPDATE tasks SET status = 'PENDING' WHERE id = 2"))
+        assert overdue() == 1
+        monkeypatch.setattr(due_index, "ttl", 0)
+        assert overdue() == 2
+
+
+def test_due_index_answers_without_task_queries(test_db, indexed, queries):
+    with TestClient(app) as client:
+        indexed()
+        for days, priority in ((-1, "high"), (1, "high"), (2, "low"), (9, "high")):
+            client.post(
+                "/tasks",
+                json={"title": "Task", "due_date": _due(days), "priority": priority},
+            )
+        client.get("/calendar/overdue")
+
+        async def upcoming():
+            async with AsyncSession(test_db) as db:
+                return await TaskService(db).get_upcoming_tasks(days=7, priority="high")
+
+        # проверка ETag читает только data_versions
+        with queries.max_queries(1):
+            assert client.get("/calendar/overdue").json()["total_overdue"] == 1
+        # без conditional() — только версия данных задач по первичному ключу
+        with queries.max_queries(1):
+            assert [task.id for task in asyncio.run(upcoming())] == [2]
+        # после записи перечитывается только измененная задача
+        client.put("/tasks/3", json={"priority": "high"})
+        with queries.max_queries(2):
+            assert [task.id for task in asyncio.run(upcoming())] == [2, 3]
+
+
+def test_due_index_expands_series(test_db, indexed, monkeypatch):
+    with TestClient(app) as client:
+        indexed()
+        for days, rule in ((-10.1, "FREQ=DAILY"), (-3, None), (-20, "FREQ=WEEKLY")):
+            client.post(
+                "/tasks",
+                json={"title": "Task", "due_date": _due(days), "recurrence_rule": rule},
+            )
+        client.post("/tasks", json={"title": "Task", "due_date": _due(2)})
+        latest = client.get("/calendar/overdue").json()["tasks"][-1]["occurrence"]
+        client.put(f"/tasks/1/occurrences/{latest}", json={"status": "completed"})
+        client.put("/tasks/3", json={"priority": "high"})
+
+        async def upcoming():
+            async with AsyncSession(test_db) as db:
+                tasks = await TaskService(db).get_upcoming_tasks(days=7)
+                return [(task.id, task.due_date) for task in tasks]
+
+        check = client.get("/cache/due-index").json()
+        assert (check["consistent"], check["tasks"]) == (True, 4)
+        indexed_pages = _overdue_pages(client, limit=1)
+        indexed_upcoming = asyncio.run(upcoming())
+        monkeypatch.setattr(due_index, "enabled", False)
+        assert _overdue_pages(client, limit=1) == indexed_pages
+        assert asyncio.run(upcoming()) == indexed_upcoming
+        assert len(indexed_pages) == 2
+        assert [task_id for task_id, _ in indexed_upcoming].count(1) == 7
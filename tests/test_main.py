@@ -1,5 +1,7 @@
 from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 
+from app.db.database import get_db
 from app.main import app
 
 
@@ -19,3 +21,18 @@ def test_health_check(test_db):
         data = response.json()
         assert data["status"] == "healthy"
         assert data["service"] == "taskasaurus-rex"
+        assert data["database"] == "ok"
+
+
+def test_health_check_database_unavailable(test_db, tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/missing/app.db")
+
+    async def unavailable_db():
+        async with AsyncSession(engine) as db:
+            yield db
+
+    app.dependency_overrides[get_db] = unavailable_db
+    with TestClient(app) as client:
+        response = client.get("/health")
+        assert response.status_code == 503
+        assert response.json()["database"] == "unavailable"
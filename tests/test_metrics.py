@@ -0,0 +1,54 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+from prometheus_client.parser import text_string_to_metric_families
+
+from app.db.database import engine
+from app.main import app
+
+
+def _samples(client):
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    return {
+        (sample.name, tuple(sorted(sample.labels.items()))): sample.value
+        for family in text_string_to_metric_families(response.text)
+        for sample in family.samples
+    }
+
+
+def test_metrics(test_db):
+    async def checkout():
+        # тестовые запросы идут в свою БД: пул основного engine трогаем сами
+        async with engine.connect():
+            pass
+        await engine.dispose()
+
+    with TestClient(app) as client:
+        before = _samples(client)
+        asyncio.run(checkout())
+        client.post("/tasks", json={"title": "Task"})
+        client.get("/tasks/1")
+        client.get("/tasks/2")
+        client.get("/tasks/3")
+        client.get("/no-such-route")
+        after = _samples(client)
+
+    def delta(name, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        return after.get(key, 0) - before.get(key, 0)
+
+    route = "/tasks/{task_id}"
+    assert delta("http_requests_total", method="GET", route=route, status="200") == 1
+    assert delta("http_requests_total", method="GET", route=route, status="404") == 2
+    assert (
+        delta("http_requests_total", method="POST", route="/tasks", status="201") == 1
+    )
+    assert delta("http_requests_total", method="GET", route="unmatched", status="404")
+    assert delta("http_request_duration_seconds_count", method="GET", route=route) == 3
+    assert delta("http_response_size_bytes_sum", method="GET", route=route) > 0
+    # сам запрос /metrics еще в обработке
+    assert after[("http_requests_in_progress", (("method", "GET"),))] == 1
+    assert delta("db_pool_checkout_wait_seconds_count") > 0
+    assert ("db_pool_checked_out", ()) in after
@@ -0,0 +1,155 @@
+import asyncio
+
+import pytest
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.db.database import ADOPTED_INDEXES, adopt_schema, run_migrations
+from app.models import Base, DataVersion
+from app.models.search import include_name
+
+
+def test_migrations_match_models(tmp_path):
+    """Миграции создают ту же схему, что описана в моделях"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'migrated.db'}")
+
+    def upgrade_and_compare(connection):
+        config = Config("alembic.ini")
+        config.attributes["connection"] = connection
+        command.upgrade(config, "head")
+        context = MigrationContext.configure(
+            connection, opts={"include_name": include_name}
+        )
+        return compare_metadata(context, Base.metadata)
+
+    async def run():
+        async with engine.begin() as connection:
+            diff = await connection.run_sync(upgrade_and_compare)
+        await engine.dispose()
+        return diff
+
+    assert asyncio.run(run()) == []
+
+
+def test_search_migration_backfills_existing_tasks(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'search.db'}")
+
+    def migrate(connection, revision):
+        config = Config("alembic.ini")
+        config.attributes["connection"] = connection
+        command.upgrade(config, revision)
+
+    async def run():
+        async with engine.begin() as connection:
+            await connection.run_sync(migrate, "0001")
+            await connection.exec_driver_sql(
+                "INSERT INTO tasks (title, status, priority) "
+                "VALUES ('Квартальный отчет', 'PENDING', 'MEDIUM')"
+            )
+            await connection.run_sync(migrate, "head")
+            result = await connection.exec_driver_sql(
+                "SELECT rowid FROM tasks_fts WHERE tasks_fts MATCH 'отч*'"
+            )
+            rows = result.all()
+        await engine.dispose()
+        return rows
+
+    assert asyncio.run(run()) == [(1,)]
+
+
+def test_run_migrations(tmp_path):
+    """Миграции при старте (DB_MIGRATE_ON_STARTUP) не зависят от alembic.ini"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'startup.db'}")
+
+    async def run():
+        await run_migrations(engine)
+        # повторный запуск на актуальной схеме ничего не делает
+        await run_migrations(engine)
+        async with engine.connect() as connection:
+            tables = await connection.run_sync(
+                lambda conn: set(inspect(conn).get_table_names())
+            )
+        await engine.dispose()
+        return tables
+
+    assert {"alembic_version", "tasks", "categories"} <= asyncio.run(run())
+
+
+def _create_legacy(connection, with_data_versions: bool) -> None:
+    # таблицы как у create_all первых версий: из индексов только id
+    config = Config("alembic.ini")
+    config.attributes["connection"] = connection
+    command.upgrade(config, "0001")
+    connection.exec_driver_sql("DROP TABLE alembic_version")
+    for name in ADOPTED_INDEXES:
+        if name not in ("ix_tasks_id", "ix_categories_id"):
+            connection.exec_driver_sql(f"DROP INDEX {name}")
+    # create_all после появления data_versions создавал пустую таблицу
+    if with_data_versions:
+        DataVersion.__table__.create(connection)
+    connection.exec_driver_sql(
+        "INSERT INTO tasks (title, status, priority) "
+        "VALUES ('Квартальный отчет', 'PENDING', 'MEDIUM')"
+    )
+
+
+@pytest.mark.parametrize("with_data_versions", [False, True])
+def test_adopt_schema_created_by_create_all(tmp_path, with_data_versions):
+    """БД, созданная create_all до миграций, переводится под миграции"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'legacy.db'}")
+
+    def compare(connection):
+        context = MigrationContext.configure(
+            connection, opts={"include_name": include_name}
+        )
+        return compare_metadata(context, Base.metadata)
+
+    async def run():
+        async with engine.begin() as connection:
+            await connection.run_sync(_create_legacy, with_data_versions)
+        adopted = await adopt_schema(engine)
+        async with engine.connect() as connection:
+            diff = await connection.run_sync(compare)
+            found = await connection.exec_driver_sql(
+                "SELECT rowid FROM tasks_fts WHERE tasks_fts MATCH 'отч*'"
+            )
+            versions = await connection.exec_driver_sql(
+                "SELECT scope, version FROM data_versions ORDER BY scope"
+            )
+            result = (adopted, diff, found.all(), versions.all())
+        # повторный запуск ничего не делает
+        result += (await adopt_schema(engine),)
+        await engine.dispose()
+        return result
+
+    assert asyncio.run(run()) == (
+        True,
+        [],
+        [(1,)],
+        [("categories", 0), ("tasks", 0)],
+        False,
+    )
+
+
+def test_run_migrations_adopts_create_all_schema(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'legacy.db'}")
+
+    async def run():
+        async with engine.begin() as connection:
+            await connection.run_sync(_create_legacy, True)
+        await run_migrations(engine)
+        async with engine.connect() as connection:
+            result = await connection.exec_driver_sql(
+                "SELECT version_num FROM alembic_version"
+            )
+            versions = result.scalars().all()
+        await engine.dispose()
+        return versions
+
+    head = ScriptDirectory.from_config(Config("alembic.ini")).get_current_head()
+    assert asyncio.run(run()) == [head]
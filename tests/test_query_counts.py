@@ -0,0 +1,106 @@
+import logging
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.utils.cache import result_cache
+
+
+def _seed(client, tasks=5):
+    client.post("/categories", json={"name": "Work"})
+    client.post("/categories", json={"name": "Home"})
+    client.post(
+        "/tasks",
+        json={"title": "Parent", "category_id": 1, "due_date": "2024-12-02T09:00"},
+    )
+    for i in range(tasks):
+        client.post(
+            "/tasks",
+            json={
+                "title": f"Task {i}",
+                "category_id": 1 + i % 2,
+                "parent_id": 1,
+                "due_date": f"2024-12-0{2 + i % 5}T10:00",
+            },
+        )
+
+
+@pytest.mark.parametrize(
+    ("method", "url", "body", "expected"),
+    [
+        # SELECT задачи, UPDATE ... RETURNING updated_at, версия данных
+        ("PUT", "/tasks/2", {"status": "completed"}, ["SELECT", "UPDATE", "UPDATE"]),
+        # существующие id, подзадачи без родителя, DELETE, версия данных
+        ("DELETE", "/tasks/1", None, ["SELECT", "UPDATE", "DELETE", "UPDATE"]),
+        ("PUT", "/categories/1", {"color": "#000000"}, ["SELECT", "UPDATE", "UPDATE"]),
+        ("DELETE", "/categories/1", None, ["SELECT", "UPDATE", "DELETE", "UPDATE"]),
+        (
+            "DELETE",
+            "/categories/1?reassign_to=2",
+            None,
+            ["SELECT", "UPDATE", "DELETE", "UPDATE"],
+        ),
+    ],
+)
+def test_write_query_counts(test_db, queries, method, url, body, expected):
+    with TestClient(app) as client:
+        _seed(client)
+        start = len(queries.statements)
+        response = client.request(method, url, json=body)
+        assert response.status_code == 200
+    # число запросов не зависит от числа задач в категории и подзадач
+    assert [s.split()[0].upper() for s in queries.statements[start:]] == expected
+
+
+@pytest.mark.parametrize(
+    ("url", "limit"),
+    [
+        # версии данных, count и два сегмента keyset (due_date с NULL и без)
+        ("/tasks", 4),
+        ("/tasks/1", 2),
+        ("/tasks/1/tree", 2),
+        ("/tasks/export", 2),
+        ("/categories", 4),
+        ("/categories/stats", 2),
+        ("/calendar/month?year=2024&month=12", 2),
+        ("/calendar/week?target_date=2024-12-02", 2),
+        ("/calendar/day?target_date=2024-12-02", 2),
+        # агрегат по разовым задачам и серии диапазона
+        ("/calendar/heatmap?start_date=2024-12-01&end_date=2024-12-31", 3),
+        # плюс серии со сроком до текущего момента
+        ("/calendar/overdue", 5),
+    ],
+)
+def test_read_query_counts(test_db, queries, url, limit):
+    # 20 задач: запрос на задачу, категорию или подзадачу сразу превысит лимит
+    result_cache.clear()
+    with TestClient(app) as client:
+        _seed(client, tasks=20)
+        with queries.max_queries(limit):
+            assert client.get(url).status_code == 200
+
+
+def test_max_queries_reports_repeated_statements(test_db, queries):
+    with TestClient(app) as client:
+        _seed(client)
+        with (
+            pytest.raises(pytest.fail.Exception, match="2 x SELECT"),
+            queries.max_queries(1),
+        ):
+            client.get("/tasks/2")
+            client.get("/tasks/3")
+
+
+def test_server_timing_and_log(test_db, caplog):
+    with TestClient(app) as client:
+        _seed(client)
+        with caplog.at_level(logging.INFO, logger="app.sql"):
+            response = client.put("/tasks/2", json={"status": "completed"})
+
+    assert response.headers["server-timing"].startswith("db;dur=")
+    assert response.headers["server-timing"].endswith('desc="3 queries"')
+    [record] = caplog.records
+    assert (record.method, record.path, record.status) == ("PUT", "/tasks/2", 200)
+    assert record.queries == 3
+    assert len(record.slowest) == 3
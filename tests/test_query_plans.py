@@ -0,0 +1,118 @@
+import asyncio
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.main import app
+from app.services.calendar_service import CalendarService
+from app.services.category_service import CategoryService
+from app.services.task_service import TaskService
+
+ENDPOINTS = [
+    "/tasks",
+    "/tasks?status=pending",
+    "/tasks?priority=high",
+    "/tasks?category_id=1",
+    "/tasks?sort_by=due_date&order=asc&limit=2",
+    "/tasks?sort_by=title&limit=2",
+    "/tasks?search=task",
+    "/tasks/search?q=task",
+    "/tasks/1",
+    "/tasks/1/tree",
+    "/categories",
+    "/categories/1",
+    "/categories/1/stats",
+    "/calendar/month?year=2024&month=12",
+    "/calendar/week?target_date=2024-12-02",
+    "/calendar/day?target_date=2024-12-02",
+    "/calendar/today",
+    "/calendar/heatmap?start_date=2024-01-01&end_date=2024-12-31",
+    "/calendar/overdue",
+    "/calendar/overdue?limit=1",
+]
+
+
+def _offenders(engine, statements):
+    async def explain():
+        async with engine.connect() as connection:
+            return await connection.run_sync(
+                lambda sync_connection: {
+                    statement: scans
+                    for statement, parameters in statements
+                    if (scans := _full_scans(sync_connection, statement, parameters))
+                }
+            )
+
+    return asyncio.run(explain())
+
+
+def _full_scans(connection, statement, parameters):
+    plan = connection.exec_driver_sql(
+        f"EXPLAIN QUERY PLAN {statement}", parameters
+    ).fetchall()
+    return [
+        row[3]
+        for row in plan
+        if row[3].startswith(("SCAN tasks", "SCAN categories"))
+        and "USING" not in row[3]
+        and "VIRTUAL TABLE" not in row[3]
+    ]
+
+
+@pytest.fixture
+def captured_selects(test_db):
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(test_db.sync_engine, "before_cursor_execute", capture)
+    yield statements
+    event.remove(test_db.sync_engine, "before_cursor_execute", capture)
+
+
+def _seed(client):
+    client.post("/categories", json={"name": "Work"})
+    for i in range(5):
+        client.post(
+            "/tasks",
+            json={
+                "title": f"Task {i}",
+                "priority": "high" if i % 2 else "low",
+                "due_date": f"2024-12-0{i + 1}T10:00:00",
+                "category_id": 1,
+                "parent_id": 1 if i else None,
+            },
+        )
+
+
+def test_service_queries_use_indexes(test_db, captured_selects):
+    with TestClient(app) as client:
+        _seed(client)
+        captured_selects.clear()
+        for url in ENDPOINTS:
+            assert client.get(url).status_code == 200
+
+    # запросы сервисов, у которых пока нет маршрутов
+    async def unrouted_queries():
+        async with AsyncSession(test_db) as db:
+            await CalendarService(db).get_calendar_stats(
+                date(2024, 12, 1), date(2024, 12, 31)
+            )
+            await TaskService(db).get_upcoming_tasks(days=30, priority="high")
+            await TaskService(db).get_subtasks(1)
+            await CategoryService(db).get_category_tasks(1)
+
+    asyncio.run(unrouted_queries())
+
+    assert captured_selects
+    assert _offenders(test_db, captured_selects) == {}
+
+
+def test_full_scan_is_detected(test_db):
+    statements = [("SELECT * FROM tasks WHERE description = ?", ("x",))]
+    assert _offenders(test_db, statements)
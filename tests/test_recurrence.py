@@ -0,0 +1,74 @@
+from datetime import datetime
+
+import pytest
+
+from app.utils.recurrence import (
+    InvalidRuleError,
+    last_occurrence,
+    occurrences,
+    parse_rule,
+    series_end,
+    window,
+)
+
+
+@pytest.mark.parametrize(
+    "rule",
+    [
+        "FREQ=DAILY;INTERVAL=3",
+        "FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,FR",
+        "FREQ=MONTHLY",
+        "FREQ=MONTHLY;BYDAY=-1FR",
+        "FREQ=MONTHLY;INTERVAL=5;BYMONTHDAY=31",
+        "FREQ=YEARLY;BYMONTH=2;BYMONTHDAY=29",
+        "RRULE:FREQ=WEEKLY;UNTIL=20300101T000000Z",
+    ],
+)
+def test_occurrences_match_full_expansion(rule):
+    # 31 января: с переносом dtstart на месяц вперед день месяца сдвинулся бы
+    dtstart = datetime(2001, 1, 31, 9, 30)
+    start, end = window(datetime(2027, 3, 1), datetime(2027, 5, 31, 23, 59))
+    expected = parse_rule(rule, dtstart).between(start, end, inc=True)
+    assert occurrences(parse_rule(rule, dtstart), start, end) == expected
+
+
+@pytest.mark.parametrize(
+    "rule",
+    [
+        "FREQ=DAILY;INTERVAL=3",
+        "FREQ=MONTHLY;INTERVAL=5;BYMONTHDAY=31",
+        "FREQ=YEARLY;BYMONTH=2;BYMONTHDAY=29",
+        "FREQ=WEEKLY;COUNT=10",
+        "FREQ=MONTHLY;UNTIL=20020101T000000Z",
+    ],
+)
+@pytest.mark.parametrize("end", [datetime(2000, 1, 1), datetime(2027, 3, 1, 12)])
+def test_last_occurrence_matches_full_expansion(rule, end):
+    dtstart = datetime(2001, 1, 31, 9, 30)
+    expected = parse_rule(rule, dtstart).before(end, inc=True)
+    assert last_occurrence(parse_rule(rule, dtstart), end) == expected
+
+
+def test_series_end():
+    dtstart = datetime(2024, 1, 1, 9)
+    assert series_end(parse_rule("FREQ=DAILY;COUNT=3", dtstart)) == datetime(
+        2024, 1, 3, 9
+    )
+    assert series_end(parse_rule("FREQ=DAILY;UNTIL=20240105", dtstart)) == datetime(
+        2024, 1, 5
+    )
+    assert series_end(parse_rule("FREQ=DAILY", dtstart)) is None
+
+
+@pytest.mark.parametrize(
+    "rule",
+    [
+        "FREQ=HOURLY",
+        "FREQ=DAILY;COUNT=100000",
+        "DTSTART:20240101T000000\nRRULE:FREQ=DAILY",
+        "FREQ=DAILY;BYDAY=XX",
+    ],
+)
+def test_parse_rule_rejects(rule):
+    with pytest.raises(InvalidRuleError):
+        parse_rule(rule)
@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.config import settings
+from app.db.replicas import get_replicas
+from app.main import app
+from app.models import Base, Category, Task
+
+
+@pytest.fixture
+def replica(test_db, tmp_path):
+    """Реплика — второй файл SQLite со своими данными вместо копии основной БД"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/replica.db")
+
+    async def create():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with async_sessionmaker(engine)() as db:
+            db.add_all([Task(title="С реплики"), Category(name="С реплики")])
+            await db.commit()
+
+    asyncio.run(create())
+    sessionmaker = async_sessionmaker(
+        engine,
+        expire_on_commit=False,
+        info={"primary": test_db, "replica_lag": settings.replica_stickiness},
+    )
+    app.dependency_overrides[get_replicas] = lambda: [sessionmaker]
+    yield engine
+    asyncio.run(engine.dispose())
+
+
+def titles(response) -> list[str]:
+    return [task["title"] for task in response.json()["tasks"]]
+
+
+def test_reads_go_to_replica(replica):
+    with TestClient(app) as client:
+        assert titles(client.get("/tasks")) == ["С реплики"]
+        categories = client.get("/categories").json()["categories"]
+        assert [category["name"] for category in categories] == ["С реплики"]
+
+
+def test_client_reads_own_writes(replica, monkeypatch):
+    with TestClient(app) as client:
+        response = client.post("/tasks", json={"title": "Новая"})
+        assert response.status_code == 201
+        assert "last_write=" in response.headers["set-cookie"]
+        assert titles(client.get("/tasks")) == ["Новая"]
+
+        # окно прошло: клиент снова читает реплику
+        monkeypatch.setattr(settings, "replica_stickiness", 0)
+        task_id = response.json()["id"]
+        assert client.get(f"/tasks/{task_id}").json()["title"] == "С реплики"
+
+
+def test_failed_write_does_not_stick(replica):
+    with TestClient(app) as client:
+        response = client.post("/tasks", json={"title": ""})
+        assert response.status_code == 422
+        assert "set-cookie" not in response.headers
+
+
+def test_replica_read_after_write_is_not_cached(replica):
+    with TestClient(app) as writer, TestClient(app) as reader:
+        writer.post("/tasks", json={"title": "Новая"})
+        # реплика еще не получила запись: ее ответ не должен попасть в кэш,
+        # иначе писатель прочитал бы его из кэша вместо основной БД
+        assert titles(reader.get("/tasks")) == ["С реплики"]
+        assert titles(writer.get("/tasks")) == ["Новая"]